@@ -82,7 +82,7 @@ class CategorySummary(SphinxDirective):
             prefix.append('default')
 
         for item in chip.getkeys(*prefix):
-            if 'shorthelp' in chip.getkeys(*prefix, item):
+            if 'defvalue' in chip.getkeys(*prefix, item):
                 shorthelp = chip.get(*prefix, item, field='shorthelp')
                 table.append([para(item),para(shorthelp)])
             else:
@@ -0,0 +1,68 @@
+'''Benchmark to measure log file checking.
+
+$ ./examples/benchmark/check_logfile.py <MB>
+Writes a synthetic OpenROAD-style log of the given size (500 MB by default)
+and reports the time check_logfile() takes to apply the OpenROAD errors and
+warnings regexes to it. The same log is then checked with an inverted grep
+added, which requires every line to go through the grep pipeline.
+'''
+
+import siliconcompiler
+
+import os
+import sys
+import tempfile
+import time
+
+LINES = [
+    '[INFO GRT-0101] Running extra iterations to remove overflow.\n',
+    '[INFO DRT-0195] Start 2nd optimization iteration.\n',
+    '    Completing 10% with 1234 violations.\n',
+    '    elapsed time = 00:00:01, memory = 1234.56 (MB).\n',
+    '[INFO DPL-0001] Placed 5432 filler instances.\n',
+]
+WARNING = '[WARNING GRT-0097] No global routing found for nets.\n'
+ERROR = '[ERROR DRT-0305] Net foo of signal type GROUND is not routable.\n'
+
+def write_log(filename, size):
+    block = ''.join(LINES * 200) + WARNING
+    with open(filename, 'w') as f:
+        written = 0
+        count = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+            count += 1
+            if count % 1000 == 0:
+                f.write(ERROR)
+                written += len(ERROR)
+
+def measure(chip, logfile):
+    start = time.perf_counter()
+    matches = chip.check_logfile(step='route', logfile=logfile, display=False)
+    return time.perf_counter() - start, matches
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    chip = siliconcompiler.Chip('test', loglevel='ERROR')
+    chip.set('option', 'flow', 'bench')
+    chip.node('bench', 'route', 'openroad')
+    chip.set('tool', 'openroad', 'regex', 'route', '0', 'warnings', r'^\[WARNING')
+    chip.set('tool', 'openroad', 'regex', 'route', '0', 'errors', r'ERROR')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        logfile = os.path.join(tmpdir, 'route.log')
+        write_log(logfile, size * 1000000)
+        mb = os.path.getsize(logfile) / 1000000
+
+        elapsed, matches = measure(chip, logfile)
+        print(f'{"prefiltered":<12} {elapsed:>8.2f} s {mb / elapsed:>8.1f} MB/s {matches}')
+
+        chip.set('tool', 'openroad', 'regex', 'route', '0', 'other', ['-v INFO', 'violations'])
+        elapsed, matches = measure(chip, logfile)
+        print(f'{"every line":<12} {elapsed:>8.2f} s {mb / elapsed:>8.1f} MB/s {matches}')
+
+if __name__ == '__main__':
+    main()
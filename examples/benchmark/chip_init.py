@@ -0,0 +1,37 @@
+'''Microbenchmark to measure Chip() construction time.
+
+$ ./examples/benchmark/chip_init.py <N>
+Constructs N Chip objects and reports the average construction time, next to
+the time it takes to build the schema from scratch with schema_cfg(), which
+is what each Chip() did before the schema snapshot was introduced.
+'''
+
+import siliconcompiler
+from siliconcompiler.schema import schema_cfg
+
+import sys
+import time
+
+def measure(n, func):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    # The first Chip() builds the snapshot.
+    start = time.perf_counter()
+    siliconcompiler.Chip('first')
+    first_time = time.perf_counter() - start
+
+    schema_time = measure(n, schema_cfg)
+    chip_time = measure(n, lambda: siliconcompiler.Chip('test'))
+
+    print(f'{"first Chip()":<16} {first_time * 1000:>8.2f} ms')
+    print(f'{"schema_cfg()":<16} {schema_time * 1000:>8.2f} ms')
+    print(f'{"Chip()":<16} {chip_time * 1000:>8.2f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+'''Benchmark to measure hash_files() throughput.
+
+$ ./examples/benchmark/hash_files.py <N> <MB>
+Writes N files of MB megabytes each and hashes them with hash_files() for
+several algorithms, first with an empty digest cache (every file is read)
+and then with a warm one (no file is read). The cache is kept in a temporary
+[option,cachedir].
+'''
+
+import siliconcompiler
+
+import os
+import sys
+import tempfile
+import time
+
+ALGOS = ['sha256', 'sha1', 'blake2b', 'md5']
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for i in range(n):
+            files.append(os.path.join(tmpdir, f'{i}.gds'))
+            with open(files[-1], 'wb') as f:
+                for _ in range(size):
+                    f.write(os.urandom(1024 * 1024))
+            # Files modified in the last seconds aren't cached.
+            os.utime(files[-1], (0, 0))
+
+        chip = siliconcompiler.Chip('test', loglevel='ERROR')
+        chip.set('input', 'gds', files)
+        chip.set('option', 'cachedir', os.path.join(tmpdir, 'cache'))
+
+        print(f'{"algo":<8} {"cold (MB/s)":>12} {"warm (ms)":>12}')
+        for algo in ALGOS:
+            start = time.perf_counter()
+            chip.hash_files('input', 'gds', algo=algo, update=False)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chip.hash_files('input', 'gds', algo=algo, update=False)
+            warm = time.perf_counter() - start
+
+            print(f'{algo:<8} {n * size / cold:>12.0f} {warm * 1000:>12.2f}')
+
+if __name__ == '__main__':
+    main()
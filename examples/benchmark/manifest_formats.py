@@ -0,0 +1,69 @@
+'''Benchmark to compare manifest formats.
+
+$ ./examples/benchmark/manifest_formats.py <N>
+Loads a target and several libraries, then writes and reads the manifest N
+times in each supported format and reports the average time per write and per
+read, along with the file size. Reads merge the manifest into a new Chip
+object, so the time to only parse the file is reported separately.
+'''
+
+import siliconcompiler
+
+import gzip
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+import yaml
+
+FORMATS = ['json', 'json.gz', 'yaml', 'pkl', 'pkl.gz']
+
+def measure(chip, filename, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        chip.write_manifest(filename)
+    write_time = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    for _ in range(n):
+        reader = siliconcompiler.Chip(chip.get('design'), loglevel='ERROR')
+        reader.read_manifest(filename)
+    read_time = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    for _ in range(n):
+        parse(filename)
+    parse_time = (time.perf_counter() - start) / n
+
+    return write_time, read_time, parse_time, os.path.getsize(filename)
+
+def parse(filename):
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as f:
+        if '.json' in filename:
+            return json.load(f)
+        elif '.yaml' in filename:
+            return yaml.load(f, Loader=yaml.SafeLoader)
+        else:
+            return pickle.load(f)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    chip = siliconcompiler.Chip('gcd', loglevel='ERROR')
+    chip.load_target('skywater130_demo')
+    for lib in ('sky130io', 'nangate45', 'asap7sc7p5t'):
+        chip.load_lib(lib)
+
+    print(f'{"format":<8} {"write (ms)":>12} {"read (ms)":>12} {"parse (ms)":>12} {"size (kB)":>12}')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in FORMATS:
+            filename = os.path.join(tmpdir, f'gcd.pkg.{fmt}')
+            write_time, read_time, parse_time, size = measure(chip, filename, n)
+            print(f'{fmt:<8} {write_time * 1000:>12.1f} {read_time * 1000:>12.1f} '
+                  f'{parse_time * 1000:>12.1f} {size / 1000:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -5,28 +5,50 @@ Runs a serial flowgraph with N tasks and output "done" after S steps.
 
 $ ./examples/benchmark/scalability.py parallel <N>
 Runs a parallel flowgraph with N parallel tasks.
+
+Once the run completes, the total wall time and the scheduling overhead per
+task (wall time minus the time spent inside the slowest task of each step)
+are reported.
 '''
 
 import siliconcompiler
 
 import sys
+import time
+
+def report(chip, num_tasks):
+    start = time.time()
+    chip.run()
+    walltime = time.time() - start
+
+    # Time spent inside the slowest task of each step
+    flow = chip.get('option', 'flow')
+    steps = chip.list_steps()
+    tasktime = 0
+    for step in steps:
+        tasktime += max(chip.get('metric', step, index, 'tasktime')
+                        for index in chip.getkeys('flowgraph', flow, step))
+    overhead = (walltime - tasktime) / len(steps)
+
+    print(f'tasks: {num_tasks}, wall time: {walltime:.2f} s, '
+          f'overhead per task: {overhead * 1000:.1f} ms')
 
 def run_long_serial(N, steps_to_run):
-    chip = siliconcompiler.Chip()
+    chip = siliconcompiler.Chip('test_long_serial')
     flow = 'test_long_serial'
     pipe = [{'import': 'echo'}]
     pipe += [{f'measured{i}': 'echo'} for i in range(steps_to_run - 1)]
     pipe += [{'done': 'echo'}]
     pipe += [{f'extra{i}': 'echo'} for i in range(N - (steps_to_run + 1))]
 
-    chip.set('design', 'test_long_serial')
-    chip.set('flow', flow)
-    chip.set('mode', 'sim')
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'mode', 'sim')
     chip.pipe(flow, pipe)
-    chip.run()
+
+    report(chip, N)
 
 def run_wide_parallel(N):
-    chip = siliconcompiler.Chip()
+    chip = siliconcompiler.Chip('test_long_parallel')
     flow = 'test_long_parallel'
 
     chip.node(flow, 'import', 'echo')
@@ -37,10 +59,10 @@ def run_wide_parallel(N):
         chip.edge(flow, 'import', 'run', head_index=i)
         chip.edge(flow, 'run', 'done', tail_index=i)
 
-    chip.set('design', 'test_long_serial')
-    chip.set('flow', flow)
-    chip.set('mode', 'sim')
-    chip.run()
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'mode', 'sim')
+
+    report(chip, N + 2)
 
 def main():
     num_tasks = int(sys.argv[2])
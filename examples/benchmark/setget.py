@@ -0,0 +1,60 @@
+'''Microbenchmark to measure Chip.get()/Chip.set() throughput.
+
+$ ./examples/benchmark/setget.py <N>
+Performs N get() and set() calls on a set of representative keypaths, and
+reports calls per second for the keypath index (the default code path) and for
+an uncached tree walk through Chip._search() (the code path used before the
+keypath index was introduced).
+'''
+
+import siliconcompiler
+
+import sys
+import time
+
+KEYPATHS = [
+    (('option', 'flow'), 'asicflow'),
+    (('option', 'quiet'), True),
+    (('asic', 'diearea'), [(0, 0), (100, 100)]),
+    (('flowgraph', 'asicflow', 'place', '0', 'input'), [('floorplan', '0')]),
+    (('flowgraph', 'asicflow', 'place', '0', 'status'), 'success'),
+    (('metric', 'place', '0', 'errors'), 0),
+    (('tool', 'openroad', 'option', 'place', '0'), ['-no_init']),
+    (('tool', 'openroad', 'var', 'place', '0', 'place_density'), ['0.5']),
+]
+
+def measure(n, get, set):
+    start = time.perf_counter()
+    for _ in range(n):
+        for keypath, value in KEYPATHS:
+            set(*keypath, value)
+    set_rate = n * len(KEYPATHS) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        for keypath, _ in KEYPATHS:
+            get(*keypath)
+    get_rate = n * len(KEYPATHS) / (time.perf_counter() - start)
+
+    return get_rate, set_rate
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    chip = siliconcompiler.Chip('setget')
+
+    # _search() always walks the tree, the index only records its results.
+    def walk_get(*keypath):
+        return chip._search(chip.cfg, keypath, *keypath, mode='get')
+    def walk_set(*args):
+        return chip._search(chip.cfg, args[:-1], *args, mode='set')
+
+    walk_get_rate, walk_set_rate = measure(n, walk_get, walk_set)
+    index_get_rate, index_set_rate = measure(n, chip.get, chip.set)
+
+    print(f'{"":<8} {"walk (calls/s)":>16} {"index (calls/s)":>16} {"speedup":>8}')
+    print(f'{"get":<8} {walk_get_rate:>16.0f} {index_get_rate:>16.0f} {index_get_rate / walk_get_rate:>7.1f}x')
+    print(f'{"set":<8} {walk_set_rate:>16.0f} {index_set_rate:>16.0f} {index_set_rate / walk_set_rate:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
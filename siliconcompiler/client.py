@@ -1,23 +1,43 @@
 # Copyright 2020 Silicon Compiler Authors. All Rights Reserved.
 
 import base64
+import concurrent.futures
 import glob
 import math
 import multiprocessing
 import importlib
 import json
 import os
+import queue
 import requests
 import shutil
+import stat
 import subprocess
 import sys
+import tarfile
+import threading
 import time
 import urllib.parse
+import urllib3
 import uuid
+import zlib
 
 from siliconcompiler.crypto import *
 from siliconcompiler import utils
 
+# Size of the chunks which archives are uploaded in.
+_CHUNK = 4 * 1024 * 1024
+# Number of times a transfer is resumed after a network error before giving up.
+_RETRIES = 5
+# Seconds to wait for the server before a transfer is considered interrupted.
+_TIMEOUT = 120
+# Errors which interrupt a transfer and can be recovered from by resuming it.
+_TRANSFER_ERRORS = (requests.exceptions.RequestException,
+                    urllib3.exceptions.HTTPError)
+# Arguments of TarFile.extract() for results: the 'data' filter also rejects
+# special files and members outside of the destination, where supported.
+_EXTRACT_ARGS = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+
 ###################################
 def get_base_url(chip):
     '''Helper method to get the root URL for API calls, given a Chip object.
@@ -36,6 +56,384 @@ def get_base_url(chip):
         remote_protocol = 'https://' if str(remote_port) == '443' else 'http://'
     return remote_protocol + remote_host
 
+###################################
+def _post(url, **kwargs):
+    '''Helper method to make a POST request, following the 302 redirects
+    which would otherwise be translated to GETs.
+    '''
+
+    while True:
+        resp = requests.post(url, allow_redirects=False, **kwargs)
+        if resp.status_code != 302:
+            return resp
+        url = resp.headers['Location']
+
+###################################
+def _log_progress(chip, action, interval=10):
+    '''Returns a progress callback which logs how much of a transfer is
+    done, at most once every 'interval' seconds.
+    '''
+
+    last = [time.monotonic()]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if (now - last[0] < interval) and (not total or done < total):
+            return
+        last[0] = now
+        if total:
+            chip.logger.info(f"{action}: {done / 2**20:.1f} of {total / 2**20:.1f} MB "
+                             f"({100 * done // total}%)")
+        else:
+            chip.logger.info(f"{action}: {done / 2**20:.1f} MB")
+
+    return progress
+
+###################################
+class _ArchiveWriter:
+    '''File-like object which gzip-compresses what tarfile writes to it,
+    and hands the compressed data to a bounded queue in chunks.
+
+    zlib is used instead of tarfile's 'w|gz' mode because the gzip header it
+    writes has no timestamp: the archive of an unchanged directory is always
+    the same byte stream, which is what allows uploads to be resumed.
+    '''
+
+    def __init__(self, chunks, stop):
+        self.chunks = chunks
+        self.stop = stop
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.buffer = bytearray()
+        self.size = 0
+
+    def write(self, data):
+        if self.stop.is_set():
+            raise OSError('archive stream was closed')
+        self.size += len(data)
+        self.buffer += self.compressor.compress(data)
+        if len(self.buffer) >= _CHUNK:
+            self._put()
+        return len(data)
+
+    def close(self):
+        self.buffer += self.compressor.flush()
+        self._put()
+
+    def _put(self):
+        self.chunks.put((bytes(self.buffer), self.size))
+        self.buffer.clear()
+
+###################################
+def _tar_stream(directory, skip=0, progress=None):
+    '''Generator which yields a gzip-compressed tar archive of 'directory'
+    in chunks, as it is being compressed. No intermediate file is written,
+    and at most a few chunks are held in memory.
+
+    The first 'skip' bytes of the archive are dropped, which is used to resume
+    an interrupted upload. 'progress' is called with the number of archived
+    bytes and the total size of the directory's files.
+    '''
+
+    total = 0
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if not os.path.islink(path):
+                total += os.path.getsize(path)
+
+    # tarfile writes from a thread, which blocks once the consumer falls
+    # behind by a few chunks.
+    chunks = queue.Queue(maxsize=4)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            writer = _ArchiveWriter(chunks, stop)
+            with tarfile.open(fileobj=writer, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                tar.add(directory, arcname='.')
+            writer.close()
+            chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            data, size = item
+            if progress:
+                progress(min(size, total), total)
+            if skip >= len(data):
+                skip -= len(data)
+                continue
+            yield data[skip:]
+            skip = 0
+    finally:
+        # Unblock the producer if the consumer stopped early.
+        stop.set()
+        while producer.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+###################################
+def _upload_archive(chip, directory, progress=None):
+    '''Helper method to upload an archive of 'directory' to the server in
+    chunks. If a chunk fails to upload, the server is asked how much of the
+    archive it has received and the upload resumes from there.
+    '''
+
+    upload_url = urllib.parse.urljoin(get_base_url(chip),
+                                      '/upload/' + chip.status['jobhash'])
+
+    # Set authentication parameters if necessary.
+    post_params = {}
+    rcfg = chip.status['remote_cfg']
+    if ('username' in rcfg) and ('password' in rcfg):
+        post_params['username'] = rcfg['username']
+        post_params['key'] = rcfg['password']
+
+    offset = 0
+    retries = 0
+    while True:
+        stream = _tar_stream(directory, skip=offset, progress=progress)
+        try:
+            for data in stream:
+                post_params['offset'] = offset
+                resp = _post(upload_url,
+                             files=[('params', json.dumps(post_params)),
+                                    ('chunk', data)],
+                             timeout=_TIMEOUT)
+                if resp.status_code >= 400:
+                    raise RuntimeError(f'Remote server rejected the upload: {resp.text}')
+                offset = resp.json()['offset']
+            return offset
+        except _TRANSFER_ERRORS as e:
+            retries += 1
+            if retries > _RETRIES:
+                raise
+            chip.logger.warning(f'Upload interrupted ({e}); resuming.')
+        finally:
+            stream.close()
+
+        # Ask the server how much it has received.
+        post_params.pop('offset', None)
+        try:
+            resp = _post(upload_url,
+                         files={'params': json.dumps(post_params)},
+                         timeout=_TIMEOUT)
+            offset = resp.json()['offset']
+        except _TRANSFER_ERRORS:
+            pass
+
+###################################
+def _upload_blobs(chip, directory, progress=None):
+    '''Helper method to upload the files of 'directory' which are missing
+    from the server's blob store. Files are identified by their sha256
+    digest, from Chip._hash_file().
+
+    Returns a list with the 'path' of each file relative to 'directory', its
+    'digest' and its permission 'mode', which the server uses to link the
+    job directory together from the store. Returns None if the server has no
+    blob store, or if it is full.
+    '''
+
+    base_url = get_base_url(chip)
+
+    paths = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if not os.path.islink(path):
+                paths.append(path)
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        digests = list(executor.map(lambda path: chip._hash_file(path, 'sha256'), paths))
+
+    resp = _post(urllib.parse.urljoin(base_url, '/missing_blobs/'),
+                 data=json.dumps({'digests': sorted(set(digests))}),
+                 timeout=_TIMEOUT)
+    if resp.status_code == 404:
+        return None
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Remote server returned error code {resp.status_code}: {resp.text}')
+    missing = set(resp.json()['missing'])
+
+    # Upload each missing blob once, even if several files share it.
+    uploads = {}
+    for path, digest in zip(paths, digests):
+        if digest in missing and digest not in uploads:
+            uploads[digest] = path
+    total = sum(os.path.getsize(path) for path in uploads.values())
+    done = 0
+    for digest, path in uploads.items():
+        retries = 0
+        while True:
+            try:
+                with open(path, 'rb') as f:
+                    resp = _post(urllib.parse.urljoin(base_url, '/blob/' + digest),
+                                 data=f,
+                                 timeout=_TIMEOUT)
+                if resp.status_code == 507:
+                    chip.logger.warning("Remote server's blob store is full; uploading an archive.")
+                    return None
+                if resp.status_code >= 400:
+                    raise RuntimeError(f'Remote server rejected {path}: {resp.text}')
+                break
+            except _TRANSFER_ERRORS:
+                retries += 1
+                if retries > _RETRIES:
+                    raise
+        done += os.path.getsize(path)
+        if progress:
+            progress(done, total)
+
+    chip.logger.info(f"Uploaded {len(uploads)} of {len(paths)} files ({total / 2**20:.1f} MB); "
+                     "the rest were already on the server.")
+
+    files = []
+    for path, digest in zip(paths, digests):
+        files.append({
+            'path': os.path.relpath(path, directory).replace(os.sep, '/'),
+            'digest': digest,
+            'mode': stat.S_IMODE(os.stat(path).st_mode),
+        })
+    return files
+
+###################################
+class _ResultsDownload:
+    '''Read-only file-like object over the results archive of a job, which
+    transparently resumes the download with a Range request if the
+    connection drops.
+    '''
+
+    def __init__(self, chip, progress=None):
+        job_hash = chip.status['jobhash']
+        self.url = urllib.parse.urljoin(get_base_url(chip), '/get_results/' + job_hash + '.tar.gz')
+
+        # Set authentication parameters if necessary.
+        rcfg = chip.status['remote_cfg']
+        if ('username' in rcfg) and ('password' in rcfg):
+            self.post_params = {
+                'username': rcfg['username'],
+                'key': rcfg['password'],
+            }
+        else:
+            self.post_params = {}
+
+        self.chip = chip
+        self.progress = progress
+        self.offset = 0
+        self.total = None
+        self.retries = 0
+        self.resp = None
+        self._open()
+
+    def _open(self):
+        headers = {}
+        if self.offset:
+            headers['Range'] = f'bytes={self.offset}-'
+
+        # Make the web request, and stream the results archive in chunks.
+        redirect_url = self.url
+        can_redirect = False
+        while True:
+            resp = requests.post(redirect_url,
+                                 data=json.dumps(self.post_params),
+                                 headers=headers,
+                                 allow_redirects=can_redirect,
+                                 stream=True,
+                                 timeout=_TIMEOUT)
+            if resp.status_code == 302:
+                redirect_url = resp.headers['Location']
+            elif resp.status_code == 303:
+                redirect_url = resp.headers['Location']
+                can_redirect = True
+            else:
+                break
+        if resp.status_code >= 400:
+            raise RuntimeError(f'Remote server returned error code {resp.status_code} '
+                               'while fetching results.')
+
+        length = resp.headers.get('Content-Length')
+        if resp.status_code == 206:
+            if length:
+                self.total = self.offset + int(length)
+        else:
+            # The server sent the whole archive: skip what was already read.
+            if length:
+                self.total = int(length)
+            skip = self.offset
+            while skip:
+                skip -= len(resp.raw.read(min(skip, _CHUNK)))
+        self.resp = resp
+
+    def read(self, size=-1):
+        while True:
+            try:
+                data = self.resp.raw.read(size)
+                break
+            except _TRANSFER_ERRORS as e:
+                self.retries += 1
+                if self.retries > _RETRIES:
+                    raise
+                self.chip.logger.warning(f'Download interrupted ({e}); resuming.')
+                self.resp.close()
+                self._open()
+        self.offset += len(data)
+        if self.progress:
+            self.progress(self.offset, self.total)
+        return data
+
+    def close(self):
+        self.resp.close()
+
+###################################
+def _extract_results(tar, job_hash, top_design, local_dir):
+    '''Helper method to extract a results archive which is being streamed,
+    moving the '<job_hash>/' directory at its top into 'local_dir'.
+    '''
+
+    prefix = job_hash + '/'
+    for member in tar:
+        # Reject anything outside of the job's directory.
+        name = os.path.normpath(member.name).replace(os.sep, '/')
+        if (not name.startswith(prefix)) or name.startswith('/') or \
+           ('..' in name.split('/')):
+            continue
+        name = name[len(prefix):]
+
+        if member.issym():
+            # Skip dangling 'import' symlinks.
+            if name.startswith(top_design + '/') and \
+               os.path.basename(name).startswith('import'):
+                continue
+            # Reject symlinks that may point outside of the job's directory,
+            # since later members would be written through them.
+            link = member.linkname.replace(os.sep, '/')
+            if link.startswith('/') or ('..' in link.split('/')):
+                continue
+
+        if member.islnk():
+            link = os.path.normpath(member.linkname).replace(os.sep, '/')
+            if not link.startswith(prefix):
+                continue
+            member.linkname = link[len(prefix):]
+
+        # Files the server linked from its blob store are read-only there.
+        if member.isreg():
+            member.mode |= 0o200
+
+        member.name = name
+        tar.extract(member, local_dir, **_EXTRACT_ARGS)
+
 ###################################
 def remote_preprocess(chip):
     '''Helper method to run a local import stage for remote jobs.
@@ -72,7 +470,7 @@ def remote_preprocess(chip):
     chip.set('option', 'steplist', remote_steplist, clobber=True)
 
 ###################################
-def remote_run(chip):
+def remote_run(chip, progress=None):
     '''Helper method to run a job stage on a remote compute cluster.
     Note that files will not be copied to the remote stage; typically
     the source files will be copied into the cluster's storage before
@@ -81,6 +479,8 @@ def remote_run(chip):
     will print a warning and do nothing.
     This method assumes that the given stage should not be skipped,
     because it is called from within the `Chip.run(...)` method.
+    Task status changes are logged as the server reports them, and the
+    method returns as soon as the job finishes.
 
     '''
 
@@ -88,15 +488,65 @@ def remote_run(chip):
     step_start = time.monotonic()
 
     # Ask the remote server to start processing the requested step.
-    request_remote_run(chip)
+    request_remote_run(chip, progress=progress)
+
+    # Follow the job's progress as the server reports it, until it finishes.
+    version = 0
+    queue_position = None
+    while True:
+        try:
+            status = job_status(chip, version, queue_position=queue_position)
+        except _TRANSFER_ERRORS:
+            # Sometimes an exception is raised if the request library cannot
+            # reach the server due to a transient network issue.
+            # Retrying ensures that jobs don't break off when the connection drops.
+            chip.logger.info("Unknown network error encountered: retrying.")
+            time.sleep(5)
+            continue
+        if status is None:
+            # The server can't report task status; poll it instead.
+            _wait_job(chip, step_start)
+            break
+
+        for task in status['tasks']:
+            _log_task(chip, task)
+            if task['status'] != 'running':
+                _sync_task(chip, task['step'], task['index'])
+        if not status['busy']:
+            break
+        position = status.get('queue_position')
+        if position:
+            if position != queue_position:
+                chip.logger.info(f"Job is queued at position {position}.")
+        elif status['version'] == version:
+            chip.logger.info("Job is still running. (%d seconds)"%(
+                             int(time.monotonic() - step_start)))
+        queue_position = position
+        version = status['version']
+    chip.logger.info("Remote job run completed!")
+
+###################################
+def _sync_task(chip, step, index):
+    '''Helper method to fetch the files of a remote task which finished,
+    while the rest of the job is still running.
+    '''
 
-    # Remove the local 'import.tar.gz' archive.
-    local_archive = os.path.join(chip._getworkdir(),
-                                 'import.tar.gz')
-    if os.path.isfile(local_archive):
-        os.remove(local_archive)
+    try:
+        synced = sync_files(chip, step=step, index=index)
+    except (RuntimeError,) + _TRANSFER_ERRORS as e:
+        # Whatever is missing is fetched with the rest of the results.
+        chip.logger.warning(f'Could not fetch the files of remote task {step}{index}: {e}')
+        return
+    if synced and synced[0]:
+        count, size = synced
+        chip.logger.info(f"Fetched {count} files ({size / 2**20:.1f} MB) of remote task {step}{index}.")
+
+###################################
+def _wait_job(chip, step_start):
+    '''Helper method to check whether a job is busy periodically, until it
+    finishes. Used with servers which can't report task status.
+    '''
 
-    # Check the job's progress periodically until it finishes.
     is_busy = True
     while is_busy:
       chip.logger.info("Job is still running. (%d seconds)"%(
@@ -105,16 +555,43 @@ def remote_run(chip):
       try:
           is_busy = is_job_busy(chip)
       except:
-          # Sometimes an exception is raised if the request library cannot
-          # reach the server due to a transient network issue.
-          # Retrying ensures that jobs don't break off when the connection drops.
           is_busy = True
           chip.logger.info("Unknown network error encountered: retrying.")
-    chip.logger.info("Remote job run completed!")
 
 ###################################
-def request_remote_run(chip):
+def _log_task(chip, task):
+    '''Helper method to log a task status change reported by the server.
+    '''
+
+    name = task['step'] + task['index']
+    if task['status'] == 'running':
+        chip.logger.info(f"Remote task {name} is running.")
+        return
+
+    summary = []
+    metrics = task['metrics']
+    for metric in ('errors', 'warnings', 'tasktime'):
+        if metric in metrics:
+            summary.append(f'{metric}={metrics[metric]}')
+    message = f"Remote task {name} finished with status '{task['status']}'"
+    if summary:
+        message += f" ({', '.join(summary)})"
+    if task['status'] == 'error':
+        chip.logger.error(message)
+    else:
+        chip.logger.info(message)
+
+###################################
+def request_remote_run(chip, progress=None):
     '''Helper method to make a web request to start a job stage.
+
+    The server keeps a store of the files it received, by content. Only the
+    job's files which aren't in it are uploaded, and the job directory is
+    described by the digests of its files. Authenticated jobs, and servers
+    without a store, get the job directory as a tar archive which is
+    streamed in resumable chunks. 'progress' is called as
+    progress(done, total) with the number of bytes uploaded or archived so
+    far; by default the progress is logged.
     '''
 
     # Set the request URL.
@@ -134,38 +611,31 @@ def request_remote_run(chip):
         post_params['params']['key'] = rcfg['password']
 
     # If '-remote_user' and '-remote_key' are not both specified,
-    # no authorizaion is configured; proceed without crypto.
-    # If they were specified, these files are now encrypted.
-    subprocess.run(['tar',
-                    '-czf',
-                    'import.tar.gz',
-                    '--exclude',
-                    'import.tar.gz',
-                    '.'],
-                   stdout=subprocess.PIPE,
-                   stderr=subprocess.STDOUT,
-                   cwd=local_build_dir)
-    upload_file = os.path.abspath(os.path.join(local_build_dir, 'import.tar.gz'))
-
-    # Make the actual request, streaming the bulk data as a multipart file.
-    # Redirected POST requests are translated to GETs. This is actually
-    # part of the HTTP spec, so we need to manually follow the trail.
-    redirect_url = remote_run_url
-    while redirect_url:
-        with open(upload_file, 'rb') as f:
-            resp = requests.post(redirect_url,
-                                 files={'import': f,
-                                        'params': json.dumps(post_params)},
-                                 allow_redirects=False)
-            if resp.status_code == 302:
-                redirect_url = resp.headers['Location']
-            elif resp.status_code >= 400:
-                chip.logger.error(resp.json()['message'])
-                chip.logger.error('Error starting remote job run; quitting.')
-                raise RuntimeError('Remote server returned unrecoverable error code.')
-            else:
-                chip.logger.info(resp.text)
-                return
+    # no authorizaion is configured; proceed without crypto. Only the files
+    # which the server doesn't have yet are uploaded.
+    # If they were specified, these files are now encrypted, and the archive
+    # is compressed while it is being uploaded.
+    if not progress:
+        progress = _log_progress(chip, 'Uploading job')
+    files = None
+    if 'username' not in post_params['params']:
+        files = _upload_blobs(chip, local_build_dir, progress=progress)
+    if files is not None:
+        post_params['params']['files'] = files
+    else:
+        _upload_archive(chip, local_build_dir, progress=progress)
+
+    # Make the actual request; the server picks up the uploaded files.
+    resp = _post(remote_run_url,
+                 files={'params': json.dumps(post_params)})
+    if resp.status_code >= 400:
+        try:
+            chip.logger.error(resp.json()['message'])
+        except (ValueError, KeyError):
+            chip.logger.error(resp.text)
+        chip.logger.error('Error starting remote job run; quitting.')
+        raise RuntimeError('Remote server returned unrecoverable error code.')
+    chip.logger.info(resp.text)
 
 ###################################
 def is_job_busy(chip):
@@ -200,6 +670,163 @@ def is_job_busy(chip):
         else:
             return (resp.text != "Job has no running steps.")
 
+###################################
+def job_status(chip, version=0, timeout=30, queue_position=None):
+    '''Helper method to ask the remote server about the status of a job's
+    tasks. The server answers as soon as a task's status changed after
+    'version', the job finished, or 'timeout' seconds passed. While the job
+    is queued, it answers as soon as the job's position in the queue
+    differs from 'queue_position'.
+
+    Returns a dictionary with whether the job is still 'busy', the latest
+    'version', and the 'tasks' which changed since 'version', each with its
+    'step', 'index', 'status' and 'metrics'. While the job waits to start,
+    'queue_position' is its position in the server's queue. Returns None if
+    the server doesn't support reporting task status.
+    '''
+
+    # Set the request URL.
+    remote_run_url = urllib.parse.urljoin(get_base_url(chip), '/job_status/')
+
+    # Set common parameters.
+    post_params = {
+        'job_hash': chip.status['jobhash'],
+        'job_id': chip.get('option', 'jobname'),
+        'version': version,
+        'timeout': timeout,
+        'queue_position': queue_position,
+    }
+
+    # Set authentication parameters if necessary.
+    rcfg = chip.status['remote_cfg']
+    if ('username' in rcfg) and ('password' in rcfg):
+        post_params['username'] = rcfg['username']
+        post_params['key'] = rcfg['password']
+
+    resp = _post(remote_run_url,
+                 data=json.dumps(post_params),
+                 timeout=timeout + _TIMEOUT)
+    if resp.status_code == 404:
+        return None
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Remote server returned error code {resp.status_code}: {resp.text}')
+    return resp.json()
+
+###################################
+def job_files(chip, step=None, index=None):
+    '''Helper method to list the files of a finished remote task, or of the
+    whole job if no step and index are given.
+
+    Returns a list with the 'path' of each file relative to the build
+    directory, its 'size' and its sha256 'digest'. Returns None if the server
+    doesn't list the job's files, which is the case for authenticated jobs.
+    '''
+
+    # Set the request URL.
+    remote_run_url = urllib.parse.urljoin(get_base_url(chip), '/job_files/')
+
+    # Set common parameters.
+    post_params = {
+        'job_hash': chip.status['jobhash'],
+        'job_id': chip.get('option', 'jobname'),
+    }
+    if step is not None:
+        post_params['step'] = step
+        post_params['index'] = index
+
+    # Set authentication parameters if necessary.
+    rcfg = chip.status['remote_cfg']
+    if ('username' in rcfg) and ('password' in rcfg):
+        post_params['username'] = rcfg['username']
+        post_params['key'] = rcfg['password']
+
+    resp = _post(remote_run_url,
+                 data=json.dumps(post_params),
+                 timeout=_TIMEOUT)
+    if resp.status_code == 404:
+        return None
+    if resp.status_code >= 400:
+        raise RuntimeError(f'Remote server returned error code {resp.status_code}: {resp.text}')
+    return resp.json()['files']
+
+###################################
+def fetch_file(chip, path, filename):
+    '''Helper method to download one file of a remote job, given its path
+    relative to the build directory, to 'filename'. The file is replaced
+    once it is complete.
+    '''
+
+    # Set the request URL.
+    remote_run_url = urllib.parse.urljoin(get_base_url(chip), '/job_file/')
+
+    # Set common parameters.
+    post_params = {
+        'job_hash': chip.status['jobhash'],
+        'job_id': chip.get('option', 'jobname'),
+        'path': path,
+    }
+
+    # Set authentication parameters if necessary.
+    rcfg = chip.status['remote_cfg']
+    if ('username' in rcfg) and ('password' in rcfg):
+        post_params['username'] = rcfg['username']
+        post_params['key'] = rcfg['password']
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    partial = filename + '.part'
+    retries = 0
+    while True:
+        try:
+            with _post(remote_run_url,
+                       data=json.dumps(post_params),
+                       stream=True,
+                       timeout=_TIMEOUT) as resp:
+                if resp.status_code >= 400:
+                    raise RuntimeError(f'Remote server returned error code {resp.status_code} '
+                                       f'while fetching {path}.')
+                with open(partial, 'wb') as f:
+                    shutil.copyfileobj(resp.raw, f, _CHUNK)
+            break
+        except _TRANSFER_ERRORS:
+            retries += 1
+            if retries > _RETRIES:
+                raise
+    # Replace rather than overwrite, which leaves files hard linked from
+    # the task cache alone.
+    os.replace(partial, filename)
+
+###################################
+def sync_files(chip, step=None, index=None):
+    '''Helper method to bring the local copy of a remote task, or of the
+    whole job if no step and index are given, up to date. Like rsync, only
+    files whose size or sha256 digest differ from the local ones are
+    downloaded.
+
+    Returns the number of files and bytes which were fetched, or None if
+    the server doesn't list the job's files.
+    '''
+
+    files = job_files(chip, step=step, index=index)
+    if files is None:
+        return None
+
+    local_dir = chip.get('option', 'builddir')
+    count = 0
+    size = 0
+    for remote in files:
+        path = os.path.normpath(remote['path'])
+        if os.path.isabs(path) or path.split(os.sep)[0] == '..':
+            raise RuntimeError(f"Remote server sent an invalid path: {remote['path']}")
+        filename = os.path.join(local_dir, path)
+        if os.path.isfile(filename) and (not os.path.islink(filename)) and \
+           os.path.getsize(filename) == remote['size'] and \
+           chip._hash_file(filename, 'sha256') == remote['digest']:
+            continue
+        fetch_file(chip, remote['path'], filename)
+        count += 1
+        size += remote['size']
+    return count, size
+
 ###################################
 def delete_job(chip):
     '''Helper method to delete a job from shared remote storage.
@@ -232,72 +859,50 @@ def delete_job(chip):
             return response
 
 ###################################
-def fetch_results_request(chip):
+def fetch_results_request(chip, progress=None):
     '''Helper method to fetch job results from a remote compute cluster.
+    Returns a file-like object which streams the results archive, resuming
+    the download if it is interrupted.
     '''
 
-    # Set the request URL.
-    job_hash = chip.status['jobhash']
-    remote_run_url = urllib.parse.urljoin(get_base_url(chip), '/get_results/' + job_hash + '.tar.gz')
-
-    # Set authentication parameters if necessary.
-    rcfg = chip.status['remote_cfg']
-    if ('username' in rcfg) and ('password' in rcfg):
-        post_params = {
-            'username': rcfg['username'],
-            'key': rcfg['password'],
-        }
-    else:
-        post_params = {}
-
-    # Make the web request, and stream the results archive in chunks.
-    redirect_url = remote_run_url
-    can_redirect = False
-    while redirect_url:
-        with open('%s.tar.gz'%job_hash, 'wb') as zipf:
-            resp = requests.post(redirect_url,
-                                 data=json.dumps(post_params),
-                                 allow_redirects=can_redirect,
-                                 stream=True)
-            if resp.status_code == 302:
-                redirect_url = resp.headers['Location']
-            elif resp.status_code == 303:
-                redirect_url = resp.headers['Location']
-                can_redirect = True
-            else:
-                shutil.copyfileobj(resp.raw, zipf)
-                return
+    return _ResultsDownload(chip, progress=progress)
 
 ###################################
-def fetch_results(chip):
+def fetch_results(chip, progress=None):
     '''Helper method to fetch and open job results from a remote compute cluster.
-    '''
 
-    # Fetch the remote archive after the export stage.
-    fetch_results_request(chip)
-
-    # Call 'delete_job' to remove the run from the server.
-    delete_job(chip)
+    Only the files which differ from the local build directory are fetched.
+    If the server can't list the job's files, the results archive is
+    extracted while it is being downloaded instead.
+    'progress' is called as progress(done, total) with the number of bytes
+    received so far, and the archive size if the server reported it; by
+    default the progress is logged.
+    '''
 
-    # Unzip the results.
     top_design = chip.get('design')
     job_hash = chip.status['jobhash']
     local_dir = chip.get('option', 'builddir')
 
-    # Authenticated jobs get a zip file full of other zip files.
-    # So we need to extract and delete those.
-    subprocess.run(['tar', '-xzf', f'{job_hash}.tar.gz'])
-    # Remove the results archive after it is extracted.
-    os.remove(f'{job_hash}.tar.gz')
-
-    # Remove dangling 'import' symlinks if necessary.
-    for import_link in glob.iglob(job_hash + '/' + top_design + '/**/import*',
-                                  recursive=True):
-        if os.path.islink(import_link):
-            os.remove(import_link)
-    # Copy the results into the local build directory, and remove the
-    # unzipped directory (including encrypted archives).
-    utils.copytree(job_hash,
-                   local_dir,
-                   dirs_exist_ok = True)
-    shutil.rmtree(job_hash)
+    # Fetch the files which aren't up to date yet; most tasks were already
+    # fetched while the job was running.
+    synced = sync_files(chip)
+    if synced is not None:
+        count, size = synced
+        chip.logger.info(f"Fetched {count} files ({size / 2**20:.1f} MB) of results.")
+        delete_job(chip)
+        return
+
+    # Otherwise, fetch the remote archive after the export stage, and copy the results
+    # into the local build directory as they arrive. Authenticated jobs get
+    # an archive full of encrypted archives, which are extracted as is.
+    if not progress:
+        progress = _log_progress(chip, 'Fetching results')
+    download = fetch_results_request(chip, progress=progress)
+    try:
+        with tarfile.open(fileobj=download, mode='r|gz') as tar:
+            _extract_results(tar, job_hash, top_design, local_dir)
+    finally:
+        download.close()
+
+    # Call 'delete_job' to remove the run from the server.
+    delete_job(chip)
@@ -5,6 +5,7 @@ import base64
 import time
 import datetime
 import multiprocessing
+import multiprocessing.connection
 import tarfile
 import traceback
 import asyncio
@@ -18,6 +19,14 @@ import re
 import json
 import logging
 import hashlib
+import heapq
+import contextlib
+import queue
+import selectors
+import concurrent.futures
+import threading
+import functools
+import pickle
 import shutil
 import copy
 import importlib
@@ -43,12 +52,437 @@ from pathlib import Path
 from timeit import default_timer as timer
 from siliconcompiler.client import *
 from siliconcompiler.schema import *
+from siliconcompiler.schema import _parse_type, _copy_cfg, _schema_template
+from siliconcompiler.schema import _schema_doc, _DOC_FIELDS
 from siliconcompiler.scheduler import _deferstep
 from siliconcompiler import leflib
 from siliconcompiler import utils
 from siliconcompiler import _metadata
 import psutil
 
+# Characters stripped from string-encoded tuples when reading them back
+_TUPLE_CHARS = str.maketrans('', '', '() \t\n\r\f\v')
+_TUPLE_STR_CHARS = str.maketrans('', '', '()\' \t\n\r\f\v')
+
+# Chunk size used to stream log files in check_logfile()
+_LOG_CHUNK = 4 * 1024 * 1024
+
+# Read size used to hash files in Chip._hash_file()
+_HASH_BLOCK = 1024 * 1024
+
+# Files modified more recently than this many seconds aren't added to the
+# digest cache, since a change within the resolution of their
+# mtime would go unnoticed.
+_HASH_CACHE_SETTLE = 2
+
+def _digest_file(filename, algo):
+    '''
+    Returns the hex digest of a file's contents using a hashlib algorithm.
+    '''
+    hashobj = hashlib.new(algo)
+    buf = bytearray(_HASH_BLOCK)
+    view = memoryview(buf)
+    with open(filename, 'rb', buffering=0) as f:
+        # hashlib releases the GIL for large updates, so files can be hashed
+        # in parallel threads.
+        for size in iter(lambda: f.readinto(buf), 0):
+            hashobj.update(view[:size])
+    return hashobj.hexdigest()
+
+@functools.lru_cache(maxsize=1024)
+def _compile_grep(args):
+    '''
+    Compiles a grep command line (see Chip.grep()) into a tuple of
+    (pattern, flags, regex, invert, only, unsupported), where pattern is the
+    regular expression after applying -x/-w, regex is pattern compiled with
+    flags, invert and only are set by -v and -o, and unsupported lists
+    switches that were ignored.
+    '''
+
+    # Split into repeating switches and everything else
+    match = re.match(r'\s*((?:\-\w\s)*)(.*)', args)
+    pattern = match.group(2)
+    switches = match.group(1).split()
+
+    options = set()
+    unsupported = []
+    for i, switch in enumerate(switches):
+        if switch == '-e':
+            # everything after -e is part of the pattern
+            pattern = ' '.join(switches[i+1:] + [pattern])
+            break
+        elif switch in ('-v', '-i', '-E', '-x', '-o', '-w'):
+            options.add(switch)
+        else:
+            unsupported.append(switch)
+
+    # Patterns are always Python regular expressions, which cover extended
+    # regular expressions, so -E doesn't change anything.
+    if '-x' in options:
+        pattern = rf'^(?:{pattern})$'
+    elif '-w' in options:
+        pattern = rf'(?<!\w)(?:{pattern})(?!\w)'
+    flags = re.IGNORECASE if '-i' in options else 0
+
+    return (pattern, flags, re.compile(pattern, flags), '-v' in options, '-o' in options,
+            tuple(unsupported))
+
+def _grep_select(grep, line):
+    '''
+    Returns the list of lines output by a grep compiled by _compile_grep()
+    for an input line.
+    '''
+
+    _, _, regex, invert, only, _ = grep
+    if only:
+        if invert:
+            # like grep, -v -o prints nothing
+            return []
+        return [m.group(0) for m in regex.finditer(line) if m.group(0)]
+    if bool(regex.search(line)) != invert:
+        return [line]
+    return []
+
+def _grep_chain(greps, line):
+    '''
+    Returns the list of lines output by piping an input line through a
+    chain of greps compiled by _compile_grep().
+    '''
+    lines = [line]
+    for grep in greps:
+        lines = [out for item in lines for out in _grep_select(grep, item)]
+        if not lines:
+            break
+    return lines
+
+# Metrics measured by _TaskTelemetry
+_TELEMETRY_METRICS = ('memory', 'averagememory', 'cputime', 'diskread', 'diskwrite', 'threads')
+
+class _TaskTelemetry():
+    '''
+    Samples the resource usage of a process and all of its descendants.
+
+    sample() is called periodically while the process runs, and once more
+    after it exits, at which point metrics() returns the totals. If series
+    is a list, a row is appended to it for each sample, with the columns
+    listed in _TaskTelemetry.COLUMNS.
+    '''
+
+    COLUMNS = ('time', 'memory', 'cputime', 'diskread', 'diskwrite', 'threads', 'processes')
+
+    def __init__(self, pid, interval=0.5, series=None):
+        self.interval = interval
+        self.series = series
+        try:
+            self.root = psutil.Process(pid)
+        except psutil.Error:
+            self.root = None
+
+        # Totals of processes that were reaped before their last sample
+        self.rusage_start = _children_cputime()
+
+        # Latest counters of each process ever seen, keyed by psutil.Process,
+        # which identifies a process by its pid and creation time.
+        self.cputimes = {}
+        self.iocounters = {}
+
+        self.start = time.time()
+        self.last = None
+        self.last_memory = 0
+        self.memory_integral = 0
+        self.peak_memory = 0
+        self.peak_threads = 0
+
+    def sample(self, force=False):
+        '''
+        Samples the process tree, unless the last sample was taken less than
+        interval seconds ago and force is False.
+        '''
+        now = time.time()
+        if not force and self.last is not None and now - self.last < self.interval:
+            return
+
+        procs = []
+        if self.root is not None:
+            try:
+                procs = [self.root] + self.root.children(recursive=True)
+            except psutil.Error:
+                # The process has exited.
+                pass
+
+        memory = 0
+        threads = 0
+        nprocs = 0
+        for proc in procs:
+            try:
+                with proc.oneshot():
+                    procmemory = _process_memory(proc)
+                    nthreads = proc.num_threads()
+                    cputimes = proc.cpu_times()
+                    # Not supported on macOS
+                    iocounters = proc.io_counters() if hasattr(proc, 'io_counters') else None
+            except psutil.Error:
+                continue
+            memory += procmemory
+            threads += nthreads
+            nprocs += 1
+            self.cputimes[proc] = cputimes.user + cputimes.system
+            if iocounters is not None:
+                self.iocounters[proc] = (iocounters.read_bytes, iocounters.write_bytes)
+
+        if self.last is not None:
+            self.memory_integral += self.last_memory * (now - self.last)
+        self.last = now
+        self.last_memory = memory
+        self.peak_memory = max(self.peak_memory, memory)
+        self.peak_threads = max(self.peak_threads, threads)
+
+        if self.series is not None:
+            diskread, diskwrite = self._diskio()
+            self.series.append((round(now - self.start, 3), memory, round(self._cputime(), 3),
+                                diskread, diskwrite, threads, nprocs))
+
+    def _cputime(self):
+        sampled = sum(self.cputimes.values())
+        # Once reaped, the CPU time of all descendants is reported exactly,
+        # including short lived processes that were never sampled.
+        reaped = _children_cputime() - self.rusage_start
+        return max(sampled, reaped)
+
+    def _diskio(self):
+        if not self.iocounters:
+            return (None, None)
+        return (sum(io[0] for io in self.iocounters.values()),
+                sum(io[1] for io in self.iocounters.values()))
+
+    def metrics(self):
+        '''
+        Returns a dictionary of the measured metrics, see _TELEMETRY_METRICS.
+        Metrics that couldn't be measured are None.
+        '''
+        elapsed = (self.last - self.start) if self.last is not None else 0
+        diskread, diskwrite = self._diskio()
+        return {
+            'memory': self.peak_memory,
+            'averagememory': round(self.memory_integral / elapsed) if elapsed > 0 else 0,
+            'cputime': round(self._cputime(), 2),
+            'diskread': diskread,
+            'diskwrite': diskwrite,
+            'threads': self.peak_threads
+        }
+
+def _process_memory(proc):
+    '''
+    Returns the memory used by a psutil.Process, such that the sum over a
+    process tree counts memory shared between the processes once. This is
+    the proportional set size (PSS) where supported, otherwise the unique
+    set size (USS), or the resident set size (RSS) if the process' memory
+    maps can't be read.
+    '''
+    try:
+        info = proc.memory_full_info()
+    except psutil.AccessDenied:
+        return proc.memory_info().rss
+    if hasattr(info, 'pss'):
+        return info.pss
+    return getattr(info, 'uss', info.rss)
+
+def _children_cputime():
+    '''
+    Returns the user and system CPU seconds used by all child processes of
+    the current process that have been waited for, or 0 where this isn't
+    supported.
+    '''
+    if sys.platform == 'win32':
+        return 0
+    import resource # Note: this import throws exception on Windows
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class _OutputPump():
+    '''
+    Copies the output of a process from its stdout/stderr pipes to files and
+    optionally the console, and passes complete lines of selected pipes to a
+    callback.
+
+    Pipes are read in blocks of at most BLOCK bytes, and lines longer than
+    BLOCK characters are passed to the callback in pieces, so memory use is
+    bounded regardless of the output.
+    '''
+
+    BLOCK = 64 * 1024
+
+    def __init__(self, on_line=None):
+        self.on_line = on_line
+        self.streams = {}
+        self.stopped = False
+
+    def stop(self):
+        '''
+        Makes run() return early, for example from the line callback.
+        '''
+        self.stopped = True
+
+    def add(self, pipe, writer, echo=False, match=False):
+        '''
+        Registers a pipe, whose output is written to the binary file object
+        writer, echoed to stdout if echo is True, and passed to the line
+        callback if match is True.
+        '''
+        self.streams[pipe.fileno()] = {
+            'pipe': pipe,
+            'writer': writer,
+            'echo': echo,
+            'match': match and self.on_line is not None,
+            'decoder': codecs.getincrementaldecoder('utf-8')(errors='replace_with_warning'),
+            'partial': ''
+        }
+
+    def _feed(self, fd, data):
+        stream = self.streams[fd]
+        stream['writer'].write(data)
+        if not stream['echo'] and not stream['match']:
+            return
+
+        text = stream['decoder'].decode(data, final=not data)
+        if stream['echo'] and text:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if stream['match']:
+            lines = (stream['partial'] + text).split('\n')
+            stream['partial'] = lines.pop()
+            if not data or len(stream['partial']) > self.BLOCK:
+                if stream['partial']:
+                    lines.append(stream['partial'])
+                stream['partial'] = ''
+            for line in lines:
+                self.on_line(line)
+
+    def run(self, proc, deadline=None, tick=None, interval=0.5):
+        '''
+        Pumps the registered pipes until the process exits and its output
+        is drained, calling tick() at least every interval seconds.
+
+        Returns False if the deadline (an absolute time.time() value) passed
+        or stop() was called first, True otherwise.
+        '''
+        if sys.platform == 'win32':
+            # Pipes can't be selected on Windows, read them in threads.
+            read = self._read_threads()
+        else:
+            read = self._read_selector()
+
+        try:
+            while True:
+                timeout = interval
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.time())
+                    if timeout <= 0:
+                        return False
+                events = read(timeout)
+                if events is None:
+                    # All pipes are closed.
+                    break
+                for fd, data in events:
+                    self._feed(fd, data)
+                if self.stopped:
+                    return False
+                if tick:
+                    tick()
+                if not events and proc.poll() is not None:
+                    # The process exited, and descendants that inherited its
+                    # pipes didn't write anything since.
+                    break
+
+            while True:
+                timeout = interval
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.time())
+                    if timeout <= 0:
+                        return False
+                try:
+                    proc.wait(timeout=timeout)
+                    return True
+                except subprocess.TimeoutExpired:
+                    if tick:
+                        tick()
+        finally:
+            read(None)
+
+    def _read_selector(self):
+        sel = selectors.DefaultSelector()
+        for stream in self.streams.values():
+            sel.register(stream['pipe'], selectors.EVENT_READ)
+
+        def read(timeout):
+            if timeout is None:
+                sel.close()
+                return None
+            if not sel.get_map():
+                return None
+            events = []
+            for key, _ in sel.select(timeout):
+                data = os.read(key.fd, self.BLOCK)
+                if not data:
+                    sel.unregister(key.fileobj)
+                events.append((key.fd, data))
+            return events
+
+        return read
+
+    def _read_threads(self):
+        chunks = queue.Queue(maxsize=64)
+        open_pipes = set(self.streams)
+
+        def reader(fd):
+            while True:
+                data = os.read(fd, self.BLOCK)
+                chunks.put((fd, data))
+                if not data:
+                    break
+
+        for fd in self.streams:
+            threading.Thread(target=reader, args=(fd,), daemon=True).start()
+
+        def read(timeout):
+            if timeout is None or not open_pipes:
+                return None
+            events = []
+            try:
+                events.append(chunks.get(timeout=timeout))
+                while True:
+                    events.append(chunks.get_nowait())
+            except queue.Empty:
+                pass
+            for fd, data in events:
+                if not data:
+                    open_pipes.discard(fd)
+            return events
+
+        return read
+
+def _terminate_tree(proc):
+    '''
+    Terminates a process and all of its descendants.
+    '''
+    try:
+        children = psutil.Process(proc.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    for child in children:
+        try:
+            child.terminate()
+        except psutil.Error:
+            pass
+    proc.terminate()
+
+# Filters over leaf cells, by name, for Chip._keyview()
+_KEYVIEWS = {
+    'file': lambda leaf: 'file' in leaf['type'] or 'dir' in leaf['type'],
+    'require': lambda leaf: leaf.get('require') is not None,
+    'job': lambda leaf: leaf.get('scope') == 'job',
+}
+
 class TaskStatus():
     # Could use Python 'enum' class here, but that doesn't work nicely with
     # schema.
@@ -80,7 +514,23 @@ class Chip:
         self.scroot = os.path.dirname(os.path.abspath(__file__))
         self.cwd = os.getcwd()
         self._error = False
-        self.cfg = schema_cfg()
+        # Flat index mapping keypath tuples to nodes in self.cfg, populated
+        # lazily by _search() (see _reset_index()).
+        self._keypath_index = {}
+        # Set of all leaf keypaths in self.cfg, built on first use and kept up
+        # to date as _search() instantiates new keypaths (see _keypath_set()).
+        self._keypaths = None
+        self._keypaths_sorted = True
+        # Keypath lists filtered by _KEYVIEWS, derived from the keypath set.
+        self._keyviews = {}
+        self.cfg = _copy_cfg(_schema_template())
+        # Manifest changes of tasks run in the worker pool during run(), keyed
+        # by (step, index). Used in place of the tasks' output manifests.
+        self._task_deltas = {}
+        # Tasks whose delta file was written during run(), keyed by
+        # step+index like the task status. Delta files of other tasks aren't loaded, since they may
+        # come from elsewhere, e.g. a client of sc-server.
+        self._task_deltafiles = set()
         # The 'status' dictionary can be used to store ephemeral config values.
         # Its contents will not be saved, and can be set by parent scripts
         # such as a web server or supervisor process. Currently supported keys:
@@ -132,6 +582,19 @@ class Chip:
             return codecs.ignore_errors(e)
         codecs.register_error('ignore_with_warning', log_error_handler)
 
+    ###########################################################################
+    @property
+    def cfg(self):
+        '''Schema configuration dictionary of chip object.
+
+        Replacing the dictionary resets the keypath index.'''
+        return self._cfg
+
+    @cfg.setter
+    def cfg(self, cfg):
+        self._cfg = cfg
+        self._reset_index()
+
     ###########################################################################
     @property
     def design(self):
@@ -715,10 +1178,6 @@ class Chip:
         helpstr = helpstr.replace("\n", "")
         helpstr = ' '.join(helpstr.split())
 
-        for idx, item in enumerate(example):
-            example[idx] = ' '.join(item.split())
-            example[idx] = example[idx].replace(", ", ",")
-
         #Wrap text
         para = textwrap.TextWrapper(width=60)
         para_list = para.wrap(text=helpstr)
@@ -771,7 +1230,9 @@ class Chip:
             default = None
 
         if valid_keypaths is None:
-            valid_keypaths = self.getkeys()
+            valid_keypaths = self._keypath_set()
+            if args in valid_keypaths:
+                return True
 
         # Look for a full match with default playing wild card
         for valid_keypath in valid_keypaths:
@@ -827,10 +1288,14 @@ class Chip:
             else:
                 cfg = self.cfg
 
-        keypathstr = f'{keypath}'
+        self.logger.debug("Reading from %s. Field = '%s'", keypath, field)
 
-        self.logger.debug(f"Reading from {keypathstr}. Field = '{field}'")
-        return self._search(cfg, keypathstr, *keypath, field=field, mode='get')
+        if cfg is self.cfg:
+            leaf = self._indexed(keypath)
+            if leaf is not None:
+                return self._getleaf(leaf, keypath, field=field)
+
+        return self._search(cfg, keypath, *keypath, field=field, mode='get')
 
     ###########################################################################
     def getkeys(self, *keypath, cfg=None, job=None):
@@ -864,15 +1329,23 @@ class Chip:
             else:
                 cfg = self.cfg['history'][job]
 
-        if len(list(keypath)) > 0:
-            keypathstr = f'{keypath}'
-            self.logger.debug('Getting schema parameter keys for: %s', keypathstr)
-            keys = list(self._search(cfg, keypathstr, *keypath, mode='getkeys'))
+        if len(keypath) > 0:
+            self.logger.debug('Getting schema parameter keys for: %s', keypath)
+            node = None
+            if cfg is self.cfg:
+                node = self._indexed(keypath)
+            if node is not None:
+                keys = list(node.keys())
+            else:
+                keys = list(self._search(cfg, keypath, *keypath, mode='getkeys'))
             if 'default' in keys:
                 keys.remove('default')
         else:
             self.logger.debug('Getting all schema parameter keys.')
-            keys = list(self._allkeys(cfg))
+            if cfg is self.cfg:
+                keys = [list(key) for key in self._keypath_set()]
+            else:
+                keys = list(self._allkeys(cfg))
 
         return keys
 
@@ -938,15 +1411,20 @@ class Chip:
         if cfg is None:
             cfg = self.cfg
 
-        keypathstr = f'{args[:-1]}'
-        all_args = list(args)
+        keypath = args[:-1]
 
         # Special case to ensure loglevel is updated ASAP
         if len(args) == 3 and args[1] == 'loglevel' and field == 'value':
             self.logger.setLevel(args[2])
 
-        self.logger.debug(f"Setting {keypathstr} to {args[-1]}")
-        return self._search(cfg, keypathstr, *all_args, field=field, mode='set', clobber=clobber)
+        self.logger.debug("Setting %s to %s", keypath, args[-1])
+
+        if cfg is self.cfg:
+            leaf = self._indexed(keypath)
+            if leaf is not None:
+                return self._setleaf(leaf, keypath, args[-1], field=field, mode='set', clobber=clobber)
+
+        return self._search(cfg, keypath, *args, field=field, mode='set', clobber=clobber)
 
     ###########################################################################
     def add(self, *args, cfg=None, field='value'):
@@ -977,12 +1455,29 @@ class Chip:
         if cfg is None:
             cfg = self.cfg
 
-        keypathstr = f'{args[:-1]}'
-        all_args = list(args)
+        keypath = args[:-1]
 
-        self.logger.debug(f'Appending value {args[-1]} to {keypathstr}')
-        return self._search(cfg, keypathstr, *all_args, field=field, mode='add')
+        self.logger.debug('Appending value %s to %s', args[-1], keypath)
 
+        if cfg is self.cfg:
+            leaf = self._indexed(keypath)
+            if leaf is not None:
+                return self._setleaf(leaf, keypath, args[-1], field=field, mode='add')
+
+        return self._search(cfg, keypath, *args, field=field, mode='add')
+
+
+    ###########################################################################
+    def _indexed(self, keypath):
+        '''
+        Returns the schema node of a keypath from the keypath index, or None
+        if it isn't indexed. Keypaths with keys that aren't strings are left
+        to _search(), which reports them.
+        '''
+        try:
+            return self._keypath_index.get(keypath)
+        except TypeError:
+            return None
 
     ###########################################################################
     def _allkeys(self, cfg, keys=None, keylist=None):
@@ -1005,218 +1500,362 @@ class Chip:
     ###########################################################################
     def _search(self, cfg, keypath, *args, field='value', mode='get', clobber=True):
         '''
-        Internal recursive function that searches the Chip schema for a
-        match to the combination of *args and fields supplied. The function is
-        used to set and get data within the dictionary.
+        Internal function that searches the Chip schema for a match to the
+        combination of *args and fields supplied. The function is used to set
+        and get data within the dictionary.
+
+        Nodes found while searching self.cfg are recorded in the keypath index,
+        so that subsequent accesses to the same keypath bypass the tree walk.
 
         Args:
             cfg(dict): The cfg schema to search
             keypath (str): Concatenated keypath used for error logging.
             args (str): Keypath/value variable list used for access
             field(str): Leaf cell field to access.
-            mode(str): Action (set/get/add/getkeys/getkeys)
+            mode(str): Action (set/get/add/getkeys/getcfg)
             clobber(bool): Specifies to clobber (for set action)
 
         '''
 
-        all_args = list(args)
-        param = all_args[0]
-        val = all_args[-1]
-        empty = [None, 'null', [], 'false']
+        if mode in ('set', 'add'):
+            # Ignore the value parameter for 'set' and 'add' operations.
+            keys = args[:-1]
+            val = args[-1]
+        else:
+            keys = args
 
         # Ensure that all keypath values are strings.
         # Scripts may accidentally pass in [None] if a prior schema entry was unexpectedly empty.
-        keys_to_check = args
-        if mode in ['set', 'add']:
-            # Ignore the value parameter for 'set' and 'add' operations.
-            keys_to_check = args[:-1]
-        for key in keys_to_check:
+        for key in keys:
             if not isinstance(key, str):
                 self.error(
                     f'Invalid keypath: {keypath}\n'
                     'Your Chip configuration may be missing a parameter which is expected by your build script.')
                 return None
 
-        #set/add leaf cell (all_args=(param,val))
-        if (mode in ('set', 'add')) & (len(all_args) == 2):
-            # clean error if key not found
-            if (not param in cfg) & (not 'default' in cfg):
-                self.error(f"Set/Add keypath {keypath} does not exist.")
-            else:
+        index = self._keypath_index if cfg is self.cfg else None
+
+        # Descend tree, copying in default tree for dynamic trees
+        for i, key in enumerate(keys[:-1]):
+            if key not in cfg:
+                if 'default' in cfg:
+                    cfg[key] = _copy_cfg(cfg['default'])
+                    self._add_keypaths(keys[:i+1], cfg[key], index is not None)
+                else:
+                    self.error(f"Get keypath {keypath} does not exist.")
+                    return None
+            cfg = cfg[key]
+
+        param = keys[-1]
+        if mode in ('set', 'add'):
+            if param not in cfg:
+                if 'default' not in cfg:
+                    # clean error if key not found
+                    self.error(f"Set/Add keypath {keypath} does not exist.")
+                    return None
                 # making an 'instance' of default if not found
-                if (not param in cfg) & ('default' in cfg):
-                    cfg[param] = copy.deepcopy(cfg['default'])
-                list_type =bool(re.match(r'\[', cfg[param]['type']))
-                # checking for illegal fields
-                if not field in cfg[param] and (field != 'value'):
-                    self.error(f"Field '{field}' for keypath {keypath}' is not a valid field.")
-                # check legality of value
-                if field == 'value':
-                    (type_ok,type_error) = self._typecheck(cfg[param], param, val)
-                    if not type_ok:
-                        self.error("%s", type_error)
-                # converting python True/False to lower case string
-                if (field == 'value') and (cfg[param]['type'] == 'bool'):
-                    if val == True:
-                        val = "true"
-                    elif val == False:
-                        val = "false"
-                # checking if value has been set
-                # TODO: fix clobber!!
-                selval = cfg[param]['value']
-                # updating values
-                if cfg[param]['lock'] == "true":
-                    self.logger.debug("Ignoring {mode}{} to {keypath}. Lock bit is set.")
-                elif (mode == 'set'):
-                    if (field != 'value') or (selval in empty) or clobber:
-                        if field in ('copy', 'lock'):
-                            # boolean fields
-                            if val is True:
-                                cfg[param][field] = "true"
-                            elif val is False:
-                                cfg[param][field] = "false"
-                            else:
-                                self.error(f'{field} must be set to boolean.')
-                        elif field in ('hashalgo', 'scope', 'require', 'type', 'unit',
-                                       'shorthelp', 'notes', 'switch', 'help'):
-                            # awlays string scalars
-                            cfg[param][field] = val
-                        elif field in ('example'):
-                            # list from default schema (already a list)
-                            cfg[param][field] = val
-                        elif field in ('signature', 'filehash', 'date', 'author'):
-                            # convert to list if appropriate
-                            if isinstance(val, list) | (not list_type):
-                                cfg[param][field] = val
-                            else:
-                                cfg[param][field] = [val]
-                        elif (not list_type) & (val is None):
-                            # special case for None
-                            cfg[param][field] = None
-                        elif (not list_type) & (not isinstance(val, list)):
-                            # convert to string for scalar value
-                            cfg[param][field] = str(val)
-                        elif list_type & (not isinstance(val, list)):
-                            # convert to string for list value
-                            cfg[param][field] = [str(val)]
-                        elif list_type & isinstance(val, list):
-                            # converting tuples to strings
-                            if re.search(r'\(', cfg[param]['type']):
-                                cfg[param][field] = list(map(str,val))
-                            else:
-                                cfg[param][field] = val
-                        else:
-                            self.error(f"Assigning list to scalar for {keypath}")
-                    else:
-                        self.logger.debug(f"Ignoring set() to {keypath}, value already set. Use clobber=true to override.")
-                elif (mode == 'add'):
-                    if field in ('filehash', 'date', 'author', 'signature'):
-                        cfg[param][field].append(str(val))
-                    elif field in ('copy', 'lock'):
-                        self.error(f"Illegal use of add() for scalar field {field}.")
-                    elif list_type & (not isinstance(val, list)):
-                        cfg[param][field].append(str(val))
-                    elif list_type & isinstance(val, list):
-                        cfg[param][field].extend(val)
-                    else:
-                        self.error(f"Illegal use of add() for scalar parameter {keypath}.")
-                return cfg[param][field]
-        #get leaf cell (all_args=param)
-        elif len(all_args) == 1:
-            if not param in cfg:
-                self.error(f"Get keypath {keypath} does not exist.")
-            elif mode == 'getcfg':
-                return cfg[param]
-            elif mode == 'getkeys':
-                return cfg[param].keys()
+                cfg[param] = _copy_cfg(cfg['default'])
+                self._add_keypaths(keys, cfg[param], index is not None)
+        elif param not in cfg:
+            self.error(f"Get keypath {keypath} does not exist.")
+            return None
+
+        node = cfg[param]
+        if index is not None:
+            index[tuple(keys)] = node
+
+        if mode in ('set', 'add'):
+            return self._setleaf(node, keypath, val, field=field, mode=mode, clobber=clobber)
+        elif mode == 'getcfg':
+            return node
+        elif mode == 'getkeys':
+            return node.keys()
+        else:
+            return self._getleaf(node, keypath, field=field)
+
+    ###########################################################################
+    def _getleaf(self, leaf, keypath, field='value'):
+        '''
+        Internal function that returns a field of a schema leaf cell, converted
+        according to the leaf type.
+        '''
+
+        if field != 'value':
+            #all non-value fields are strings (or lists of strings)
+            if field not in leaf and field in _DOC_FIELDS:
+                # documentation fields are only stored in the leaf if set
+                return _schema_doc(tuple(keypath), field)
+            if field not in leaf:
+                self.error(f"Field '{field}' not found for keypath {keypath}")
+                return None
+            selval = leaf[field]
+            if selval == 'true':
+                return True
+            elif selval == 'false':
+                return False
             else:
-                if not (field in cfg[param]) and (field!='value'):
-                    self.error(f"Field '{field}' not found for keypath {keypath}")
-                elif field == 'value':
-                    #Select default if no value has been set
-                    if field not in cfg[param]:
-                        selval = cfg[param]['defvalue']
+                return selval
+
+        #Select default if no value has been set
+        if 'value' not in leaf:
+            selval = leaf['defvalue']
+        else:
+            selval = leaf['value']
+
+        is_list, sctype, subtypes = _parse_type(leaf['type'])
+
+        if is_list:
+            if selval is None:
+                return None
+            if sctype == 'int':
+                return [int(item) for item in selval]
+            elif sctype == 'float':
+                return [float(item) for item in selval]
+            elif subtypes is not None and subtypes[0] == 'str':
+                return [item if isinstance(item, tuple) else
+                        tuple(item.translate(_TUPLE_STR_CHARS).split(','))
+                        for item in selval]
+            elif subtypes is not None and subtypes[0] == 'float':
+                return [item if isinstance(item, tuple) else
+                        tuple(map(float, item.translate(_TUPLE_CHARS).split(',')))
+                        for item in selval]
+            else:
+                return list(selval)
+        elif selval is None:
+            # Unset scalar of any type
+            return None
+        elif sctype == 'int':
+            return int(float(selval))
+        elif sctype == 'float':
+            return float(selval)
+        elif sctype == 'bool':
+            return (selval == 'true')
+        elif subtypes is not None:
+            return tuple(map(float, selval.translate(_TUPLE_CHARS).split(',')))
+        else:
+            return selval
+
+    ###########################################################################
+    def _setleaf(self, leaf, keypath, val, field='value', mode='set', clobber=True):
+        '''
+        Internal function that sets or adds to a field of a schema leaf cell.
+        '''
+
+        empty = [None, 'null', [], 'false']
+
+        list_type, _, subtypes = _parse_type(leaf['type'])
+        # checking for illegal fields
+        if not field in leaf and (field != 'value') and (field not in _DOC_FIELDS):
+            self.error(f"Field '{field}' for keypath {keypath}' is not a valid field.")
+        # check legality of value
+        if field == 'value':
+            (type_ok,type_error) = self._typecheck(leaf, keypath, val)
+            if not type_ok:
+                self.error("%s", type_error)
+        # converting python True/False to lower case string
+        if (field == 'value') and (leaf['type'] == 'bool'):
+            if val == True:
+                val = "true"
+            elif val == False:
+                val = "false"
+        # checking if value has been set
+        # TODO: fix clobber!!
+        selval = leaf['value']
+        # updating values
+        if leaf['lock'] == "true":
+            self.logger.debug("Ignoring %s to %s. Lock bit is set.", mode, keypath)
+        elif (mode == 'set'):
+            if (field != 'value') or (selval in empty) or clobber:
+                if field in ('copy', 'lock'):
+                    # boolean fields
+                    if val is True:
+                        leaf[field] = "true"
+                    elif val is False:
+                        leaf[field] = "false"
                     else:
-                        selval =  cfg[param]['value']
-                    #check for list
-                    if bool(re.match(r'\[', cfg[param]['type'])):
-                        sctype = re.sub(r'[\[\]]', '', cfg[param]['type'])
-                        return_list = []
-                        if selval is None:
-                            return None
-                        for item in selval:
-                            if sctype == 'int':
-                                return_list.append(int(item))
-                            elif sctype == 'float':
-                                return_list.append(float(item))
-                            elif sctype.startswith('(str,'):
-                                if isinstance(item,tuple):
-                                    return_list.append(item)
-                                else:
-                                    tuplestr = re.sub(r'[\(\)\'\s]','',item)
-                                    return_list.append(tuple(tuplestr.split(',')))
-                            elif sctype.startswith('(float,'):
-                                if isinstance(item,tuple):
-                                    return_list.append(item)
-                                else:
-                                    tuplestr = re.sub(r'[\(\)\s]','',item)
-                                    return_list.append(tuple(map(float, tuplestr.split(','))))
-                            else:
-                                return_list.append(item)
-                        return return_list
+                        self.error(f'{field} must be set to boolean.')
+                elif field in ('hashalgo', 'scope', 'require', 'type', 'unit',
+                               'shorthelp', 'notes', 'switch', 'help'):
+                    # awlays string scalars
+                    leaf[field] = val
+                    if field in ('scope', 'require', 'type'):
+                        # may change which views the keypath belongs to
+                        self._keyviews = {}
+                elif field in ('example'):
+                    # list from default schema (already a list)
+                    leaf[field] = val
+                elif field in ('signature', 'filehash', 'date', 'author'):
+                    # convert to list if appropriate
+                    if isinstance(val, list) | (not list_type):
+                        leaf[field] = val
                     else:
-                        if selval is None:
-                            # Unset scalar of any type
-                            scalar = None
-                        elif cfg[param]['type'] == "int":
-                            #print(selval, type(selval))
-                            scalar = int(float(selval))
-                        elif cfg[param]['type'] == "float":
-                            scalar = float(selval)
-                        elif cfg[param]['type'] == "bool":
-                            scalar = (selval == 'true')
-                        elif re.match(r'\(', cfg[param]['type']):
-                            tuplestr = re.sub(r'[\(\)\s]','',selval)
-                            scalar = tuple(map(float, tuplestr.split(',')))
-                        else:
-                            scalar = selval
-                        return scalar
-                #all non-value fields are strings (or lists of strings)
-                else:
-                    if cfg[param][field] == 'true':
-                        return True
-                    elif cfg[param][field] == 'false':
-                        return False
+                        leaf[field] = [val]
+                elif (not list_type) & (val is None):
+                    # special case for None
+                    leaf[field] = None
+                elif (not list_type) & (not isinstance(val, list)):
+                    # convert to string for scalar value
+                    leaf[field] = str(val)
+                elif list_type & (not isinstance(val, list)):
+                    # convert to string for list value
+                    leaf[field] = [str(val)]
+                elif list_type & isinstance(val, list):
+                    # converting tuples to strings
+                    if subtypes is not None:
+                        leaf[field] = list(map(str,val))
                     else:
-                        return cfg[param][field]
-        #if not leaf cell descend tree
-        else:
-            ##copying in default tree for dynamic trees
-            if not param in cfg and 'default' in cfg:
-                cfg[param] = copy.deepcopy(cfg['default'])
-            elif not param in cfg:
-                self.error(f"Get keypath {keypath} does not exist.")
-                return None
-            all_args.pop(0)
-            return self._search(cfg[param], keypath, *all_args, field=field, mode=mode, clobber=clobber)
+                        leaf[field] = val
+                else:
+                    self.error(f"Assigning list to scalar for {keypath}")
+            else:
+                self.logger.debug("Ignoring set() to %s, value already set. Use clobber=true to override.", keypath)
+        elif (mode == 'add'):
+            if field in ('filehash', 'date', 'author', 'signature'):
+                leaf[field].append(str(val))
+            elif field == 'example':
+                if field not in leaf:
+                    # documentation fields are only stored in the leaf if set
+                    leaf[field] = list(_schema_doc(tuple(keypath), field) or [])
+                if isinstance(val, list):
+                    leaf[field].extend(val)
+                else:
+                    leaf[field].append(str(val))
+            elif field in ('copy', 'lock', 'help', 'shorthelp', 'notes'):
+                self.error(f"Illegal use of add() for scalar field {field}.")
+            elif list_type & (not isinstance(val, list)):
+                leaf[field].append(str(val))
+            elif list_type & isinstance(val, list):
+                leaf[field].extend(val)
+            else:
+                self.error(f"Illegal use of add() for scalar parameter {keypath}.")
+        return leaf.get(field)
 
     ###########################################################################
-    def _prune(self, cfg, top=True, keeplists=False):
+    def _reset_index(self, *keypath):
         '''
-        Internal recursive function that creates a local copy of the Chip
-        schema (cfg) with only essential non-empty parameters retained.
+        Drops keypath index entries at or below the keypath provided.
 
+        Must be called whenever a subtree of self.cfg is replaced or deleted
+        in place, since the index holds references to the old nodes. With no
+        keypath, the whole index is cleared. The keypath set is rebuilt on
+        next use in either case.
         '''
 
-        # create a local copy of dict
-        if top:
-            localcfg = copy.deepcopy(cfg)
+        self._keypaths = None
+        self._keyviews = {}
+
+        n = len(keypath)
+        if n == 0:
+            self._keypath_index = {}
+            return
+
+        for key in list(self._keypath_index):
+            if key[:n] == keypath:
+                del self._keypath_index[key]
+
+    ###########################################################################
+    def _keypath_set(self):
+        '''
+        Returns the set of all leaf keypaths in self.cfg.
+
+        The set is a dict mapping each keypath (tuple) to its position in
+        the schema and its leaf cell, ordered like _allkeys(). It is built
+        with a single walk of self.cfg on first use, and then updated by
+        _search() as keypaths are instantiated from 'default' subtrees.
+        '''
+
+        if self._keypaths is None:
+            self._keypaths = {}
+            self._walk_keypaths((), (), self.cfg)
+            self._keypaths_sorted = True
+            # seed the keypath index with the leaf cells found
+            for key, (_, leaf) in self._keypaths.items():
+                self._keypath_index[key] = leaf
+        elif not self._keypaths_sorted:
+            # new keypaths are appended, restore schema order
+            self._keypaths = dict(sorted(self._keypaths.items(), key=lambda item: item[1][0]))
+            self._keypaths_sorted = True
+
+        return self._keypaths
+
+    ###########################################################################
+    def _walk_keypaths(self, keypath, position, cfg):
+        '''
+        Adds all leaf cells below cfg to the keypath set.
+        '''
+
+        for i, (key, node) in enumerate(cfg.items()):
+            if 'defvalue' in node:
+                self._keypaths[keypath + (key,)] = (position + (i,), node)
+            else:
+                self._walk_keypaths(keypath + (key,), position + (i,), node)
+
+    ###########################################################################
+    def _add_keypaths(self, keypath, node, in_cfg):
+        '''
+        Records a node newly inserted at keypath in the keypath set.
+
+        in_cfg is False if the node was inserted in a dictionary other than
+        self.cfg, which may still be a subtree of it (such as a history job),
+        so the set is rebuilt on next use.
+        '''
+
+        if self._keypaths is None:
+            return
+        if not in_cfg:
+            self._keypaths = None
+            self._keyviews = {}
+            return
+
+        # Positions don't change, since nodes are only ever appended to
+        # their parent without a _reset_index().
+        position = []
+        cfg = self.cfg
+        for key in keypath:
+            position.append(list(cfg).index(key))
+            cfg = cfg[key]
+
+        keypath = tuple(keypath)
+        if 'defvalue' in node:
+            self._keypaths[keypath] = (tuple(position), node)
         else:
-            localcfg = cfg
+            self._walk_keypaths(keypath, tuple(position), node)
+        self._keypaths_sorted = False
+        self._keyviews = {}
+
+    ###########################################################################
+    def _keyview(self, view):
+        '''
+        Returns a list of the leaf keypaths (tuples) in self.cfg that match
+        one of the _KEYVIEWS filters, in getkeys() order.
 
-        #10 should be enough for anyone...
-        maxdepth = 10
-        i = 0
+        Views are computed from the keypath set and cached until the next
+        change to it, so callers don't need to walk the schema and query the
+        type of each keypath.
+
+        Args:
+            view (str): Name of the view: 'file' (file and dir parameters),
+                'require' (parameters with a requirement) or 'job'
+                (parameters of job scope).
+        '''
+
+        if view not in self._keyviews:
+            select = _KEYVIEWS[view]
+            self._keyviews[view] = [key for key, (_, leaf) in self._keypath_set().items()
+                                    if select(leaf)]
+        return self._keyviews[view]
+
+    ###########################################################################
+    def _prune(self, cfg, keeplists=False):
+        '''
+        Internal function that creates a local copy of the Chip schema (cfg)
+        with only essential non-empty parameters retained.
+
+        The copy is built in a single post-order traversal: 'default'
+        subtrees and help/example entries are dropped, leaf cells whose value
+        and default value are empty are dropped, and so are branches that end
+        up empty. Retained leaf cells are copied with _copy_cfg().
+        '''
 
         #Prune when the default & value are set to the following
         if keeplists:
@@ -1224,40 +1863,31 @@ class Chip:
         else:
             empty = ("null", None, [])
 
-        # When at top of tree loop maxdepth times to make sure all stale
-        # branches have been removed, not elegant, but stupid-simple
-        # "good enough"
-        while i < maxdepth:
-            #Loop through all keys starting at the top
-            for k in list(localcfg.keys()):
+        def prune(localcfg, top):
+            pruned = {}
+            for k, v in localcfg.items():
                 #removing all default/template keys
-                # reached a default subgraph, delete it
                 if k == 'default':
-                    del localcfg[k]
+                    continue
+                # documentation is dropped from everything below the top
+                if not top and k in ('help', 'example'):
+                    continue
                 # reached leaf-cell
-                elif 'help' in localcfg[k].keys():
-                    del localcfg[k]['help']
-                elif 'example' in localcfg[k].keys():
-                    del localcfg[k]['example']
-                elif 'defvalue' in localcfg[k].keys():
-                    if localcfg[k]['defvalue'] in empty:
-                        if 'value' in localcfg[k].keys():
-                            if localcfg[k]['value'] in empty:
-                                del localcfg[k]
-                        else:
-                            del localcfg[k]
-                #removing stale branches
-                elif not localcfg[k]:
-                    localcfg.pop(k)
-                #keep traversing tree
+                if 'defvalue' in v:
+                    if v['defvalue'] in empty and v.get('value', None) in empty:
+                        continue
+                    leaf = _copy_cfg(v)
+                    leaf.pop('help', None)
+                    leaf.pop('example', None)
+                    pruned[k] = leaf
+                #keep traversing tree, removing stale branches
                 else:
-                    self._prune(cfg=localcfg[k], top=False, keeplists=keeplists)
-            if top:
-                i += 1
-            else:
-                break
+                    branch = prune(v, False)
+                    if branch:
+                        pruned[k] = branch
+            return pruned
 
-        return localcfg
+        return prune(cfg, True)
 
     ###########################################################################
     def _find_sc_file(self, filename, missing_ok=False):
@@ -1597,6 +2227,8 @@ class Chip:
             return True
         if keypath[0] == 'flowgraph' and keypath[4] in ('select', 'status'):
             return True
+        if keypath[0] == 'tool' and keypath[2] == 'output':
+            return True
         return False
 
     ###########################################################################
@@ -1609,7 +2241,8 @@ class Chip:
         """
         if job is not None:
             # fill ith default schema before populating
-            self.cfg['history'][job] = schema_cfg()
+            self.cfg['history'][job] = _copy_cfg(_schema_template())
+            self._reset_index('history', job)
             dst = self.cfg['history'][job]
         else:
             dst = self.cfg
@@ -1635,12 +2268,16 @@ class Chip:
                     self.set(*arg, cfg=dst, clobber=clobber)
 
                 # update other fields that a user might modify
-                for field in self.getdict(*keylist, cfg=cfg).keys():
+                leaf = self._search(cfg, keylist, *keylist, mode='getcfg')
+                for field in list(leaf.keys()):
                     if field in ('value', 'switch', 'type', 'require', 'defvalue',
                                  'shorthelp', 'example', 'help'):
                         # skip these fields (value handled above, others are static)
                         continue
                     v = self.get(*keylist, cfg=cfg, field=field)
+                    if field == 'notes' and v is None:
+                        # documentation field, only stored if set
+                        continue
                     self.set(*keylist, v, cfg=dst, field=field)
 
     ###########################################################################
@@ -1662,13 +2299,11 @@ class Chip:
         allowed_paths = [os.path.join(self.cwd, self.get('option', 'builddir'))]
         allowed_paths.extend(os.environ['SC_VALID_PATHS'].split(os.pathsep))
 
-        for keypath in self.getkeys():
+        for keypath in self._keyview('file'):
             if 'default' in keypath:
                 continue
 
-            paramtype = self.get(*keypath, field='type')
-            #only do something if type is file or dir
-            if ('history' not in keypath and 'library' not in keypath) and ('file' in paramtype or 'dir' in paramtype):
+            if 'history' not in keypath and 'library' not in keypath:
 
                 if self.get(*keypath) is None:
                     # skip unset values (some directories are None by default)
@@ -1688,7 +2323,7 @@ class Chip:
                                 continue
 
                     if not ok:
-                        self.logger.error(f'Keypath {keypath} contains path(s) '
+                        self.logger.error(f'Keypath {list(keypath)} contains path(s) '
                             'that do not exist or resolve to files outside of '
                             'allowed directories.')
                         return False
@@ -1704,24 +2339,22 @@ class Chip:
             True if all file paths are valid, otherwise False.
         '''
 
-        allkeys = self.getkeys()
-        for keypath in allkeys:
+        for keypath in self._keyview('file'):
             allpaths = []
             paramtype = self.get(*keypath, field='type')
-            if 'file' in paramtype or 'dir' in paramtype:
-                if 'dir' not in keypath and self.get(*keypath):
-                    allpaths = list(self.get(*keypath))
-                for path in allpaths:
-                    #check for env var
-                    m = re.match(r'\$(\w+)(.*)', path)
-                    if m:
-                        prefix_path = os.environ[m.group(1)]
-                        path = prefix_path + m.group(2)
-                    file_error = 'file' in paramtype and not os.path.isfile(path)
-                    dir_error = 'dir' in paramtype and not os.path.isdir(path)
-                    if file_error or dir_error:
-                        self.logger.error(f"Paramater {keypath} path {path} is invalid")
-                        return False
+            if 'dir' not in keypath and self.get(*keypath):
+                allpaths = list(self.get(*keypath))
+            for path in allpaths:
+                #check for env var
+                m = re.match(r'\$(\w+)(.*)', path)
+                if m:
+                    prefix_path = os.environ[m.group(1)]
+                    path = prefix_path + m.group(2)
+                file_error = 'file' in paramtype and not os.path.isfile(path)
+                dir_error = 'dir' in paramtype and not os.path.isdir(path)
+                if file_error or dir_error:
+                    self.logger.error(f"Paramater {list(keypath)} path {path} is invalid")
+                    return False
 
         return True
 
@@ -1860,8 +2493,7 @@ class Chip:
                 self.logger.error(f"Target library {item} not found.")
 
         #3. Check requirements list
-        allkeys = self.getkeys()
-        for key in allkeys:
+        for key in self._keyview('require'):
             keypath = ",".join(key)
             if 'default' not in key and 'history' not in key and 'library' not in key:
                 key_empty = self._keypath_empty(key)
@@ -1983,8 +2615,8 @@ class Chip:
                             continue
 
                         design = self.get('design')
-                        manifest = f'{design}.pkg.json'
-                        inputs = [inp for inp in os.listdir(in_step_out_dir) if inp != manifest]
+                        manifests = (f'{design}.pkg.json', f'{design}.pkg.delta.pkl')
+                        inputs = [inp for inp in os.listdir(in_step_out_dir) if inp not in manifests]
                     else:
                         inputs = self._gather_outputs(in_step, in_index)
 
@@ -2013,7 +2645,9 @@ class Chip:
         Reads a manifest from disk and merges it with the current compilation manifest.
 
         The file format read is determined by the filename suffix. Currently
-        json (*.json) and yaml(*.yaml) formats are supported.
+        json (*.json), yaml(*.yaml) and pickle (*.pkl) formats are supported.
+        Pickle manifests can execute arbitrary code when loaded, so only read
+        them from trusted sources.
 
         Args:
             filename (filepath): Path to a manifest file to be loaded.
@@ -2043,8 +2677,12 @@ class Chip:
 
         #Read arguments from file based on file type
 
+        is_pickle = re.search(r'(\.pkl)(\.gz)*$', filepath)
+
         if filepath.endswith('.gz'):
             fin = gzip.open(filepath, 'r')
+        elif is_pickle:
+            fin = open(filepath, 'rb')
         else:
             fin = open(filepath, 'r')
 
@@ -2053,6 +2691,8 @@ class Chip:
                 localcfg = json.load(fin)
             elif re.search(r'(\.yaml|\.yml)(\.gz)*$', filepath):
                 localcfg = yaml.load(fin, Loader=yaml.SafeLoader)
+            elif is_pickle:
+                localcfg = pickle.load(fin)
             else:
                 self.error('File format not recognized %s', filepath)
         finally:
@@ -2089,8 +2729,11 @@ class Chip:
         Writes the compilation manifest to a file.
 
         The write file format is determined by the filename suffix. Currently
-        json (*.json), yaml (*.yaml), tcl (*.tcl), and (*.csv) formats are
-        supported.
+        json (*.json), yaml (*.yaml), tcl (*.tcl), (*.csv) and pickle (*.pkl)
+        formats are supported. Pickle is a compact binary format that is much
+        faster to read and write than the text formats. It is used to pass
+        results between tasks within run(), while json remains the format for
+        manifests meant to be read by users.
 
         Args:
             filename (filepath): Output filepath
@@ -2126,10 +2769,15 @@ class Chip:
             self._abspath(cfgcopy)
 
         is_csv = re.search(r'(\.csv)(\.gz)*$', filepath)
+        is_pickle = re.search(r'(\.pkl)(\.gz)*$', filepath)
 
         # format specific dumping
-        if filepath.endswith('.gz'):
+        if filepath.endswith('.gz') and is_pickle:
+            fout = gzip.open(filepath, 'wb')
+        elif filepath.endswith('.gz'):
             fout = gzip.open(filepath, 'wt', encoding='UTF-8')
+        elif is_pickle:
+            fout = open(filepath, 'wb')
         elif is_csv:
             # Files written using csv library should be opened with newline=''
             # https://docs.python.org/3/library/csv.html#id3
@@ -2147,6 +2795,8 @@ class Chip:
                 self._print_tcl(cfgcopy, prefix="dict set sc_cfg", fout=fout)
             elif is_csv:
                 self._print_csv(cfgcopy, fout=fout)
+            elif is_pickle:
+                pickle.dump(cfgcopy, fout, protocol=pickle.HIGHEST_PROTOCOL)
             else:
                 self.error('File format not recognized %s', filepath)
         finally:
@@ -2419,9 +3069,10 @@ class Chip:
     def _import_library(self, libname, libcfg):
         '''Helper to import library with config 'libconfig' as a library
         'libname' in current Chip object.'''
-        self.cfg['library'][libname] = copy.deepcopy(libcfg)
+        self.cfg['library'][libname] = _copy_cfg(libcfg)
         if 'pdk' in self.cfg['library'][libname]:
             del self.cfg['library'][libname]['pdk']
+        self._reset_index('library', libname)
 
     ###########################################################################
     def write_depgraph(self, filename):
@@ -2526,8 +3177,7 @@ class Chip:
         paths = []
 
         copyall = self.get('option', 'copyall')
-        allkeys = self.getkeys()
-        for key in allkeys:
+        for key in self._keyview('file'):
             if key[0] == 'history':
                 continue
             leaftype = self.get(*key, field='type')
@@ -2629,7 +3279,7 @@ class Chip:
         return archive_name
 
     ###########################################################################
-    def hash_files(self, *keypath, algo='sha256', update=True):
+    def hash_files(self, *keypath, algo=None, update=True):
         '''Generates hash values for a list of parameter files.
 
         Generates a a hash value for each file found in the keypath.
@@ -2639,9 +3289,15 @@ class Chip:
 
         Files are located using the find_files() function.
 
-        The file hash calculation is performed basd on the 'algo' setting.
-        Supported algorithms include SHA1, SHA224, SHA256, SHA384, SHA512,
-        and MD5.
+        The file hash calculation is performed basd on the 'algo' setting,
+        which defaults to the 'hashalgo' field of the parameter. Supported
+        algorithms include all algorithms of Python's hashlib module with a
+        fixed digest length, such as SHA1, SHA224, SHA256, SHA384, SHA512,
+        BLAKE2B and MD5. Files are hashed in parallel. If [option,cachedir]
+        is set, digests are kept in the cache directory, so files that are
+        unchanged since they were last hashed (same path, size, modification
+        time and inode) aren't read again. The cache is limited by
+        [option,cachesize], which is enforced when new digests are added.
 
         Args:
             *keypath(str): Keypath to parameter.
@@ -2661,30 +3317,104 @@ class Chip:
         #TODO: Insert into find_files?
         if 'file' not in self.get(*keypath, field='type'):
             self.error(f"Illegal attempt to hash non-file parameter [{keypathstr}].")
+            return None
+
+        hashalgo = self.get(*keypath, field='hashalgo')
+        if algo is None:
+            algo = hashalgo
+        algo = algo.lower()
+        # Variable length digests (SHAKE) can't be used without a length.
+        if algo not in hashlib.algorithms_available or not hashlib.new(algo).digest_size:
+            self.error(f"Unsupported hash algorithm {algo} for [{keypathstr}].")
+            return None
+
+        filelist = self.find_files(*keypath)
+        if not isinstance(filelist, list):
+            filelist = [filelist]
+        #cycle through all paths
+        hashlist = []
+        stored = []
+        if filelist:
+            self.logger.info(f'Computing hash value for [{keypathstr}]')
+        for filename in filelist:
+            if not filename or not os.path.isfile(filename):
+                self.error(f"Internal hashing error, file not found")
+                return None
+        if len(filelist) > 1:
+            workers = min(len(filelist), os.cpu_count() or 1)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                hashlist = list(executor.map(
+                    lambda f: self._hash_file(f, algo=algo, stored=stored), filelist))
         else:
-            filelist = self.find_files(*keypath)
-            #cycle through all paths
-            hashlist = []
-            if filelist:
-                self.logger.info(f'Computing hash value for [{keypathstr}]')
-            for filename in filelist:
-                if os.path.isfile(filename):
-                    #TODO: Implement algo selection
-                    hashobj = hashlib.sha256()
-                    with open(filename, "rb") as f:
-                        for byte_block in iter(lambda: f.read(4096), b""):
-                            hashobj.update(byte_block)
-                    hash_value = hashobj.hexdigest()
-                    hashlist.append(hash_value)
-                else:
-                    self.error(f"Internal hashing error, file not found")
-            # compare previous hash to new hash
-            oldhash = self.get(*keypath,field='filehash')
-            for i,item in enumerate(oldhash):
-                if item != hashlist[i]:
-                    self.error(f"Hash mismatch for [{keypath}]")
+            hashlist = [self._hash_file(filename, algo=algo, stored=stored)
+                        for filename in filelist]
+
+        if update:
+            # compare previous hash to new hash (computed with the same algorithm)
+            if algo == hashalgo:
+                oldhash = self.get(*keypath,field='filehash')
+                for i,item in enumerate(oldhash):
+                    if i < len(hashlist) and item != hashlist[i]:
+                        self.error(f"Hash mismatch for [{keypath}]")
+            else:
+                self.set(*keypath, algo, field='hashalgo')
             self.set(*keypath, hashlist, field='filehash', clobber=True)
 
+        if stored:
+            self._task_cache_evict()
+        return hashlist
+
+    ###########################################################################
+    def _hash_file(self, filename, algo='sha256', stored=None):
+        '''
+        Returns the hex digest of a file's contents.
+
+        If [option,cachedir] is set, digests are looked up in and added to
+        the digest cache in its 'hashes' directory, keyed by the file's path,
+        size, modification time and inode. The paths of new cache entries are
+        appended to the 'stored' list, if given, so that callers know when
+        the cache needs to be evicted.
+        '''
+        if not self.get('option', 'cachedir'):
+            return _digest_file(filename, algo)
+
+        try:
+            stat = os.stat(filename)
+            filename = os.path.realpath(filename)
+            fileid = [filename, stat.st_size, stat.st_mtime_ns, stat.st_ino]
+            pathhash = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+            cachefile = os.path.join(self._task_cache_dir(), 'hashes', algo, pathhash)
+        except OSError:
+            return _digest_file(filename, algo)
+
+        try:
+            with open(cachefile, 'r') as f:
+                cached = json.load(f)
+            if cached['file'] == fileid:
+                # Entries are evicted least recently used first.
+                os.utime(cachefile)
+                return cached['digest']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        digest = _digest_file(filename, algo)
+
+        if time.time() - stat.st_mtime > _HASH_CACHE_SETTLE:
+            # Write to a temporary file first, so concurrent readers never
+            # see a partial entry. The cache is an optimization, so errors
+            # are ignored.
+            tmpfile = f'{cachefile}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+                with open(tmpfile, 'w') as f:
+                    json.dump({'file': fileid, 'digest': digest}, f)
+                os.replace(tmpfile, cachefile)
+                if stored is not None:
+                    stored.append(cachefile)
+            except OSError:
+                pass
+
+        return digest
 
     ###########################################################################
     def audit_manifest(self):
@@ -2850,15 +3580,17 @@ class Chip:
         Emulates the Unix grep command on a string.
 
         Emulates the behavior of the Unix grep command that is etched into
-        our muscle memory. Partially implemented, not all features supported.
-        The function returns None if no match is found.
+        our muscle memory. Supported options are -v, -i, -E, -e, -x, -o and
+        -w. Patterns are Python regular expressions. The function returns
+        None if no match is found.
 
         Args:
             arg (string): Command line arguments for grep command
             line (string): Line to process
 
         Returns:
-            Result of grep command (string).
+            Result of grep command (string). With -o, the matching parts of
+            the line, separated by newlines.
 
         """
 
@@ -2866,48 +3598,18 @@ class Chip:
         if line is None:
             return None
 
-        # Partial list of supported grep options
-        options = {
-            '-v' : False, # Invert the sense of matching
-            '-i' : False, # Ignore case distinctions in patterns and data
-            '-E' : False, # Interpret PATTERNS as extended regular expressions.
-            '-e' : False, # Safe interpretation of pattern starting with "-"
-            '-x' : False, # Select only matches that exactly match the whole line.
-            '-o' : False, # Print only the match parts of a matching line
-            '-w' : False} # Select only lines containing matches that form whole words.
-
-        # Split into repeating switches and everything else
-        match = re.match(r'\s*((?:\-\w\s)*)(.*)', args)
-
-        pattern = match.group(2)
-
-        # Split space separated switch string into list
-        switches = match.group(1).strip().split(' ')
-
-        # Find special -e switch update the pattern
-        for i in range(len(switches)):
-            if switches[i] == "-e":
-                if i != (len(switches)):
-                    pattern = ' '.join(switches[i+1:]) + " " + pattern
-                    switches = switches[0:i+1]
-                    break
-                options["-e"] = True
-            elif switches[i] in options.keys():
-                options[switches[i]] = True
-            elif switches[i] !='':
-                print("ERROR",switches[i])
-
-        #REGEX
-        #TODO: add all the other optinos
-        match = re.search(rf"({pattern})", line)
-        if bool(match) == bool(options["-v"]):
+        grep = _compile_grep(args)
+        for switch in grep[-1]:
+            self.logger.warning(f"Unsupported grep option {switch} in '{args}'")
+
+        lines = _grep_select(grep, line)
+        if not lines:
             return None
-        else:
-            return line
+        return '\n'.join(lines)
 
     ###########################################################################
     def check_logfile(self, jobname=None, step=None, index='0',
-                      logfile=None, display=True):
+                      logfile=None, display=True, metrics=False):
         '''
         Checks logfile for patterns found in the 'regex' parameter.
 
@@ -2916,12 +3618,24 @@ class Chip:
         '<design>.<suffix>' in the current directory. The matches are logged
         if display is set to True.
 
+        If metrics is set to True, the metric rules returned by the tool's
+        log_metrics() function are applied in the same pass over the log
+        file. Each rule is a (regex, metric, converter) tuple: for each line
+        matching regex, converter is called with the match object, and the
+        value it returns is set for metric. metric can also be a tuple of
+        metric names, in which case converter returns a tuple of values. If
+        converter returns None, no metric is set, which lets rules keep track
+        of sections of the log file. The first matching rule is applied to a
+        line, and later lines override metrics set by earlier ones.
+
         Args:
             jobname (str): Job directory name. If None, :keypath:`option, jobname` is used.
             step (str): Task step name ('syn', 'place', etc). If None, :keypath:`arg, step` is used.
             index (str): Task index. Default value is 0. If None, :keypath:`arg, index` is used.
             logfile (str): Path to logfile. If None, the default task logfile is used.
             display (bool): If True, logs matches.
+            metrics (bool): If True, extracts metrics with the tool's
+                log_metrics() rules.
 
         Returns:
             Dictionary mapping suffixes to number of matches for that suffix's
@@ -2952,47 +3666,119 @@ class Chip:
 
         tool = self.get('flowgraph', flow, step, index, 'tool')
 
-        # Creating local dictionary (for speed)
-        # self.get is slow
+        # Compile each suffix's greps once
         checks = {}
         matches = {}
-        regex_list = []
-        if self.valid('tool', tool, 'regex', step, index, 'default'):
-            regex_list = self.getkeys('tool', tool, 'regex', step, index)
-        for suffix in regex_list:
+        for suffix, greps in self._task_greps(tool, step, index).items():
             checks[suffix] = {}
             checks[suffix]['report'] = open(f"{step}.{suffix}", "w")
-            checks[suffix]['args'] = self.get('tool', tool, 'regex', step, index, suffix)
+            checks[suffix]['greps'] = greps
             matches[suffix] = 0
 
-        # Looping through patterns for each line
-        with open(logfile, errors='ignore_with_warning') as f:
-            for line in f:
-                for suffix in checks:
-                    string = line
-                    for item in checks[suffix]['args']:
-                        if string is None:
-                            break
+        rules = []
+        if metrics:
+            func = self.find_function(tool, 'log_metrics', 'tools')
+            if func:
+                for regex, metric, converter in func(self):
+                    rules.append((re.compile(regex), metric, converter))
+
+        def check_line(line):
+            for regex, metric, converter in rules:
+                match = regex.search(line)
+                if match:
+                    value = converter(match)
+                    if value is None:
+                        pass
+                    elif isinstance(metric, str):
+                        self.set('metric', step, index, metric, value, clobber=True)
+                    else:
+                        for name, val in zip(metric, value):
+                            self.set('metric', step, index, name, val, clobber=True)
+                    break
+            for suffix in checks:
+                for string in _grep_chain(checks[suffix]['greps'], line):
+                    matches[suffix] += 1
+                    #always print to file
+                    print(string.strip(), file=checks[suffix]['report'])
+                    #selectively print to display
+                    if display:
+                        if suffix == 'errors':
+                            self.logger.error(string.strip())
+                        elif suffix == 'warnings':
+                            self.logger.warning(string.strip())
                         else:
-                            string = self.grep(item, string)
-                    if string is not None:
-                        matches[suffix] += 1
-                        #always print to file
-                        print(string.strip(), file=checks[suffix]['report'])
-                        #selectively print to display
-                        if display:
-                                if suffix == 'errors':
-                                    self.logger.error(string.strip())
-                                elif suffix == 'warnings':
-                                    self.logger.warning(string.strip())
-                                else:
-                                    self.logger.info(f'{suffix}: {string.strip()}')
+                            self.logger.info(f'{suffix}: {string.strip()}')
+
+        # Lines can only be output if the first grep of some suffix (or a
+        # metric rule) matches them, so unless a first grep is inverted,
+        # searching whole chunks of the file for the first greps finds the
+        # lines to check. Each first grep is searched for separately, which
+        # lets the regex engine skip ahead to literal prefixes instead of
+        # trying an alternation at every position.
+        prefilters = None
+        first = [greps[0] for greps in (c['greps'] for c in checks.values()) if greps]
+        first.extend((regex.pattern, regex.flags & re.IGNORECASE, regex, False)
+                     for regex, _, _ in rules)
+        if len(first) == len(checks) + len(rules) and not any(grep[3] for grep in first) and \
+           not any(anchor in grep[0] for grep in first for anchor in ('\\A', '\\Z')):
+            prefilters = [re.compile(pattern, flags | re.MULTILINE)
+                          for pattern, flags in dict.fromkeys(grep[:2] for grep in first)]
+
+        with open(logfile, errors='ignore_with_warning') as f:
+            if not checks and not rules:
+                pass
+            elif prefilters is None:
+                for line in f:
+                    check_line(line.rstrip('\n'))
+            else:
+                while True:
+                    chunk = f.read(_LOG_CHUNK)
+                    if not chunk:
+                        break
+                    if not chunk.endswith('\n'):
+                        # end chunks on a line boundary
+                        chunk += f.readline()
+                    lines = set()
+                    for prefilter in prefilters:
+                        pos = 0
+                        while pos < len(chunk):
+                            match = prefilter.search(chunk, pos)
+                            if match is None:
+                                break
+                            start = chunk.rfind('\n', 0, match.start()) + 1
+                            end = chunk.find('\n', match.start())
+                            if end < 0:
+                                end = len(chunk)
+                            lines.add((start, end))
+                            pos = end + 1
+                    for start, end in sorted(lines):
+                        check_line(chunk[start:end])
 
         for suffix in checks:
             checks[suffix]['report'].close()
 
         return matches
 
+    ###########################################################################
+    def _task_greps(self, tool, step, index):
+        '''
+        Returns a dictionary mapping the suffixes of a task's 'regex'
+        parameter to their greps, compiled by _compile_grep().
+        '''
+        greps = {}
+        regex_list = []
+        if self.valid('tool', tool, 'regex', step, index, 'default'):
+            regex_list = self.getkeys('tool', tool, 'regex', step, index)
+        for suffix in regex_list:
+            greps[suffix] = []
+            for args in self.get('tool', tool, 'regex', step, index, suffix):
+                grep = _compile_grep(args)
+                for switch in grep[-1]:
+                    self.logger.warning(f"Unsupported grep option {switch} in '{args}' "
+                                        f"for {suffix}")
+                greps[suffix].append(grep)
+        return greps
+
     ###########################################################################
     def _find_leaves(self, steplist):
         '''Helper to find final (leaf) tasks for a given steplist.'''
@@ -3254,6 +4040,143 @@ class Chip:
         sorted_dict = dict(sorted(depth.items(), key=lambda depth: depth[1]))
         return list(sorted_dict.keys())
 
+    ###########################################################################
+    def predict_runtime(self, flow=None, steplist=None):
+        '''
+        Returns the predicted time from the start of each task to the end of
+        the flow.
+
+        Each task is weighted by its most recent recorded tasktime metric,
+        taken from the current manifest (for example after reading in the
+        manifest of a previous job) or from the jobs in the history. Tasks
+        without a recorded tasktime are weighted by the mean of the recorded
+        tasktimes, builtins by zero. The predicted time of a task is its own
+        weight plus the largest predicted time of the tasks that depend on it,
+        i.e. the length of the longest downstream path. run() starts ready
+        tasks in order of decreasing predicted time.
+
+        Args:
+            flow (str): Flow to inspect. Defaults to the current flow.
+            steplist (list of str): Steps to consider. Defaults to all steps
+                in the flow.
+
+        Returns:
+            Dictionary mapping (step, index) tuples to predicted times in
+            seconds.
+
+        Examples:
+            >>> runtime = chip.predict_runtime()
+            >>> makespan = max(runtime.values())
+            Predicts the wall time of the flow, assuming unlimited workers.
+        '''
+
+        if flow is None:
+            flow = self.get('option', 'flow')
+        if steplist is None:
+            steplist = self.list_steps(flow=flow)
+
+        tasks = []
+        dependents = {}
+        for step in steplist:
+            for index in self.getkeys('flowgraph', flow, step):
+                tasks.append((step, index))
+                for in_task in self.get('flowgraph', flow, step, index, 'input'):
+                    if in_task[0] in steplist:
+                        dependents.setdefault(in_task, []).append((step, index))
+
+        weights = {}
+        for step, index in tasks:
+            tool = self.get('flowgraph', flow, step, index, 'tool')
+            if tool not in self.builtin:
+                weights[(step, index)] = self._recorded_tasktime(step, index)
+
+        recorded = [w for w in weights.values() if w is not None]
+        default = sum(recorded) / len(recorded) if recorded else 1.0
+
+        runtime = {}
+        for task in reversed(self._task_order(tasks, dependents)):
+            if task not in weights:
+                weight = 0.0
+            elif weights[task] is None:
+                weight = default
+            else:
+                weight = weights[task]
+            runtime[task] = weight + max((runtime.get(dep, 0) for dep in dependents.get(task, [])),
+                                         default=0)
+
+        return runtime
+
+    ###########################################################################
+    def critical_path(self, flow=None, steplist=None):
+        '''
+        Returns the predicted critical path through the flow.
+
+        The critical path is the chain of tasks with the largest total
+        predicted runtime, see :meth:`predict_runtime`. Its length is the
+        predicted makespan of the flow when enough workers are available to
+        run every ready task at once.
+
+        Args:
+            flow (str): Flow to inspect. Defaults to the current flow.
+            steplist (list of str): Steps to consider. Defaults to all steps
+                in the flow.
+
+        Returns:
+            Tuple of the predicted makespan in seconds and the list of
+            (step, index) tuples on the critical path, in execution order.
+
+        Examples:
+            >>> makespan, path = chip.critical_path()
+            Returns the predicted makespan and the tasks that determine it.
+        '''
+
+        if flow is None:
+            flow = self.get('option', 'flow')
+        if steplist is None:
+            steplist = self.list_steps(flow=flow)
+
+        runtime = self.predict_runtime(flow=flow, steplist=steplist)
+        if not runtime:
+            return (0.0, [])
+
+        dependents = {}
+        for step, index in runtime:
+            for in_task in self.get('flowgraph', flow, step, index, 'input'):
+                dependents.setdefault(in_task, []).append((step, index))
+
+        # Start from the most expensive root and keep following the most
+        # expensive dependent.
+        roots = [task for task in runtime
+                 if not any(in_task in runtime for in_task in
+                            self.get('flowgraph', flow, task[0], task[1], 'input'))]
+        task = max(roots, key=lambda t: runtime[t])
+        makespan = runtime[task]
+        path = [task]
+        while any(dep in runtime for dep in dependents.get(task, [])):
+            task = max((dep for dep in dependents[task] if dep in runtime),
+                       key=lambda t: runtime[t])
+            path.append(task)
+
+        return (makespan, path)
+
+    ###########################################################################
+    def _recorded_tasktime(self, step, index):
+        '''
+        Returns the most recent tasktime recorded for a task in the current
+        manifest or in the history, or None if there is none.
+        '''
+
+        for job in [None] + list(reversed(self.getkeys('history'))):
+            if job is not None and 'metric' not in self.cfg['history'][job]:
+                continue
+            if step in self.getkeys('metric', job=job) and \
+               index in self.getkeys('metric', step, job=job):
+                tasktime = self.get('metric', step, index, 'tasktime', job=job)
+                if tasktime is not None:
+                    return tasktime
+
+        return None
+
     ###########################################################################
     def _allpaths(self, cfg, flow, step, index, path=None):
         '''Recursive helper for finding all paths from provided step, index to
@@ -3420,6 +4343,9 @@ class Chip:
                     newin = name + "." + in_step
                     self.add('flowgraph', flow, newstep, index,'input',(newin,in_index))
 
+        # steps were copied in place
+        self._reset_index('flowgraph', flow)
+
 
     ###########################################################################
     def pipe(self, flow, plan):
@@ -3694,11 +4620,13 @@ class Chip:
         - Set environment variables
         - Check EXE version
         - Save manifest as TCL/YAML
+        - Look up task result cache
         - Start CPU timer
         - Run EXE
         - stop CPU timer
         - Run post_process()
         - Check log file
+        - Store task results in cache
         - Hash all task files
         - Stop Wall timer
         - Make a task record
@@ -3768,8 +4696,7 @@ class Chip:
                 in_task_status = status[in_step + in_index]
                 self.set('flowgraph', flow, in_step, in_index, 'status', in_task_status)
                 if in_task_status != TaskStatus.ERROR:
-                    cfgfile = f"../../../{in_job}/{in_step}/{in_index}/outputs/{design}.pkg.json"
-                    self._read_manifest(cfgfile, clobber=False, partial=True)
+                    self._merge_task_results(in_job, in_step, in_index)
 
         ##################
         # Write manifest prior to step running into inputs
@@ -3834,7 +4761,7 @@ class Chip:
             # Skip copying pkg.json files here, since we write the current chip
             # configuration into inputs/{design}.pkg.json earlier in _runstep.
             utils.copytree(f"../../../{in_job}/{in_step}/{in_index}/outputs", 'inputs/', dirs_exist_ok=True,
-                ignore=[f'{design}.pkg.json'], link=True)
+                ignore=[f'{design}.pkg.json', f'{design}.pkg.delta.pkl'], link=True)
 
         ##################
         # Check manifest
@@ -3912,6 +4839,17 @@ class Chip:
             pruneopt = bool(suffix!='tcl')
             self.write_manifest(f"sc_manifest.{suffix}", prune=pruneopt, abspath=True)
 
+        ##################
+        # Look up results of an identical earlier task
+        cache_key = None
+        cached_metrics = None
+        if self.get('option', 'cachedir') and (tool not in self.builtin) and \
+           (not self.get('option', 'skipall')) and (step not in self.get('option', 'bkpt')):
+            cache_key = self._task_cache_key(step, index, tool, version)
+            cached_metrics = self._task_cache_restore(cache_key)
+            if cached_metrics is not None:
+                self.logger.info(f'Reusing cached results {cache_key}')
+
         ##################
         # Start CPU Timer
         self.logger.debug(f"Starting executable")
@@ -3921,11 +4859,15 @@ class Chip:
         # Run executable (or copy inputs to outputs for builtin functions)
 
         # TODO: Currently no memory usage tracking in breakpoints, builtins, or unexpected errors.
-        max_mem_bytes = 0
+        telemetry = None
+        series = [] if self.get('option', 'telemetry') else None
 
         retcode = 0
         if tool in self.builtin:
             utils.copytree(f"inputs", 'outputs', dirs_exist_ok=True, link=True)
+        elif cached_metrics is not None:
+            # Note: don't call _makecmd(), its replay.sh is linked from the cache.
+            cmdlist = [toolpath]
         elif run_func and not self.get('option', 'skipall'):
             retcode = run_func(self)
         elif not self.get('option', 'skipall'):
@@ -3979,55 +4921,64 @@ class Chip:
                     self.logger.error(f'stderr/destination has no support for {destination}. Use [log|output|none].')
                     self._haltstep(step, index)
 
-                with open(stdout_file, 'w') as stdout_writer, \
-                    open(stdout_file, 'r', errors='replace_with_warning') as stdout_reader,  \
-                    open(stderr_file, 'w') as stderr_writer,  \
-                    open(stderr_file, 'r', errors='replace_with_warning') as stderr_reader:
-                    # Use separate reader/writer file objects as hack to display
-                    # live output in non-blocking way, so we can monitor the
-                    # timeout. Based on https://stackoverflow.com/a/18422264.
-                    is_stdout_log = self.get('tool', tool, 'stdout', step, index, 'destination') == 'log'
-                    is_stderr_log = self.get('tool', tool, 'stderr', step, index, 'destination') == 'log' and stderr_file != stdout_file
+                is_stdout_log = self.get('tool', tool, 'stdout', step, index, 'destination') == 'log'
+                is_stderr_log = self.get('tool', tool, 'stderr', step, index, 'destination') == 'log'
+
+                # Apply the task's regexes to the log as it is written.
+                greps = self._task_greps(tool, step, index)
+                live_matches = dict.fromkeys(greps, 0)
+                errorlimit = self.get('flowgraph', flow, step, index, 'errorlimit')
+                if errorlimit and 'errors' not in greps:
+                    self.logger.warning(f'Ignoring error limit, {tool} has no errors regex '
+                                        f'for {step}{index}')
+                def check_line(line):
+                    for suffix in greps:
+                        count = len(_grep_chain(greps[suffix], line))
+                        if count and suffix == 'errors' and not live_matches[suffix] and quiet:
+                            # Output isn't displayed, point out the first error
+                            # right away rather than after the tool exits.
+                            self.logger.error(f'{tool} reported an error: {line.strip()}')
+                        live_matches[suffix] += count
+                    if errorlimit and live_matches.get('errors', 0) >= errorlimit:
+                        pump.stop()
+
+                with contextlib.ExitStack() as writers:
+                    stdout_writer = writers.enter_context(open(stdout_file, 'wb'))
                     # if STDOUT and STDERR are to be redirected to the same file,
-                    # use a single writer
+                    # use a single pipe
+                    stderr_pipe = PIPE
                     if stderr_file == stdout_file:
-                        stderr_writer.close()
-                        stderr_reader.close()
-                        stderr_writer = subprocess.STDOUT
+                        stderr_pipe = subprocess.STDOUT
 
                     cmd_start_time = time.time()
-                    proc = subprocess.Popen(cmdlist,
-                                            stdout=stdout_writer,
-                                            stderr=stderr_writer)
-
-                    while proc.poll() is None:
-                        # Gather subprocess memory usage.
-                        try:
-                            pproc = psutil.Process(proc.pid)
-                            max_mem_bytes = max(max_mem_bytes, pproc.memory_full_info().uss)
-                        except psutil.Error:
-                            # Process may have already terminated or been killed.
-                            # Retain existing memory usage statistics in this case.
-                            pass
-
-                        # Loop until process terminates
-                        if not quiet:
-                            if is_stdout_log:
-                                sys.stdout.write(stdout_reader.read())
-                            if is_stderr_log:
-                                sys.stdout.write(stderr_reader.read())
-                        if timeout is not None and time.time() - cmd_start_time > timeout:
+                    proc = subprocess.Popen(cmdlist, stdout=PIPE, stderr=stderr_pipe)
+                    # Closes the pipes when done
+                    writers.enter_context(proc)
+
+                    telemetry = _TaskTelemetry(proc.pid, series=series)
+                    pump = _OutputPump(on_line=check_line if greps else None)
+                    pump.add(proc.stdout, stdout_writer, echo=is_stdout_log and not quiet,
+                             match=stdout_file == logfile)
+                    if stderr_pipe == PIPE:
+                        stderr_writer = writers.enter_context(open(stderr_file, 'wb'))
+                        pump.add(proc.stderr, stderr_writer, echo=is_stderr_log and not quiet,
+                                 match=stderr_file == logfile)
+
+                    deadline = None
+                    if timeout is not None:
+                        deadline = cmd_start_time + timeout
+                    # Gather resource usage of the process tree while pumping.
+                    if not pump.run(proc, deadline=deadline, tick=telemetry.sample):
+                        if pump.stopped:
+                            self.logger.error(f'{tool} reported {live_matches["errors"]} errors, '
+                                              f'reaching the error limit of {errorlimit}. See log '
+                                              f'file {os.path.abspath(logfile)}')
+                        else:
                             self.logger.error(f'Step timed out after {timeout} seconds')
-                            proc.terminate()
-                            self._haltstep(step, index)
-                        time.sleep(0.1)
-
-                    # Read the remaining
-                    if not quiet:
-                        if is_stdout_log:
-                            sys.stdout.write(stdout_reader.read())
-                        if is_stderr_log:
-                            sys.stdout.write(stderr_reader.read())
+                        _terminate_tree(proc)
+                        self._haltstep(step, index)
+
+                    telemetry.sample(force=True)
                     retcode = proc.returncode
 
         if retcode != 0:
@@ -4039,19 +4990,36 @@ class Chip:
         cpu_end = time.time()
         cputime = round((cpu_end - cpu_start),2)
         self.set('metric', step, index, 'exetime', cputime)
-        self.set('metric', step, index, 'memory', max_mem_bytes)
+        if telemetry:
+            for metric, value in telemetry.metrics().items():
+                if value is not None:
+                    self.set('metric', step, index, metric, value)
+            if series is not None:
+                with open(os.path.join('reports', 'telemetry.csv'), 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(_TaskTelemetry.COLUMNS)
+                    writer.writerows(series)
+        else:
+            self.set('metric', step, index, 'memory', 0)
+
+        ##################
+        # Restore metrics of cached results in place of post-processing
+        if cached_metrics is not None:
+            for metric, value in cached_metrics.items():
+                self.set('metric', step, index, metric, value, clobber=True)
 
         ##################
         # Post process
-        if (tool not in self.builtin) and (not self.get('option', 'skipall')) :
+        if (tool not in self.builtin) and (not self.get('option', 'skipall')) and (cached_metrics is None):
             func = self.find_function(tool, 'post_process', 'tools')
             if func:
                 func(self)
 
         ##################
         # Check log file (must be after post-process)
-        if (tool not in self.builtin) and (not self.get('option', 'skipall')) and (run_func is None):
-            matches = self.check_logfile(step=step, index=index, display=not quiet)
+        if (tool not in self.builtin) and (not self.get('option', 'skipall')) and (run_func is None) and \
+           (cached_metrics is None):
+            matches = self.check_logfile(step=step, index=index, display=not quiet, metrics=True)
             if 'errors' in matches:
                 errors = self.get('metric', step, index, 'errors')
                 if errors is None:
@@ -4065,6 +5033,11 @@ class Chip:
                 warnings += matches['warnings']
                 self.set('metric', step, index, 'warnings', warnings)
 
+        ##################
+        # Store results for identical later tasks
+        if cache_key and (cached_metrics is None) and not self.get('metric', step, index, 'errors'):
+            self._task_cache_store(cache_key, step, index)
+
         ##################
         # Hash files
         if self.get('option', 'hash') and (tool not in self.builtin):
@@ -4096,6 +5069,8 @@ class Chip:
         self.set('arg', 'index', None, clobber=True)
 
         self.write_manifest(os.path.join("outputs", f"{design}.pkg.json"))
+        with open(os.path.join("outputs", f"{design}.pkg.delta.pkl"), 'wb') as f:
+            pickle.dump(self._task_delta(), f, protocol=pickle.HIGHEST_PROTOCOL)
 
         ##################
         # Stop if there are errors
@@ -4149,6 +5124,232 @@ class Chip:
             else:
                 os.remove(path)
 
+    ###########################################################################
+    def _task_cache_dir(self):
+        '''
+        Returns the absolute path of the task result cache, see [option,cachedir].
+        '''
+        cachedir = os.path.expanduser(self.get('option', 'cachedir'))
+        return os.path.join(self.cwd, cachedir)
+
+    ###########################################################################
+    def _task_cache_key(self, step, index, tool, version):
+        '''
+        Returns the task result cache key of a task.
+
+        The key is a digest of the tool version, the tool's parameters for
+        this task, the keypaths it requires and the contents of the task's
+        inputs directory. Assumes our cwd is the workdir for step and index.
+        '''
+
+        params = {}
+        for keypath in self._keypath_set():
+            if keypath[:2] != ('tool', tool) or 'default' in keypath:
+                continue
+            # Where the tool is found doesn't change what it produces.
+            if keypath[2] in ('path', 'vendor', 'version', 'licenseserver'):
+                continue
+            if len(keypath) > 3 and keypath[3:5] != (step, index):
+                continue
+            params[','.join(keypath)] = self._task_cache_value(*keypath)
+
+        if self.valid('tool', tool, 'require', step, index, quiet=True):
+            for item in self.get('tool', tool, 'require', step, index):
+                params[item] = self._task_cache_value(*item.split(','))
+
+        key = {
+            'scversion': self.scversion,
+            'design': self.top(),
+            'tool': tool,
+            'version': version,
+            'step': step,
+            'index': index,
+            'params': params,
+            'inputs': self._hash_dir('inputs')
+        }
+
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    ###########################################################################
+    def _task_cache_value(self, *keypath):
+        '''
+        Returns the value of a keypath as it contributes to a task cache key.
+
+        Files and directories contribute their contents, except for the
+        tool's own input/output/report lists, which name files in the work
+        directory.
+        '''
+        value = self.get(*keypath)
+        sctype = self.get(*keypath, field='type')
+        if not value or (keypath[0] == 'tool' and keypath[2] in ('input', 'output', 'report')):
+            return value
+
+        if 'file' in sctype:
+            paths = self.find_files(*keypath, missing_ok=True)
+            if not isinstance(paths, list):
+                paths = [paths]
+            return [self._hash_file(path) if path else None for path in paths]
+        elif 'dir' in sctype:
+            paths = self.find_files(*keypath, missing_ok=True)
+            if not isinstance(paths, list):
+                paths = [paths]
+            return [self._hash_dir(path) if path else None for path in paths]
+
+        return value
+
+    ###########################################################################
+    def _hash_dir(self, path):
+        '''
+        Returns a mapping of the relative file paths in a directory tree to
+        the digests of their contents.
+        '''
+        digests = {}
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                filename = os.path.join(root, name)
+                digests[os.path.relpath(filename, path)] = self._hash_file(filename)
+        return digests
+
+    ###########################################################################
+    def _task_cache_restore(self, key):
+        '''
+        Links a cached task result into the current work directory.
+
+        Returns the cached metrics, or None if there is no usable entry, in
+        which case the work directory is left as it was.
+        '''
+        entry = os.path.join(self._task_cache_dir(), key)
+        if not os.path.isdir(entry):
+            return None
+
+        restored = []
+        try:
+            with open(os.path.join(entry, 'task.json'), 'r') as f:
+                metrics = json.load(f)['metrics']
+            filesdir = os.path.join(entry, 'files')
+            for root, dirs, files in os.walk(filesdir):
+                reldir = os.path.relpath(root, filesdir)
+                os.makedirs(reldir, exist_ok=True)
+                for name in files:
+                    dst = os.path.normpath(os.path.join(reldir, name))
+                    utils.link_or_copy(os.path.join(root, name), dst)
+                    restored.append(dst)
+            # Entries are evicted least recently used first.
+            os.utime(entry)
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f'Unable to use cached results {key}: {e}')
+            for path in restored:
+                os.remove(path)
+            return None
+
+        return metrics
+
+    ###########################################################################
+    def _task_cache_store(self, key, step, index):
+        '''
+        Adds the results in the current work directory to the task result
+        cache, then evicts entries beyond [option,cachesize].
+        '''
+        design = self.get('design')
+        cachedir = self._task_cache_dir()
+        entry = os.path.join(cachedir, key)
+        if os.path.isdir(entry):
+            return
+
+        # Build the entry next to its final location and move it into place
+        # at once, so concurrent tasks never see a partial entry.
+        tmpentry = f'{entry}.{os.getpid()}.tmp'
+        filesdir = os.path.join(tmpentry, 'files')
+        skip = (os.path.join('outputs', f'{design}.pkg.json'),
+                os.path.join('outputs', f'{design}.pkg.delta.pkl'))
+        size = 0
+        try:
+            for root, dirs, files in os.walk('.'):
+                if root == '.':
+                    dirs[:] = [d for d in dirs if d in ('outputs', 'reports')]
+                    files = [f for f in files if not f.startswith('sc_manifest.')]
+                reldir = os.path.normpath(root)
+                os.makedirs(os.path.join(filesdir, reldir), exist_ok=True)
+                for name in files:
+                    src = os.path.normpath(os.path.join(reldir, name))
+                    if src in skip or os.path.islink(src):
+                        continue
+                    utils.link_or_copy(src, os.path.join(filesdir, src))
+                    size += os.path.getsize(src)
+
+            metrics = {}
+            for metric in self.getkeys('metric', step, index):
+                # Runtime measurements describe this task, not its results.
+                if metric in ('exetime', 'tasktime') + _TELEMETRY_METRICS:
+                    continue
+                value = self.get('metric', step, index, metric)
+                if value is not None:
+                    metrics[metric] = value
+
+            with open(os.path.join(tmpentry, 'task.json'), 'w') as f:
+                json.dump({'tool': self.get('flowgraph', self.get('option', 'flow'), step, index, 'tool'),
+                           'step': step,
+                           'index': index,
+                           'size': size,
+                           'metrics': metrics}, f, indent=2)
+            os.rename(tmpentry, entry)
+        except OSError as e:
+            # Another task may have stored the same entry first.
+            if not os.path.isdir(entry):
+                self.logger.warning(f'Unable to cache results {key}: {e}')
+            shutil.rmtree(tmpentry, ignore_errors=True)
+            return
+
+        self._task_cache_evict()
+
+    ###########################################################################
+    def _task_cache_evict(self):
+        '''
+        Removes least recently used task cache entries and file digests (see
+        _hash_file()) until the cache fits in [option,cachesize].
+        '''
+        cachesize = self.get('option', 'cachesize')
+        cachedir = self._task_cache_dir()
+        if cachesize is None or not os.path.isdir(cachedir):
+            return
+
+        entries = []
+        total = 0
+        hashdir = os.path.join(cachedir, 'hashes')
+        for root, _, files in os.walk(hashdir):
+            for name in files:
+                entry = os.path.join(root, name)
+                try:
+                    stat = os.stat(entry)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+                total += stat.st_size
+
+        for name in os.listdir(cachedir):
+            entry = os.path.join(cachedir, name)
+            if entry == hashdir:
+                continue
+            try:
+                with open(os.path.join(entry, 'task.json'), 'r') as f:
+                    size = json.load(f)['size']
+                mtime = os.stat(entry).st_mtime
+            except (OSError, ValueError, KeyError):
+                # Partial entries of running tasks.
+                continue
+            entries.append((mtime, size, entry))
+            total += size
+
+        for mtime, size, entry in sorted(entries):
+            if total <= cachesize:
+                break
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(entry)
+            total -= size
+
     ###########################################################################
     def _setup_tool(self, tool, step, index):
         self.set('arg','step', step)
@@ -4406,6 +5607,11 @@ class Chip:
             jobname = self.get('option','jobname')
             tasks_to_run = {}
             processes = {}
+            pooled = {}
+            resources = {}
+            cancel = {}
+            self._task_deltas = {}
+            self._task_deltafiles = set()
             for step in steplist:
                 for index in indexlist[step]:
                     if status[step+index] != TaskStatus.PENDING:
@@ -4422,9 +5628,35 @@ class Chip:
                     else:
                         tasks_to_run[step+index] = inputs
 
-                    processes[step+index] = multiprocessing.Process(target=self._runtask,
-                                                                    args=(step, index, status))
-
+                    if self.get('option', 'workerpool') and self._is_lightweight(flow, step, index):
+                        pooled[step+index] = (step, index)
+                    else:
+                        processes[step+index] = multiprocessing.Process(target=self._runtask,
+                                                                        args=(step, index, status))
+                    resources[step+index] = self._task_resources(flow, step, index)
+
+                    cancelafter = self.get('flowgraph', flow, step, index, 'cancelafter')
+                    if cancelafter is not None and \
+                       self.get('flowgraph', flow, step, index, 'tool') in ('minimum', 'maximum'):
+                        inputs = {}
+                        for in_step, in_index in self.get('flowgraph', flow, step, index, 'input'):
+                            goals = {}
+                            if self.valid('flowgraph', flow, in_step, in_index, 'goal', 'default'):
+                                for metric in self.getkeys('flowgraph', flow, in_step, in_index, 'goal'):
+                                    goal = self.get('flowgraph', flow, in_step, in_index, 'goal', metric)
+                                    if goal is not None:
+                                        goals[metric] = goal
+                            outdir = os.path.join(self._getworkdir(step=in_step, index=in_index),
+                                                  'outputs')
+                            inputs[in_step+in_index] = (
+                                in_step, in_index, goals,
+                                os.path.join(outdir, f"{self.get('design')}.pkg.delta.pkl"),
+                                os.path.join(outdir, f"{self.get('design')}.pkg.json"))
+                        cancel[step+index] = (inputs, cancelafter)
+
+            capacity = self._local_capacity()
+            priority = {step+index: runtime for (step, index), runtime in
+                        self.predict_runtime(flow=flow, steplist=steplist).items()}
 
             # We have to deinit the chip's logger before spawning the processes
             # since the logger object is not serializable. _runtask_safe will
@@ -4432,49 +5664,14 @@ class Chip:
             # the primary chip's logger after the processes complete.
             self._deinit_logger()
 
-            running_tasks = []
-            while len(tasks_to_run) > 0 or len(running_tasks) > 0:
-                # Check for new tasks that can be launched.
-                for task, deps in list(tasks_to_run.items()):
-                    # TODO: breakpoint logic:
-                    # if task is bkpt, then don't launch while len(running_tasks) > 0
-
-                    # Clear any tasks that have finished from dependency list.
-                    for in_task in deps.copy():
-                        if status[in_task] != TaskStatus.PENDING:
-                            deps.remove(in_task)
-
-                    # If there are no dependencies left, launch this task and
-                    # remove from tasks_to_run.
-                    if len(deps) == 0:
-                        processes[task].start()
-                        running_tasks.append(task)
-                        del tasks_to_run[task]
-
-                # Check for situation where we have stuff left to run but don't
-                # have any tasks running. This shouldn't happen, but we will get
-                # stuck in an infinite loop if it does, so we want to break out
-                # with an explicit error.
-                if len(tasks_to_run) > 0 and len(running_tasks) == 0:
-                    self.error('Tasks left to run, but no '
-                        'running tasks. Steplist may be invalid.', fatal=True)
-
-                # Check for completed tasks.
-                # TODO: consider staying in this section of loop until a task
-                # actually completes.
-                for task in running_tasks.copy():
-                    if not processes[task].is_alive():
-                        running_tasks.remove(task)
-                        if processes[task].exitcode > 0:
-                            status[task] = TaskStatus.ERROR
-                        else:
-                            status[task] = TaskStatus.SUCCESS
-
-                # TODO: exponential back-off with max?
-                time.sleep(0.1)
+            cancelled = self._launch_tasks(tasks_to_run, processes, status, resources, capacity,
+                                           priority, pooled, cancel)
 
             self._init_logger()
 
+            for task in sorted(cancelled):
+                self.logger.info(f'Cancelled {task}, a sibling task already met its goals')
+
             # Make a clean exit if one of the steps failed
             for step in steplist:
                 index_succeeded = False
@@ -4511,9 +5708,8 @@ class Chip:
 
                 os.listdir(os.path.dirname(lastdir))
 
-                lastcfg = f"{lastdir}/outputs/{self.get('design')}.pkg.json"
                 if status[step+index] == TaskStatus.SUCCESS:
-                    self._read_manifest(lastcfg, clobber=False, partial=True)
+                    self._merge_task_results(jobname, step, index)
                 else:
                     self.set('flowgraph', flow, step, index, 'status', TaskStatus.ERROR)
 
@@ -4528,6 +5724,479 @@ class Chip:
         filepath =  os.path.join(self._getworkdir(),f"{self.get('design')}.pkg.json")
         self.write_manifest(filepath)
 
+    ###########################################################################
+    def _task_resources(self, flow, step, index):
+        '''
+        Returns the (threads, memory) a task is expected to use on the local
+        host, which is used to decide when the task may be started.
+
+        Threads are taken from the tool's threads parameter. Memory is the
+        largest peak memory recorded for the task by the current job or by any
+        job in the history. Builtins and tasks dispatched to a job scheduler
+        don't use local resources.
+        '''
+
+        tool = self.get('flowgraph', flow, step, index, 'tool')
+        if tool in self.builtin:
+            return (0, 0)
+        if self.get('option', 'jobscheduler') and \
+           self.get('flowgraph', flow, step, index, 'input'):
+            return (0, 0)
+
+        threads = None
+        if tool in self.getkeys('tool') and \
+           step in self.getkeys('tool', tool, 'threads') and \
+           index in self.getkeys('tool', tool, 'threads', step):
+            threads = self.get('tool', tool, 'threads', step, index)
+        if not threads or threads < 1:
+            threads = 1
+
+        memory = 0
+        for job in [None] + self.getkeys('history'):
+            if job is not None and 'metric' not in self.cfg['history'][job]:
+                continue
+            if step in self.getkeys('metric', job=job) and \
+               index in self.getkeys('metric', step, job=job):
+                peak = self.get('metric', step, index, 'memory', job=job)
+                if peak is not None:
+                    memory = max(memory, peak)
+
+        return (threads, memory)
+
+    ###########################################################################
+    def _local_capacity(self):
+        '''
+        Returns the (workers, threads, memory) limits for tasks running at
+        the same time on the local host.
+        '''
+
+        maxworkers = self.get('option', 'maxworkers')
+        maxthreads = self.get('option', 'maxthreads')
+        maxmemory = self.get('option', 'maxmemory')
+
+        if not maxworkers or maxworkers < 1:
+            maxworkers = math.inf
+        if not maxthreads or maxthreads < 1:
+            maxthreads = os.cpu_count() or 1
+        if not maxmemory or maxmemory <= 0:
+            maxmemory = psutil.virtual_memory().total
+
+        return (maxworkers, maxthreads, maxmemory)
+
+    ###########################################################################
+    def _launch_tasks(self, tasks_to_run, processes, status, resources=None, capacity=None,
+                      priority=None, pooled=None, cancel=None):
+        '''
+        Runs task processes as soon as all of their inputs have completed and
+        enough local resources are available.
+
+        Instead of polling, the scheduler keeps a count of unfinished inputs
+        for each task and blocks on the sentinels of the running processes.
+        When a task finishes, the counts of its dependents are decremented and
+        any dependent that reaches zero is queued. Queued tasks are started in
+        order of decreasing priority while the number of running tasks and the
+        threads and memory they use fit within the capacity. A task is always
+        started if nothing else is running, so that oversized tasks still run.
+
+        Pooled tasks are sent to idle workers of a pool of long-lived processes
+        (see _pool_worker()) instead, and the pool is grown when no worker is
+        idle. The manifest changes they send back are stored in _task_deltas.
+
+        Minimum/maximum tasks with a cancellation policy (see
+        [flowgraph,<flow>,<step>,<index>,cancelafter]) get a deadline once one
+        of their inputs completes and meets its goals. When it passes, their
+        inputs that haven't started are dropped and the running ones are
+        terminated, except for pooled tasks, which are short. Cancelled tasks
+        are marked as failed.
+
+        Args:
+            tasks_to_run (dict): Maps each task to the list of tasks it
+                depends on.
+            processes (dict): Maps each task that isn't pooled to its
+                (unstarted) process.
+            status (dict): Maps every task in the flowgraph to its status.
+                Updated in place as tasks complete.
+            resources (dict): Maps each task to the (threads, memory) it is
+                expected to use. Tasks not listed use no resources.
+            capacity (tuple): (workers, threads, memory) limits. No limits
+                if None.
+            priority (dict): Maps each task to its priority, usually the
+                predicted time to the end of the flow. Tasks not listed have
+                priority zero. Ties are started in the order of tasks_to_run.
+            pooled (dict): Maps each task to run in the worker pool to its
+                (step, index).
+            cancel (dict): Maps each minimum/maximum task with a cancellation
+                policy to a (inputs, cancelafter) tuple, where inputs maps
+                each of its input tasks to the arguments of
+                _task_meets_goals().
+
+        Returns:
+            Set of cancelled tasks.
+        '''
+
+        if resources is None:
+            resources = {}
+        if capacity is None:
+            capacity = (math.inf, math.inf, math.inf)
+        if priority is None:
+            priority = {}
+        if pooled is None:
+            pooled = {}
+        if cancel is None:
+            cancel = {}
+        maxworkers, maxthreads, maxmemory = capacity
+
+        # Minimum/maximum tasks each input may start the deadline of
+        groups = {}
+        for task, (inputs, _) in cancel.items():
+            for in_task in inputs:
+                groups.setdefault(in_task, []).append(task)
+        deadlines = {}
+        cancelled = set()
+
+        # Count unfinished inputs for each task, and record which tasks are
+        # waiting on each input.
+        waiting_on = {}
+        dependents = {}
+        for task, deps in tasks_to_run.items():
+            waiting_on[task] = 0
+            for in_task in deps:
+                if status[in_task] == TaskStatus.PENDING:
+                    waiting_on[task] += 1
+                    dependents.setdefault(in_task, []).append(task)
+
+        order = {task: n for n, task in enumerate(tasks_to_run)}
+
+        def enqueue(task):
+            heapq.heappush(ready, (-priority.get(task, 0), order[task], task))
+
+        ready = []
+        for task, count in waiting_on.items():
+            if count == 0:
+                enqueue(task)
+
+        def finish(task):
+            for dep in dependents.get(task, []):
+                if dep not in waiting_on:
+                    # cancelled
+                    continue
+                waiting_on[dep] -= 1
+                if waiting_on[dep] == 0:
+                    enqueue(dep)
+
+        running = {}
+        used_threads = 0
+        used_memory = 0
+        # Connections to the pool workers waiting for a task.
+        idle = []
+        # Maps the connection of each pool worker to its process.
+        workers = {}
+        try:
+            while ready or running:
+                # Cancel the remaining inputs of minimum/maximum tasks whose
+                # deadline passed.
+                now = time.time()
+                for group, deadline in list(deadlines.items()):
+                    if deadline > now:
+                        continue
+                    del deadlines[group]
+                    for in_task in cancel[group][0]:
+                        if in_task in cancelled or status[in_task] != TaskStatus.PENDING:
+                            continue
+                        if in_task in waiting_on:
+                            cancelled.add(in_task)
+                            status[in_task] = TaskStatus.ERROR
+                            del waiting_on[in_task]
+                            finish(in_task)
+                        elif in_task in processes and in_task in running.values():
+                            # Marked as failed when its process exits.
+                            cancelled.add(in_task)
+                            _terminate_tree(processes[in_task])
+
+                # TODO: breakpoint logic:
+                # if task is bkpt, then don't launch while len(running) > 0
+                while ready:
+                    task = ready[0][2]
+                    if task in cancelled:
+                        heapq.heappop(ready)
+                        continue
+                    threads, memory = resources.get(task, (0, 0))
+                    if running and (len(running) >= maxworkers or
+                                    used_threads + threads > maxthreads or
+                                    used_memory + memory > maxmemory):
+                        break
+                    heapq.heappop(ready)
+                    if task in pooled:
+                        if not idle:
+                            conn, worker_conn = multiprocessing.Pipe()
+                            worker = multiprocessing.Process(target=self._pool_worker,
+                                                             args=(worker_conn,))
+                            worker.start()
+                            worker_conn.close()
+                            workers[conn] = worker
+                            idle.append(conn)
+                        conn = idle.pop()
+                        step, index = pooled[task]
+                        # Only the results of the task's inputs are merged.
+                        deltas = {pooled[in_task]: self._task_deltas[pooled[in_task]]
+                                  for in_task in tasks_to_run[task]
+                                  if pooled.get(in_task) in self._task_deltas}
+                        deltafiles = self._task_deltafiles.intersection(tasks_to_run[task])
+                        conn.send((step, index, status, deltas, deltafiles))
+                        running[conn] = task
+                    else:
+                        processes[task].start()
+                        running[processes[task].sentinel] = task
+                    used_threads += threads
+                    used_memory += memory
+                    del waiting_on[task]
+
+                # Check for situation where we have stuff left to run but don't
+                # have any tasks running. This shouldn't happen, but we will get
+                # stuck in an infinite loop if it does, so we want to break out
+                # with an explicit error.
+                if not running:
+                    break
+
+                # Block until at least one running task completes, or the next
+                # cancellation deadline.
+                timeout = None
+                if deadlines:
+                    timeout = max(0, min(deadlines.values()) - time.time())
+                for sentinel in multiprocessing.connection.wait(list(running), timeout=timeout):
+                    task = running.pop(sentinel)
+                    if task in pooled:
+                        try:
+                            exitcode, delta = sentinel.recv()
+                            idle.append(sentinel)
+                        except EOFError:
+                            # The worker died, don't reuse it.
+                            exitcode, delta = 1, None
+                        if delta is not None:
+                            self._task_deltas[pooled[task]] = delta
+                    else:
+                        processes[task].join()
+                        exitcode = processes[task].exitcode
+                    if exitcode > 0 or task in cancelled:
+                        status[task] = TaskStatus.ERROR
+                    else:
+                        status[task] = TaskStatus.SUCCESS
+                        if task not in pooled:
+                            self._task_deltafiles.add(task)
+
+                    threads, memory = resources.get(task, (0, 0))
+                    used_threads -= threads
+                    used_memory -= memory
+
+                    if status[task] == TaskStatus.SUCCESS:
+                        for group in groups.get(task, []):
+                            inputs, cancelafter = cancel[group]
+                            if group not in deadlines and self._task_meets_goals(*inputs[task]):
+                                deadlines[group] = time.time() + cancelafter
+
+                    finish(task)
+        finally:
+            for conn in idle:
+                conn.send(None)
+            # Only non-empty if an exception was raised. The pool workers still
+            # running a task would never receive None, so stop them instead.
+            for conn in running:
+                if conn in workers:
+                    _terminate_tree(workers[conn])
+            for conn, worker in workers.items():
+                worker.join()
+                conn.close()
+
+        if waiting_on:
+            self.error('Tasks left to run, but no '
+                'running tasks. Steplist may be invalid.', fatal=True)
+
+        return cancelled
+
+    ###########################################################################
+    def _is_lightweight(self, flow, step, index):
+        '''
+        Returns whether a task may run in the worker pool, i.e. whether it is
+        a builtin or a tool implemented only as a Python run() function.
+        '''
+
+        if step in self.get('option', 'bkpt'):
+            return False
+        if self.get('option', 'jobscheduler') and \
+           self.get('flowgraph', flow, step, index, 'input'):
+            return False
+
+        tool = self.get('flowgraph', flow, step, index, 'tool')
+        if tool in self.builtin:
+            return True
+        if tool in self.getkeys('tool') and self.get('tool', tool, 'exe'):
+            return False
+        return self.find_function(tool, 'run', 'tools') is not None
+
+    ###########################################################################
+    def _pool_worker(self, conn):
+        '''
+        Runs tasks sent by _launch_tasks() until the connection is closed or
+        None is received.
+
+        Each request is a (step, index, status, deltas, deltafiles) tuple,
+        where deltas and deltafiles replace _task_deltas and _task_deltafiles
+        and only hold the entries of the task's inputs.
+        The task runs against a fresh copy of the manifest the worker was
+        started with, and the worker replies with an (exitcode, delta) tuple,
+        where delta holds the parameters that downstream tasks merge from the
+        task's output manifest (see _task_delta()), or None if the task
+        failed.
+        '''
+
+        cfg = pickle.dumps(self.cfg, protocol=pickle.HIGHEST_PROTOCOL)
+        cwd = os.getcwd()
+        environ = dict(os.environ)
+
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+
+            step, index, status, self._task_deltas, self._task_deltafiles = request
+            self.cfg = pickle.loads(cfg)
+            self._error = False
+            try:
+                self._runtask(step, index, status)
+                exitcode = 0
+            except SystemExit as e:
+                if e.code is None:
+                    exitcode = 0
+                elif isinstance(e.code, int):
+                    exitcode = e.code
+                else:
+                    exitcode = 1
+            except Exception:
+                traceback.print_exc()
+                exitcode = 1
+            finally:
+                os.chdir(cwd)
+                os.environ.clear()
+                os.environ.update(environ)
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+            delta = self._task_delta() if exitcode == 0 else None
+            conn.send((exitcode, delta))
+
+    ###########################################################################
+    def _task_delta(self):
+        '''
+        Returns the part of the pruned manifest that downstream tasks merge
+        with _merge_manifest(partial=True), i.e. the keypaths accepted by
+        _key_may_be_updated().
+        '''
+
+        delta = {'metric': self.cfg['metric'],
+                 'record': self.cfg['record'],
+                 'flowgraph': {},
+                 'tool': {}}
+        for flow, steps in self.cfg['flowgraph'].items():
+            for step, indices in steps.items():
+                for index, params in indices.items():
+                    delta['flowgraph'].setdefault(flow, {}).setdefault(step, {})[index] = {
+                        'select': params['select'],
+                        'status': params['status']}
+        for tool, params in self.cfg['tool'].items():
+            if 'output' in params:
+                delta['tool'][tool] = {'output': params['output']}
+
+        return self._prune(delta)
+
+    ###########################################################################
+    def _merge_task_results(self, job, step, index):
+        '''
+        Merges the keypaths updated by a completed task into the manifest.
+
+        Uses the delta sent back by the worker pool if the task ran in the
+        current run(), then the delta file written next to the task's output
+        manifest if the task ran in the current run() but outside the pool.
+        Falls back to the full output manifest for all other tasks, because
+        their delta files are untrusted pickles.
+        '''
+
+        design = self.get('design')
+        outdir = os.path.join(self._getworkdir(jobname=job, step=step, index=index), 'outputs')
+        deltafile = os.path.join(outdir, f'{design}.pkg.delta.pkl')
+        delta = None
+        if job == self.get('option', 'jobname'):
+            delta = self._task_deltas.get((step, index))
+            if delta is None and step + index in self._task_deltafiles and \
+               os.path.isfile(deltafile):
+                with open(deltafile, 'rb') as f:
+                    delta = pickle.load(f)
+        if delta is None:
+            self._read_manifest(os.path.join(outdir, f'{design}.pkg.json'),
+                                clobber=False, partial=True)
+            return
+
+        self._merge_manifest(delta, clobber=False, partial=True)
+
+    ###########################################################################
+    def _task_meets_goals(self, step, index, goals, deltafile, manifest):
+        '''
+        Returns whether a completed task of the current job meets its goals,
+        a dictionary mapping metrics to goals, based on the metrics in its
+        delta (see _merge_task_results()). If the task didn't run in the
+        worker pool, the delta is read from deltafile, or from the output
+        manifest if the delta file wasn't written by the current run(). A
+        task without goals never meets them.
+
+        Doesn't access the manifest, so it can be called while tasks run.
+        '''
+
+        if not goals:
+            return False
+
+        delta = self._task_deltas.get((step, index))
+        try:
+            if delta is None and step + index in self._task_deltafiles:
+                with open(deltafile, 'rb') as f:
+                    delta = pickle.load(f)
+            elif delta is None:
+                with open(manifest, 'r') as f:
+                    delta = json.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return False
+
+        metrics = delta.get('metric', {}).get(step, {}).get(index, {})
+        for metric, goal in goals.items():
+            real = None
+            if metric in metrics:
+                real = self._getleaf(metrics[metric], ('metric', step, index, metric))
+            if real is None or abs(real) > goal:
+                return False
+        return True
+
+    ###########################################################################
+    def _task_order(self, tasks, dependents):
+        '''
+        Returns tasks in topological order, given a map from each task to the
+        tasks that depend on it. Tasks that are part of a cycle are left out.
+        '''
+
+        indegree = {task: 0 for task in tasks}
+        for task in tasks:
+            for dep in dependents.get(task, []):
+                indegree[dep] += 1
+
+        order = [task for task, count in indegree.items() if count == 0]
+        for task in order:
+            for dep in dependents.get(task, []):
+                indegree[dep] -= 1
+                if indegree[dep] == 0:
+                    order.append(dep)
+
+        return order
+
     ##########################################################################
     def record_history(self):
         '''
@@ -4538,17 +6207,16 @@ class Chip:
         # initialize new dict
         jobname = self.get('option','jobname')
         self.cfg['history'][jobname] = {}
+        self._reset_index('history', jobname)
 
-        # copy in all empty values of scope job
-        allkeys = self.getkeys()
-        for key in allkeys:
+        # copy in all non-empty values of scope job
+        for key in self._keyview('job'):
             # ignore history in case of cumulative history
-            if key[0] != 'history':
-                scope = self.get(*key, field='scope')
-                if not self._keypath_empty(key) and (scope == 'job'):
-                    self._copyparam(self.cfg,
-                                    self.cfg['history'][jobname],
-                                    key)
+            if key[0] != 'history' and not self._keypath_empty(key):
+                self._copyparam(self.cfg,
+                                self.cfg['history'][jobname],
+                                list(key))
+        self._reset_index('history', jobname)
 
     ###########################################################################
     def _copyparam(self, cfgsrc, cfgdst, keypath):
@@ -4771,7 +6439,8 @@ class Chip:
         ok = True
         valuetype = type(value)
         errormsg = ""
-        if (not re.match(r'\[',cfg['type'])) & (valuetype==list):
+        is_list, cfgtype, subtypes = _parse_type(cfg['type'])
+        if (not is_list) & (valuetype==list):
             errormsg = "Value must be scalar."
             ok = False
             # Iterate over list
@@ -4781,14 +6450,11 @@ class Chip:
                 valuelist = value
             else:
                 valuelist = [value]
-                # Make type python compatible
-            cfgtype = re.sub(r'[\[\]]', '', cfg['type'])
             for item in valuelist:
                 valuetype =  type(item)
                 if ((cfgtype != valuetype.__name__) and (item is not None)):
-                    tupletype = re.match(r'\([\w\,]+\)',cfgtype)
                     #TODO: check tuples!
-                    if tupletype:
+                    if subtypes is not None:
                         pass
                     elif cfgtype == 'bool':
                         if not item in ['true', 'false']:
@@ -4814,6 +6480,9 @@ class Chip:
                         errormsg = "Type mismach."
                         ok = False
 
+        if ok:
+            return (ok, errormsg)
+
         # Logger message
         if type(value) == list:
             printvalue = ','.join(map(str, value))
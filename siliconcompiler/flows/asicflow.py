@@ -102,6 +102,7 @@ def setup(chip, flowname='asicflow'):
     # Clear old flowgraph if it exists
     if flowname in chip.getkeys('flowgraph'):
         del chip.cfg['flowgraph'][flowname]
+        chip._reset_index('flowgraph', flowname)
 
     #Remove built in steps where appropriate
     flowpipe = []
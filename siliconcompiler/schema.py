@@ -6,10 +6,32 @@ import re
 import os
 import sys
 import copy as pycopy
+import functools
 import json
 
 SCHEMA_VERSION = '0.9.0'
 
+#############################################################################
+# TYPE PARSING
+#############################################################################
+
+@functools.lru_cache(maxsize=None)
+def _parse_type(sctype):
+    '''Parses a schema type string.
+
+    Returns a tuple (is_list, basetype, subtypes), where basetype is the type
+    string with list brackets stripped and subtypes is a tuple of the element
+    types for tuple types (None otherwise). Results are cached, since the
+    same handful of type strings is parsed on every get()/set().
+    '''
+    is_list = sctype.startswith('[')
+    basetype = sctype.replace('[', '').replace(']', '')
+    if basetype.startswith('('):
+        subtypes = tuple(t.strip() for t in basetype.strip('()').split(','))
+    else:
+        subtypes = None
+    return (is_list, basetype, subtypes)
+
 #############################################################################
 # PARAM DEFINITION
 #############################################################################
@@ -98,6 +120,99 @@ def scparam(cfg,
             cfg['author'] = []
 
 
+# Leaf fields that are only ever replaced, never modified in place, so copies
+# of a schema dictionary can share them with the original.
+_SHARED_FIELDS = frozenset(('type', 'scope', 'require', 'lock', 'switch', 'shorthelp',
+                            'example', 'help', 'notes', 'unit', 'hashalgo', 'copy'))
+
+def _copy_cfg(cfg):
+    '''
+    Returns a copy of a schema dictionary, such as a 'default' subtree.
+
+    Unlike copy.deepcopy(), leaf cells of the copy share their static
+    metadata (help, example, switch, ...) with the original, and only the
+    fields that may be modified in place (value, defvalue, filehash, ...) are
+    copied. The original must not be modified in place afterwards.
+    '''
+
+    copied = {}
+    for key, val in cfg.items():
+        if isinstance(val, dict):
+            copied[key] = _copy_cfg(val)
+        elif isinstance(val, list) and key not in _SHARED_FIELDS:
+            copied[key] = _copy_list(val)
+        else:
+            copied[key] = val
+    return copied
+
+def _copy_list(val):
+    return [_copy_list(item) if isinstance(item, list) else item for item in val]
+
+# Leaf fields that only document a parameter. Chip objects don't carry them,
+# they are looked up in the schema snapshot by keypath (see _schema_doc()).
+_DOC_FIELDS = ('help', 'example', 'shorthelp', 'notes')
+
+# Snapshots of schema_cfg() built by _schema_snapshot(), keyed by
+# SCHEMA_VERSION.
+_SCHEMA_SNAPSHOTS = {}
+
+def _schema_snapshot():
+    '''
+    Returns a (template, docs) tuple built from schema_cfg() once per
+    SCHEMA_VERSION. The template is the schema without documentation fields,
+    docs maps the keypath of each leaf in the template to a dictionary of its
+    documentation fields. Neither must be modified.
+    '''
+    snapshot = _SCHEMA_SNAPSHOTS.get(SCHEMA_VERSION)
+    if snapshot is None:
+        docs = {}
+        template = _split_docs(schema_cfg(), (), docs)
+        snapshot = (template, docs)
+        _SCHEMA_SNAPSHOTS[SCHEMA_VERSION] = snapshot
+    return snapshot
+
+def _split_docs(cfg, keypath, docs):
+    '''
+    Returns a copy of a schema dictionary without documentation fields, and
+    collects those fields into docs by keypath.
+    '''
+    if 'defvalue' in cfg:
+        docs[keypath] = {field: cfg[field] for field in _DOC_FIELDS if field in cfg}
+        return {key: val for key, val in cfg.items() if key not in _DOC_FIELDS}
+    return {key: _split_docs(val, keypath + (key,), docs) for key, val in cfg.items()}
+
+def _schema_template():
+    '''
+    Returns the schema template that is copied with _copy_cfg() to create new
+    Chip configurations. Must not be modified.
+    '''
+    return _schema_snapshot()[0]
+
+def _schema_doc(keypath, field):
+    '''
+    Returns a documentation field of the parameter at keypath, or None if the
+    keypath isn't in the schema. Keys that aren't in the schema are matched
+    against 'default', so keypaths of instantiated parameters are supported.
+    Keypaths into 'history' and 'library' are resolved against the schema
+    of the job or library.
+    '''
+    template, docs = _schema_snapshot()
+
+    if keypath and keypath[0] in ('history', 'library'):
+        keypath = keypath[2:]
+
+    node = template
+    resolved = []
+    for key in keypath:
+        if key not in node:
+            if 'default' not in node:
+                return None
+            key = 'default'
+        node = node[key]
+        resolved.append(key)
+
+    return docs.get(tuple(resolved), {}).get(field)
+
 #############################################################################
 # CHIP CONFIGURATION
 #############################################################################
@@ -1223,6 +1338,41 @@ def schema_flowgraph(cfg, flow='default', step='default', index='default'):
             operation progress has saturated and continued execution has
             a negative return on investment.""")
 
+    scparam(cfg,['flowgraph', flow, step, index, 'errorlimit'],
+            sctype='int',
+            shorthelp="Flowgraph: task error limit",
+            switch="-flowgraph_errorlimit 'flow step 0 <int>'",
+            example=[
+                "cli: -flowgraph_errorlimit 'asicflow route 0 1'",
+                "api:  chip.set('flowgraph','asicflow','route','0','errorlimit', 1)"],
+            schelp="""Number of errors after which a task is aborted, specified
+            on a per step and per index basis. When set, the tool's errors
+            regex (:keypath:`tool, <tool>, regex, <step>, <index>, <suffix>`)
+            is evaluated on the tool's log output while it runs, and once it
+            has matched this many lines the tool is terminated and the task
+            fails right away instead of when the tool exits. This frees the
+            task's resources early when a long running operation is known to
+            have failed. If undefined or 0, tasks are not aborted.""")
+
+    scparam(cfg,['flowgraph', flow, step, index, 'cancelafter'],
+            sctype='float',
+            unit='s',
+            shorthelp="Flowgraph: sibling cancellation delay",
+            switch="-flowgraph_cancelafter 'flow step 0 <float>'",
+            example=[
+                "cli: -flowgraph_cancelafter 'asicflow syn 0 600'",
+                "api:  chip.set('flowgraph','asicflow','syn','0','cancelafter', 600)"],
+            schelp="""Speculative cancellation policy of a minimum or maximum
+            task, specified on a per step and per index basis. When set, once
+            one of the task's inputs has completed and meets all of its goals
+            (:keypath:`flowgraph, <flow>, <step>, <index>, goal, <metric>`),
+            the inputs that are still pending or running after this many
+            more seconds are cancelled, and the task selects among the inputs
+            that completed. A value of 0 cancels the remaining inputs as soon
+            as the first input meeting its goals completes. Inputs without
+            goals never start the cancellation. Cancelled inputs are reported
+            as failed. If undefined, all inputs run to completion.""")
+
     # flowgraph status
     scparam(cfg,['flowgraph', flow, step, index, 'status'],
             sctype='str',
@@ -1387,8 +1537,9 @@ def schema_tool(cfg, tool='default', step='default', index='default'):
             of command line arguments for grep including the regex pattern to
             match. Starting with the first list entry, each grep output is piped
             into the following grep command in the list. Supported grep options
-            include ``-v`` and ``-e``. Patterns starting with "-" should be
-            directly preceeded by the ``-e`` option. The following example
+            include ``-v``, ``-i``, ``-E``, ``-x``, ``-o``, ``-w`` and ``-e``.
+            Patterns are Python regular expressions. Patterns starting with "-"
+            should be directly preceeded by the ``-e`` option. The following example
             illustrates the concept.
 
             UNIX grep:
@@ -1892,7 +2043,70 @@ def schema_metric(cfg, step='default', index='default'):
                 f"api: chip.set('metric','dfm','0','{item}', 10e9)"],
             schelp=f"""
             Metric tracking total peak program memory footprint on a per
-            step and index basis.""")
+            step and index basis. For tool executables, this is the peak
+            memory of the executable and all of its child processes, sampled
+            while the task runs. Memory shared between these processes is
+            counted once: the proportional set size (PSS) of each process is
+            used where available, otherwise its unique set size (USS).""")
+
+    item = 'averagememory'
+    scparam(cfg, ['metric', step, index, item],
+            sctype='float',
+            unit='B',
+            scope='job',
+            shorthelp=f"Metric: {item}",
+            switch=f"-metric_{item} 'step index <float>'",
+            example=[
+                f"cli: -metric_{item} 'dfm 0 10e9'",
+                f"api: chip.set('metric','dfm','0','{item}', 10e9)"],
+            schelp=f"""
+            Metric tracking the time averaged memory of the tool executable
+            and all of its child processes on a per step and index basis,
+            measured like the memory metric.""")
+
+    item = 'cputime'
+    scparam(cfg, ['metric', step, index, item],
+            sctype='float',
+            unit='s',
+            shorthelp=f"Metric: {item}",
+            switch=f"-metric_{item} 'step index <float>'",
+            example=[
+                f"cli: -metric_{item} 'dfm 0 10.0'",
+                f"api: chip.set('metric','dfm','0','{item}', 10.0)"],
+            schelp=f"""
+            Metric tracking the user and system CPU time used by the tool
+            executable and all of its child processes on a per step and index
+            basis. Unlike exetime, this counts the time spent on each core.""")
+
+    metrics = {'diskread': 'read from',
+               'diskwrite': 'written to'}
+
+    for item, val in metrics.items():
+        scparam(cfg, ['metric', step, index, item],
+                sctype='int',
+                unit='B',
+                shorthelp=f"Metric: {item}",
+                switch=f"-metric_{item} 'step index <int>'",
+                example=[
+                    f"cli: -metric_{item} 'dfm 0 1000000'",
+                    f"api: chip.set('metric','dfm','0','{item}', 1000000)"],
+                schelp=f"""
+                Metric tracking the number of bytes {val} storage by the tool
+                executable and all of its child processes on a per step and
+                index basis. Where the operating system doesn't report I/O
+                counters, the metric is not set.""")
+
+    item = 'threads'
+    scparam(cfg, ['metric', step, index, item],
+            sctype='int',
+            shorthelp=f"Metric: {item}",
+            switch=f"-metric_{item} 'step index <int>'",
+            example=[
+                f"cli: -metric_{item} 'dfm 0 8'",
+                f"api: chip.set('metric','dfm','0','{item}', 8)"],
+            schelp=f"""
+            Metric tracking the peak number of threads of the tool executable
+            and all of its child processes on a per step and index basis.""")
 
     item = 'exetime'
     scparam(cfg, ['metric', step, index, item],
@@ -2119,6 +2333,119 @@ def schema_option(cfg):
             must be located in shared storage which can be accessed by all hosts
             in the cluster.""")
 
+    scparam(cfg, ['option', 'maxworkers'],
+            sctype='int',
+            scope='job',
+            shorthelp="Maximum concurrent tasks",
+            switch="-maxworkers <int>",
+            example=[
+                "cli: -maxworkers 4",
+                "api: chip.set('option','maxworkers',4)"],
+            schelp="""
+            Maximum number of flowgraph tasks that are run at the same time.
+            Tasks that are ready to run but exceed the limit are queued and
+            started in critical path first order as running tasks complete.
+            If the parameter is undefined, the number of concurrent tasks is
+            only limited by :keypath:`option, maxthreads` and
+            :keypath:`option, maxmemory`.""")
+
+    scparam(cfg, ['option', 'maxthreads'],
+            sctype='int',
+            scope='job',
+            shorthelp="Maximum concurrent threads",
+            switch="-maxthreads <int>",
+            example=[
+                "cli: -maxthreads 16",
+                "api: chip.set('option','maxthreads',16)"],
+            schelp="""
+            Number of threads that tasks running at the same time on the local
+            host may use in total. Each task is weighted by the thread count in
+            :keypath:`tool, <tool>, threads` (one thread if unset). A task is
+            only started once enough threads are free, unless no other task is
+            running. If the parameter is undefined, the number of CPUs reported
+            by the operating system is used. The limit does not apply to tasks
+            dispatched to a :keypath:`option, jobscheduler`.""")
+
+    scparam(cfg, ['option', 'maxmemory'],
+            sctype='float',
+            unit='B',
+            scope='job',
+            shorthelp="Maximum concurrent memory",
+            switch="-maxmemory <float>",
+            example=[
+                "cli: -maxmemory 64e9",
+                "api: chip.set('option','maxmemory',64e9)"],
+            schelp="""
+            Amount of memory that tasks running at the same time on the local
+            host may use in total. Each task is weighted by the peak memory
+            recorded in :keypath:`metric, <step>, <index>, memory` by the
+            current job or by jobs in the history. Tasks without a recorded
+            peak memory are not limited. A task is only started once enough
+            memory is free, unless no other task is running. If the parameter
+            is undefined, the physical memory of the host is used. The limit
+            does not apply to tasks dispatched to a
+            :keypath:`option, jobscheduler`.""")
+
+    scparam(cfg, ['option', 'workerpool'],
+            sctype='bool',
+            scope='job',
+            shorthelp="Run lightweight tasks in worker pool",
+            switch="-workerpool <bool>",
+            example=[
+                "cli: -workerpool",
+                "api: chip.set('option','workerpool',True)"],
+            schelp="""
+            Runs lightweight tasks in a pool of long-lived worker processes
+            instead of starting a new process for each task. Lightweight tasks
+            are builtins (minimum, maximum, mux, join, verify, nop) and tools
+            implemented only as a Python run() function. The manifest changes
+            made by these tasks are sent back to the scheduler over a pipe
+            and passed on to downstream tasks in memory, so that their output
+            manifests don't need to be read back from disk.""")
+
+    scparam(cfg, ['option', 'cachedir'],
+            sctype='str',
+            scope='job',
+            shorthelp="Task result cache directory",
+            switch="-cachedir <str>",
+            example=[
+                "cli: -cachedir ~/.sc/cache",
+                "api: chip.set('option','cachedir','~/.sc/cache')"],
+            schelp="""
+            Directory of the task result cache. When set, the results of each
+            successful tool task are stored in the cache, keyed by a hash of the
+            tool version, the tool's parameters for the task (with the contents
+            of its scripts), the keypaths listed in
+            :keypath:`tool, <tool>, require` (with the contents of their files)
+            and the contents of the task's input files. A task whose key
+            matches a stored result hard links the cached outputs, reports and
+            logs into its work directory and restores the cached metrics instead
+            of running the tool. Since the key is derived from contents, results
+            are shared between jobs and between copies of a design. Parameters
+            that a tool reads without listing them in its requirements are not
+            part of the key. Cached files are shared through hard links, so
+            tools must not modify their input files in place. The cache also
+            keeps the digests of hashed files, including those of
+            hash_files(), so unchanged files aren't read again. Relative paths
+            are resolved against the directory the chip object was created
+            in.""")
+
+    scparam(cfg, ['option', 'cachesize'],
+            sctype='float',
+            unit='B',
+            scope='job',
+            shorthelp="Task result cache size",
+            switch="-cachesize <float>",
+            example=[
+                "cli: -cachesize 50e9",
+                "api: chip.set('option','cachesize',50e9)"],
+            schelp="""
+            Maximum size of the task result cache in
+            :keypath:`option, cachedir`. When a new result is stored and the
+            cache exceeds this size, the least recently used results and file
+            digests are removed. If the parameter is undefined, the cache is
+            not limited.""")
+
     # Compilation
     scparam(cfg, ['option', 'mode'],
             sctype='str',
@@ -2521,6 +2848,24 @@ def schema_option(cfg):
             being recorded in the manifest so only turn on this feature
             if you have control of the final manifest.""")
 
+    scparam(cfg, ['option', 'telemetry'],
+            sctype='bool',
+            scope='job',
+            shorthelp="Enable resource usage time series",
+            switch="-telemetry <bool>",
+            example=["cli: -telemetry",
+                    "api: chip.set('option','telemetry',True)"],
+            schelp="""
+            Writes a time series of the resource usage of each tool
+            executable and its child processes to reports/telemetry.csv in
+            the task's work directory. Each row holds the time since the
+            start of the executable in seconds, the memory in bytes (see
+            :keypath:`metric, <step>, <index>, memory`), the CPU time in
+            seconds, the bytes read from and written to storage, the number
+            of threads and the number of processes. The totals are always
+            recorded in the memory, averagememory, cputime, diskread,
+            diskwrite and threads metrics.""")
+
     scparam(cfg, ['option', 'trace'],
             sctype='bool',
             scope='job',
@@ -4,13 +4,18 @@ import argparse
 from aiohttp import web
 import asyncio
 import base64
+import collections
+import concurrent.futures
+import functools
 import glob
+import hashlib
 import json
 import logging as log
 import os
 import re
 import subprocess
 import shutil
+import time
 import uuid
 
 from cryptography.hazmat.backends import default_backend
@@ -18,7 +23,227 @@ from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import hashes, serialization
 from siliconcompiler import Chip
+from siliconcompiler import utils
 from siliconcompiler.crypto import decrypt_job, gen_cipher_key
+from siliconcompiler.core import TaskStatus, _digest_file
+
+# Blobs which were used within this many seconds aren't evicted from the blob
+# store, since a job may be about to link them.
+_BLOB_GRACE = 3600
+
+class JobStatus:
+    """
+    Tracks the status of the tasks of a running job, by watching its build
+    directory. Every change is stamped with an increasing version number, so
+    that clients can ask for the changes since the last version they saw.
+
+    """
+
+    ####################
+    def __init__(self, build_dir, design, jobname):
+        self.build_dir = build_dir
+        self.job_dir = os.path.join(build_dir, design, jobname)
+        self.design = design
+        self.digests = {}
+        self.tasks = {}
+        self.version = 0
+        self.done = False
+        self.changed = asyncio.Condition()
+        self.scan_lock = asyncio.Lock()
+
+    ####################
+    async def scan(self, executor=None, final=False):
+        '''
+        Updates the status of every task in the job's directory. A task is
+        running once its directory exists, and has finished once it wrote its
+        output manifest. After the 'final' scan, the job is done, and tasks
+        which are still running failed. The directory is read in 'executor',
+        but the results are applied on the event loop, so that handlers never
+        see a half-updated job. Scans run one at a time. Returns True if
+        anything changed.
+        '''
+
+        async with self.scan_lock:
+            finished = {key for key, task in self.tasks.items()
+                        if task['status'] != 'running'}
+            found = await asyncio.get_event_loop().run_in_executor(
+                executor, self._read_tasks, finished, final)
+
+            changed = False
+            for key, (status, metrics) in found.items():
+                task = self.tasks.get(key)
+                if task and task['status'] == status:
+                    continue
+                self.version += 1
+                self.tasks[key] = {
+                    'step': key[0],
+                    'index': key[1],
+                    'status': status,
+                    'metrics': metrics,
+                    'version': self.version,
+                }
+                changed = True
+            if final:
+                self.done = True
+            return changed
+
+    ####################
+    def _read_tasks(self, finished, final):
+        # Reads the status and metrics of the tasks which haven't 'finished'.
+        # This blocks, and doesn't touch the job's state.
+        found = {}
+        if not os.path.isdir(self.job_dir):
+            return found
+
+        for step in sorted(os.listdir(self.job_dir)):
+            step_dir = os.path.join(self.job_dir, step)
+            if not os.path.isdir(step_dir):
+                continue
+            for index in sorted(os.listdir(step_dir)):
+                if (step, index) in finished:
+                    continue
+                manifest = os.path.join(step_dir, index, 'outputs', f'{self.design}.pkg.json')
+                if os.path.isfile(manifest):
+                    status, metrics = self._read_manifest(manifest, step, index)
+                else:
+                    status, metrics = 'running', {}
+                if final and status == 'running':
+                    status = TaskStatus.ERROR
+                found[(step, index)] = (status, metrics)
+
+        return found
+
+    ####################
+    def _read_manifest(self, manifest, step, index):
+        try:
+            with open(manifest, 'r') as f:
+                cfg = json.load(f)
+            flow = cfg['option']['flow']['value']
+            status = cfg['flowgraph'][flow][step][index]['status']['value']
+            metrics = {}
+            for metric, param in cfg['metric'][step][index].items():
+                if param['value'] is not None:
+                    metrics[metric] = param['value']
+            return status, metrics
+        except (OSError, ValueError, KeyError):
+            # The manifest is still being written; pick it up on the next scan.
+            return 'running', {}
+
+    ####################
+    def changes(self, version):
+        '''
+        Returns the tasks whose status changed after the given version.
+        '''
+
+        return [task for task in self.tasks.values() if task['version'] > version]
+
+    ####################
+    def files(self, step=None, index=None):
+        '''
+        Returns the path, size and sha256 digest of the files of a task, or of
+        the whole job if no task is given. Paths are relative to the build
+        directory. Digests are cached until a file changes. This blocks while
+        files are hashed, so it should be run in an executor.
+        '''
+
+        if step is None:
+            top = self.build_dir
+        else:
+            top = os.path.join(self.job_dir, step, index)
+
+        files = []
+        for root, dirs, names in os.walk(top):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if os.path.islink(path):
+                    continue
+                stat = os.stat(path)
+                fileid = (stat.st_size, stat.st_mtime_ns)
+                cached = self.digests.get(path)
+                if not cached or cached[0] != fileid:
+                    cached = (fileid, _digest_file(path, 'sha256'))
+                    self.digests[path] = cached
+                files.append({
+                    'path': os.path.relpath(path, self.build_dir).replace(os.sep, '/'),
+                    'size': stat.st_size,
+                    'digest': cached[1],
+                })
+        return files
+
+    def file_path(self, path):
+        '''
+        Returns the real path of a file of the job, given its path relative
+        to the build directory, or None if there is no such file. Symlinks,
+        including those of parent directories, may only lead to files within
+        the build directory.
+        '''
+
+        build_dir = os.path.realpath(self.build_dir)
+        path = os.path.realpath(os.path.join(build_dir, path))
+        if os.path.commonpath([path, build_dir]) != build_dir:
+            return None
+        if not os.path.isfile(path):
+            return None
+        return path
+
+class JobQueue:
+    """
+    Queue of jobs waiting for one of a limited number of slots to run in.
+    Users take turns, so that a user who submits many jobs can't hold up
+    everyone else: the next job to start is the oldest job of the user who
+    is next in the rotation, and that user then goes to the back of it.
+
+    """
+
+    ####################
+    def __init__(self, maxjobs):
+        self.maxjobs = maxjobs
+        self.running = set()
+        self.pending = collections.OrderedDict()
+        self.changed = asyncio.Condition()
+
+    ####################
+    def push(self, username, job_key, start):
+        '''
+        Queues a job of a user. 'start' returns the coroutine which runs it.
+        '''
+
+        self.pending.setdefault(username, collections.deque()).append((job_key, start))
+
+    ####################
+    def pop(self):
+        '''
+        Returns the key and start function of the next job to run, and counts
+        it as running. Returns None if no job can start yet.
+        '''
+
+        if (len(self.running) >= self.maxjobs) or (not self.pending):
+            return None
+        username, jobs = self.pending.popitem(last=False)
+        job_key, start = jobs.popleft()
+        if jobs:
+            self.pending[username] = jobs
+        self.running.add(job_key)
+        return job_key, start
+
+    ####################
+    def position(self, job_key):
+        '''
+        Returns the 1-based position of a job in the queue, or None if it
+        isn't queued.
+        '''
+
+        # Users take turns in the order of the rotation.
+        queues = list(self.pending.values())
+        position = 0
+        for i in range(max([len(jobs) for jobs in queues], default=0)):
+            for jobs in queues:
+                if i < len(jobs):
+                    position += 1
+                    if jobs[i][0] == job_key:
+                        return position
+        return None
 
 class Server:
     """
@@ -52,6 +277,20 @@ class Server:
 
         # Set up a dictionary to track running jobs.
         self.sc_jobs = {}
+        # Set up a dictionary to track the task status of jobs, by job key.
+        self.sc_status = {}
+
+        # Jobs wait in a queue for one of 'maxjobs' slots. Blocking work,
+        # such as file operations and local slurm submissions, runs in an
+        # executor, which keeps the event loop responsive.
+        maxjobs = int(self.cfg['maxjobs']['value'][-1])
+        self.queue = JobQueue(maxjobs)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=maxjobs + (os.cpu_count() or 1) + 4)
+        # Size of the blobs in the blob store in bytes, which is found when
+        # it's first used, and the space reserved by uploads in progress.
+        self.blob_store_size = None
+        self.blob_reserved = 0
 
         # If authentication is enabled, try connecting to the SQLite3 database.
         # (An empty one will be created if it does not exist.)
@@ -83,8 +322,14 @@ class Server:
         self.app.add_routes([
             web.post('/remote_run/', self.handle_remote_run),
             web.post('/check_progress/', self.handle_check_progress),
+            web.post('/job_status/', self.handle_job_status),
+            web.post('/job_files/', self.handle_job_files),
+            web.post('/job_file/', self.handle_job_file),
             web.post('/delete_job/', self.handle_delete_job),
             web.post('/get_results/{job_hash}.tar.gz', self.handle_get_results),
+            web.post('/upload/{job_hash}', self.handle_upload),
+            web.post('/missing_blobs/', self.handle_missing_blobs),
+            web.post('/blob/{digest}', self.handle_blob),
         ])
         # TODO: Put zip files in a different directory.
         # For security reasons, this is not a good public-facing solution.
@@ -116,12 +361,15 @@ class Server:
             # Save the initial 'import' step archive. Note: production server
             # implementations may want to encrypt data before storing it on disk.
             if part.name == 'import':
-                with open(tmp_file, 'wb') as f:
+                f = await self.run_blocking(open, tmp_file, 'wb')
+                try:
                     while True:
-                        chunk = await part.read_chunk()
+                        chunk = await part.read_chunk(1024 * 1024)
                         if not chunk:
                             break
-                        f.write(chunk)
+                        await self.run_blocking(f.write, chunk)
+                finally:
+                    await self.run_blocking(f.close)
 
             # Retrieve JSON request parameters.
             elif part.name == 'params':
@@ -136,6 +384,7 @@ class Server:
         job_hash = job_params['job_hash']
         if not re.match("^[0-9A-Za-z]{32}$", job_hash):
             return web.Response(text="Error: invalid job hash.")
+
         # Check for authentication parameters.
         use_auth = False
         if ('username' in job_params) or ('key' in job_params):
@@ -156,21 +405,125 @@ class Server:
                 return web.Response(text="Error: authentication parameters were passed in, but this server does not support that feature.", status=500)
 
         # Create a dummy Chip object to make schema traversal easier.
-        chip = Chip(cfg['design']['value'])
+        chip = await self.run_blocking(Chip, cfg['design']['value'])
         chip.cfg = cfg
 
+        # Fetch some common values.
+        job_nameid = f"{chip.get('option', 'jobname')}"
+        chip.status['jobhash'] = job_hash
+
+        # Set up the job's directory.
+        error = await self.run_blocking(self.setup_job, chip, job_params, tmp_file,
+                                        username if use_auth else None)
+        if error:
+            return web.Response(text=error, status=400)
+
+        # Remove 'remote' JSON config value to run locally on compute node.
+        chip.set('option', 'remote', False, clobber=True)
+        chip.set('option', 'credentials', '', clobber=True)
+
+        # Queue the job with the configured clustering option. (Non-blocking)
+        if use_auth:
+            job_key = f'{username}{job_hash}_{job_nameid}'
+            start = functools.partial(self.remote_sc_auth,
+                                      chip,
+                                      username,
+                                      self.user_keys[username]['priv_key'])
+        else:
+            username = ''
+            job_key = f'{job_hash}_{job_nameid}'
+            start = functools.partial(self.remote_sc, chip)
+        position = await self.queue_job(username, job_key, start)
+
+        # Return a response to the client.
+        if position:
+            response_text = f"Queued job: {job_hash} (position {position})"
+        else:
+            response_text = f"Starting job: {job_hash}"
+        return web.Response(text=response_text)
+
+    ####################
+    async def queue_job(self, username, job_key, start):
+        '''
+        Adds a job to the queue, and starts it if there is a free slot.
+        Returns its position in the queue, or None if it started.
+        '''
+
+        self.sc_jobs[job_key] = 'queued'
+        self.queue.push(username, job_key, start)
+        await self.start_jobs()
+        return self.queue.position(job_key)
+
+    ####################
+    async def start_jobs(self):
+        '''
+        Starts queued jobs while there are free slots, and wakes up the
+        clients waiting for their queue position to change.
+        '''
+
+        while True:
+            job = self.queue.pop()
+            if not job:
+                break
+            asyncio.ensure_future(self.run_job(*job))
+        async with self.queue.changed:
+            self.queue.changed.notify_all()
+
+    ####################
+    async def run_job(self, job_key, start):
+        '''
+        Async method which runs a job taken from the queue, then frees its
+        slot for the next one.
+        '''
+
+        try:
+            await start()
+        except Exception:
+            self.logger.exception(f"Job {job_key} failed.")
+            # Don't leave clients waiting for the job.
+            self.sc_jobs.pop(job_key, None)
+            if job_key in self.sc_status:
+                await self.finish_job(job_key)
+        finally:
+            self.queue.running.discard(job_key)
+            await self.start_jobs()
+
+    ####################
+    async def run_blocking(self, func, *args, **kwargs):
+        '''
+        Runs a blocking function in the executor, so that it doesn't hold up
+        the event loop, and returns its result.
+        '''
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    ####################
+    def setup_job(self, chip, job_params, tmp_file, username):
+        '''
+        Helper method to create the directory of a job which is about to be
+        queued, from the uploaded archive or the blob store. The archive is
+        encrypted instead for jobs of authenticated users. This blocks, so it
+        should be run in the executor. Returns an error message if the job
+        can't be set up.
+        '''
+
         # Fetch some common values.
         design = chip.get('design')
         job_name = chip.get('option', 'jobname')
-        job_nameid = f'{job_name}'
-        chip.status['jobhash'] = job_hash
+        job_hash = chip.status['jobhash']
 
         # Ensure that the job's root directory exists.
         job_root = f"{self.cfg['nfsmount']['value'][-1]}/{job_hash}"
         job_dir  = f"{job_root}/{design}/{job_name}"
-        subprocess.run(['mkdir', '-p', job_dir])
+        os.makedirs(job_dir, exist_ok=True)
 
-        if use_auth:
+        # Use the archive uploaded in chunks if it wasn't sent as a part.
+        upload_file = self.upload_path(job_hash, username)
+        if (not os.path.exists(tmp_file)) and os.path.exists(upload_file):
+            os.replace(upload_file, tmp_file)
+
+        if username:
             # Create a new AES block cipher key, and an IV for the import step.
             decrypt_key = serialization.load_ssh_private_key(self.user_keys[username]['priv_key'].encode(), None, backend=default_backend())
             gen_cipher_key(job_dir, self.user_keys[username]['pub_key'], pubk_type='str')
@@ -197,6 +550,11 @@ class Server:
                             break
                         wf.write(encryptor.update(chunk))
                     wf.write(encryptor.finalize())
+        elif 'files' in job_params:
+            # Link the job's files in from the blob store.
+            error = self.link_blobs(job_params['files'], job_dir)
+            if error:
+                return error
         else:
             # Move the uploaded archive and un-zip it.
             # (Contents will be encrypted for authenticated jobs)
@@ -214,30 +572,289 @@ class Server:
         job_nameid = f"{chip.get('option', 'jobname')}"
 
         # Create the working directory for the given 'job hash' if necessary.
-        subprocess.run(['mkdir', '-p', jobs_dir])
         chip.set('option', 'builddir', build_dir, clobber=True)
         # Link to the 'import' directory if necessary.
-        subprocess.run(['mkdir', '-p', '%s/%s'%(jobs_dir, job_nameid)])
+        os.makedirs('%s/%s'%(jobs_dir, job_nameid), exist_ok=True)
         #subprocess.run(['ln', '-s', '%s/import0'%build_dir, '%s/%s/import0'%(jobs_dir, job_nameid)])
 
-        # Remove 'remote' JSON config value to run locally on compute node.
-        chip.set('option', 'remote', False, clobber=True)
-        chip.set('option', 'credentials', '', clobber=True)
-
         # Write JSON config to shared compute storage.
-        subprocess.run(['mkdir', '-p', '%s/configs'%build_dir])
+        os.makedirs('%s/configs'%build_dir, exist_ok=True)
 
-        # Run the job with the configured clustering option. (Non-blocking)
-        if use_auth:
-            asyncio.ensure_future(self.remote_sc_auth(chip,
-                                                      username,
-                                                      self.user_keys[username]['priv_key']))
-        else:
-            asyncio.ensure_future(self.remote_sc(chip))
+        return None
 
-        # Return a response to the client.
-        response_text = f"Starting job: {job_hash}"
-        return web.Response(text=response_text)
+    ####################
+    async def handle_upload(self, request):
+        '''
+        API handler for 'upload' requests, which receive a job's import
+        archive in chunks before the job is started with 'remote_run'.
+        The request's 'params' part comes first; the 'chunk' part after it
+        is written at the params' 'offset', and the response reports how
+        much of the archive has been received. A request without an offset
+        only queries this, which lets clients resume an interrupted upload.
+        '''
+
+        job_hash = request.match_info.get('job_hash', None)
+        if (not job_hash) or (not re.match("^[0-9A-Za-z]{32}$", job_hash)):
+            return web.Response(text="Error: invalid job hash.", status=400)
+
+        # Authenticate the user before anything is written.
+        reader = await request.multipart()
+        part = await reader.next()
+        if (part is None) or (part.name != 'params'):
+            return web.Response(text="Error: no upload parameters provided.", status=400)
+        params = await part.json()
+        error = self.check_auth(params)
+        if error:
+            return error
+
+        upload_file = self.upload_path(job_hash, params.get('username', None))
+        size = 0
+        if await self.run_blocking(os.path.exists, upload_file):
+            size = await self.run_blocking(os.path.getsize, upload_file)
+
+        if params.get('offset', None) is not None:
+            offset = int(params['offset'])
+            if offset > size:
+                return web.json_response({'offset': size}, status=409)
+            part = await reader.next()
+            if (part is None) or (part.name != 'chunk'):
+                return web.Response(text="Error: no chunk provided.", status=400)
+            maxupload = int(self.cfg['maxupload']['value'][-1])
+            # Writing at offset 0 starts a new upload.
+            f = await self.run_blocking(open, upload_file, 'r+b' if size else 'wb')
+            try:
+                await self.run_blocking(f.seek, offset)
+                await self.run_blocking(f.truncate)
+                while True:
+                    chunk = await part.read_chunk(1024 * 1024)
+                    if not chunk:
+                        break
+                    if f.tell() + len(chunk) > maxupload:
+                        await self.run_blocking(f.truncate, offset)
+                        return web.Response(text="Error: upload is too large.", status=413)
+                    await self.run_blocking(f.write, chunk)
+                size = f.tell()
+            finally:
+                await self.run_blocking(f.close)
+
+        return web.json_response({'offset': size})
+
+    ####################
+    def upload_path(self, job_hash, username):
+        '''
+        Returns the path which the import archive of a job is uploaded to.
+        Authenticated users' uploads are kept apart, so that other users
+        can't replace them.
+        '''
+
+        nfs_mount = self.cfg['nfsmount']['value'][-1]
+        if username:
+            return f"{nfs_mount}/{job_hash}.{username.encode().hex()}.upload"
+        return f"{nfs_mount}/{job_hash}.upload"
+
+    ####################
+    async def handle_missing_blobs(self, request):
+        '''
+        API handler for 'missing_blobs' requests. Given the sha256 'digests'
+        of the files of a job, responds with the ones which are 'missing'
+        from the blob store. Clients only upload those with 'blob', and
+        describe the job's files by digest in their 'remote_run' request.
+        The blob store is shared by everyone, so servers with authentication
+        don't have one; their jobs are uploaded as archives and encrypted.
+        '''
+
+        if self.cfg['auth']['value'][-1]:
+            return web.Response(text="Error: this server has no blob store.", status=404)
+
+        params = await request.json()
+        error = self.check_auth(params)
+        if error:
+            return error
+        digests = params.get('digests', [])
+        for digest in digests:
+            if not re.match("^[0-9a-f]{64}$", digest):
+                return web.Response(text="Error: invalid digest.", status=400)
+
+        def find_missing():
+            missing = []
+            for digest in digests:
+                try:
+                    # Blobs which are about to be used are kept by eviction.
+                    os.utime(self.blob_path(digest))
+                except OSError:
+                    missing.append(digest)
+            return missing
+
+        missing = await self.run_blocking(find_missing)
+        return web.json_response({'missing': missing})
+
+    ####################
+    async def handle_blob(self, request):
+        '''
+        API handler for 'blob' requests, which add the file in the request
+        body to the blob store. The file is only stored if its contents match
+        the digest in the URL, and it is stored read-only, since jobs link to
+        it. Files larger than 'maxupload' are rejected, as are files which
+        don't fit in the 'maxblobstore' limit after unused blobs are evicted.
+        '''
+
+        if self.cfg['auth']['value'][-1]:
+            return web.Response(text="Error: this server has no blob store.", status=404)
+
+        digest = request.match_info.get('digest', None)
+        if (not digest) or (not re.match("^[0-9a-f]{64}$", digest)):
+            return web.Response(text="Error: invalid digest.", status=400)
+
+        maxupload = int(self.cfg['maxupload']['value'][-1])
+        size = request.content_length or 0
+        if size > maxupload:
+            return web.Response(text="Error: upload is too large.", status=413)
+        if not await self.reserve_blob_space(size):
+            return web.Response(text="Error: the blob store is full.", status=507)
+
+        blob = self.blob_path(digest)
+        tmp_file = f'{blob}.{uuid.uuid4().hex}.tmp'
+        hashobj = hashlib.sha256()
+        written = 0
+        stored = 0
+        try:
+            await self.run_blocking(os.makedirs, os.path.dirname(blob), exist_ok=True)
+            f = await self.run_blocking(open, tmp_file, 'wb')
+            try:
+                async for chunk in request.content.iter_chunked(1024 * 1024):
+                    written += len(chunk)
+                    if written > maxupload:
+                        return web.Response(text="Error: upload is too large.", status=413)
+                    hashobj.update(chunk)
+                    await self.run_blocking(f.write, chunk)
+            finally:
+                await self.run_blocking(f.close)
+            if hashobj.hexdigest() != digest:
+                return web.Response(text="Error: contents don't match the digest.", status=400)
+            await self.run_blocking(os.chmod, tmp_file, 0o444)
+            try:
+                # The blob may have been stored by a concurrent upload, with
+                # the same contents; it's kept, and only counted once.
+                await self.run_blocking(os.link, tmp_file, blob)
+                stored = written
+            except FileExistsError:
+                pass
+        finally:
+            # Account for what was actually stored, rather than the estimate.
+            self.blob_reserved -= size
+            self.blob_store_size += stored
+            if await self.run_blocking(os.path.exists, tmp_file):
+                await self.run_blocking(os.remove, tmp_file)
+
+        return web.json_response({'digest': digest})
+
+    ####################
+    async def reserve_blob_space(self, size):
+        '''
+        Helper method to make room for 'size' more bytes in the blob store,
+        evicting unused blobs if needed. Returns whether the space was
+        reserved; it's released by the caller once the blob is stored.
+        '''
+
+        limit = int(self.cfg['maxblobstore']['value'][-1]) - self.blob_reserved - size
+        if (self.blob_store_size is None) or (self.blob_store_size > limit):
+            self.blob_store_size = await self.run_blocking(self.evict_blobs, limit)
+        # Other uploads may have reserved space while blobs were evicted.
+        if self.blob_store_size + self.blob_reserved + size > \
+           int(self.cfg['maxblobstore']['value'][-1]):
+            return False
+        self.blob_reserved += size
+        return True
+
+    ####################
+    def evict_blobs(self, limit):
+        '''
+        Helper method to remove blobs which no job links to, least recently
+        used first, until the blobs take at most 'limit' bytes. Blobs used
+        within the last _BLOB_GRACE seconds are kept, and uploads in progress
+        aren't counted, since their space is reserved. This blocks, so it
+        should be run in the executor. Returns the size of the blobs in bytes.
+        '''
+
+        total = 0
+        unused = []
+        now = time.time()
+        store = os.path.join(self.cfg['nfsmount']['value'][-1], 'blobs')
+        for root, _, names in os.walk(store):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # Uploads in progress are temporary files.
+                if name.endswith('.tmp'):
+                    continue
+                total += stat.st_size
+                if (stat.st_nlink == 1) and (now - stat.st_mtime > _BLOB_GRACE):
+                    unused.append((stat.st_mtime, stat.st_size, path))
+
+        for _, size, path in sorted(unused):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+    ####################
+    def blob_path(self, digest):
+        '''
+        Returns the path of a file in the blob store, given its sha256 digest.
+        '''
+
+        return os.path.join(self.cfg['nfsmount']['value'][-1], 'blobs', digest[:2], digest)
+
+    ####################
+    def link_blobs(self, files, job_dir):
+        '''
+        Helper method to create a job's files in 'job_dir' from the blob
+        store. Each file has a 'path' relative to the job directory, the
+        'digest' of its contents and its permission 'mode'. Blobs are checked
+        against their digest before they're used. The files of tasks are
+        hard links to the read-only blobs, so that a tool can't change a blob
+        by writing to its input in place. Files which the run may write, such
+        as the job's manifest, and executables are copied instead. Returns an
+        error message if a file can't be created.
+        '''
+
+        for entry in files:
+            digest = entry.get('digest', '')
+            if not re.match("^[0-9a-f]{64}$", digest):
+                return "Error: invalid digest."
+            path = os.path.normpath(entry.get('path', ''))
+            if os.path.isabs(path) or path.split(os.sep)[0] in ('..', '.'):
+                return "Error: invalid path."
+            blob = self.blob_path(digest)
+            if not os.path.isfile(blob):
+                return f"Error: missing blob for {entry['path']}."
+            if _digest_file(blob, 'sha256') != digest:
+                # Drop the damaged blob, so that the client uploads it again.
+                os.remove(blob)
+                return f"Error: missing blob for {entry['path']}."
+            os.utime(blob)
+
+            dst = os.path.join(job_dir, path)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if os.path.lexists(dst):
+                os.remove(dst)
+            mode = entry.get('mode', None)
+            # Task files are at '<step>/<index>/...' in the job directory.
+            in_task = len(path.split(os.sep)) > 2
+            if in_task and ((mode is None) or not (mode & 0o111)):
+                utils.link_or_copy(blob, dst)
+            else:
+                shutil.copyfile(blob, dst)
+                os.chmod(dst, 0o644 if mode is None else mode)
+
+        return None
 
     ####################
     async def handle_get_results(self, request):
@@ -270,19 +887,45 @@ class Server:
             else:
                 return web.Response(text="Error: authentication parameters were passed in, but this server does not support that feature.", status=500)
 
+        zipfn = os.path.join(self.cfg['nfsmount']['value'][-1], job_hash+'.tar.gz')
+        if not await self.run_blocking(os.path.isfile, zipfn):
+            return web.Response(text="Error: no results found.", status=404)
+        size = await self.run_blocking(os.path.getsize, zipfn)
+
+        # Honor Range requests, so that clients can resume a download.
+        try:
+            start = request.http_range.start or 0
+        except ValueError:
+            start = 0
+        if start < 0:
+            start = max(size + start, 0)
+        start = min(start, size)
+
+        headers = {
+            'Content-Type': 'application/x-tar',
+            'Content-Disposition': f'attachment; filename="{job_hash}.tar.gz"',
+            'Accept-Ranges': 'bytes',
+        }
+        if start:
+            headers['Content-Range'] = f'bytes {start}-{size - 1}/{size}'
         resp = web.StreamResponse(
-            status = 200,
-            reason = 'OK',
-            headers = {
-                'Content-Type': 'application/x-tar',
-                'Content-Disposition': f'attachment; filename="{job_hash}.tar.gz"'
-            },
+            status = 206 if start else 200,
+            headers = headers,
         )
+        resp.content_length = size - start
         await resp.prepare(request)
 
-        zipfn = os.path.join(self.cfg['nfsmount']['value'][-1], job_hash+'.tar.gz')
-        with open(zipfn, 'rb') as zipf:
-            await resp.write(zipf.read())
+        # Stream the archive in chunks rather than reading it into memory.
+        zipf = await self.run_blocking(open, zipfn, 'rb')
+        try:
+            await self.run_blocking(zipf.seek, start)
+            while True:
+                chunk = await self.run_blocking(zipf.read, 1024 * 1024)
+                if not chunk:
+                    break
+                await resp.write(chunk)
+        finally:
+            await self.run_blocking(zipf.close)
 
         await resp.write_eof()
         return resp
@@ -331,15 +974,29 @@ class Server:
         # good access control and security policies for a public-facing service.
         if not '..' in job_hash:
           build_dir = '%s/%s'%(self.cfg['nfsmount']['value'][0], job_hash)
-          if os.path.exists(build_dir):
-            #print('Deleting: %s'%build_dir)
-            shutil.rmtree(build_dir)
-          if os.path.exists('%s.tar.gz'%build_dir):
-            #print('Deleting: %s.tar.gz'%build_dir)
-            os.remove('%s.tar.gz'%build_dir)
+          upload_file = self.upload_path(job_hash, username if use_auth else None)
+          await self.run_blocking(self.delete_job_files, build_dir, upload_file)
+        for job in [job for job in self.sc_status if job_hash in job]:
+          self.sc_status.pop(job)
 
         return web.Response(text="Job deleted.")
 
+    ####################
+    def delete_job_files(self, build_dir, upload_file):
+        '''
+        Helper method to delete the build directory and archives of a job.
+        This blocks, so it should be run in the executor.
+        '''
+
+        if os.path.exists(build_dir):
+          #print('Deleting: %s'%build_dir)
+          shutil.rmtree(build_dir)
+        if os.path.exists('%s.tar.gz'%build_dir):
+          #print('Deleting: %s.tar.gz'%build_dir)
+          os.remove('%s.tar.gz'%build_dir)
+        if os.path.exists(upload_file):
+          os.remove(upload_file)
+
     ####################
     async def handle_check_progress(self, request):
         '''
@@ -380,12 +1037,235 @@ class Server:
             else:
                 return web.Response(text="Error: authentication parameters were passed in, but this server does not support that feature.", status=500)
 
-        # Determine if the job is running.
-        if "%s%s_%s"%(username, job_hash, jobid) in self.sc_jobs:
+        # Determine if the job is queued or running.
+        job_key = "%s%s_%s"%(username, job_hash, jobid)
+        position = self.queue.position(job_key)
+        if position:
+            return web.Response(text=f"Job is queued at position {position}.")
+        if job_key in self.sc_jobs:
             return web.Response(text="Job is currently running on the cluster.")
         else:
             return web.Response(text="Job has no running steps.")
 
+    ####################
+    async def handle_job_status(self, request):
+        '''
+        API handler for the 'job_status' endpoint. This is a long poll: the
+        response is sent as soon as the status of a task changed after the
+        'version' the client passed in, or the job finished, or 'timeout'
+        seconds passed. While the job is queued, it is sent as soon as the
+        job's position differs from the client's 'queue_position'. It
+        reports whether the job is still busy, the latest version, and the
+        step, index, status and metrics of every task which changed since
+        the client's version.
+        '''
+
+        # Retrieve the JSON parameters.
+        params = await request.json()
+        if not 'job_hash' in params:
+            return web.Response(text="Error: no job hash provided.")
+        job_hash = params['job_hash']
+        if not 'job_id' in params:
+            return web.Response(text="Error: no job ID provided.")
+        jobid = params['job_id']
+        username = ''
+        if 'username' in params:
+            username = params['username']
+        version = int(params.get('version', 0))
+        timeout = min(float(params.get('timeout', 30)), 60)
+
+        # Check for authentication parameters.
+        error = self.check_auth(params)
+        if error:
+            return error
+
+        # Queued jobs report their position once it differs from the one
+        # the client knows.
+        job_key = f"{username}{job_hash}_{jobid}"
+        known_position = params.get('queue_position', None)
+        position = self.queue.position(job_key)
+        if position:
+            async with self.queue.changed:
+                try:
+                    await asyncio.wait_for(
+                        self.queue.changed.wait_for(
+                            lambda: self.queue.position(job_key) != known_position),
+                        timeout)
+                except asyncio.TimeoutError:
+                    pass
+            position = self.queue.position(job_key)
+            if position:
+                return web.json_response({
+                    'busy': True,
+                    'version': version,
+                    'tasks': [],
+                    'queue_position': position,
+                })
+
+        job = self.sc_status.get(job_key)
+        if not job:
+            # The job may be about to start.
+            return web.json_response({
+                'busy': job_key in self.sc_jobs,
+                'version': version,
+                'tasks': [],
+                'queue_position': None,
+            })
+
+        async with job.changed:
+            try:
+                await asyncio.wait_for(
+                    job.changed.wait_for(lambda: job.done or job.version > version),
+                    timeout)
+            except asyncio.TimeoutError:
+                pass
+            return web.json_response({
+                'busy': not job.done,
+                'version': job.version,
+                'tasks': job.changes(version),
+                'queue_position': None,
+            })
+
+    ####################
+    async def handle_job_files(self, request):
+        '''
+        API handler for the 'job_files' endpoint, which lists the path, size
+        and sha256 digest of the files of a finished task, or of the whole
+        job if no step and index are given. Clients compare the digests with
+        their local copies, and only fetch the files which differ using
+        'job_file', while the rest of the job keeps running.
+        '''
+
+        # Retrieve the JSON parameters.
+        params = await request.json()
+        job = self.find_job(params)
+        if isinstance(job, web.Response):
+            return job
+
+        step = params.get('step', None)
+        index = params.get('index', None)
+        if step is not None:
+            task = job.tasks.get((step, index))
+            if not task:
+                return web.Response(text="Error: task not found.", status=404)
+            if task['status'] == 'running':
+                return web.Response(text="Error: task is still running.", status=409)
+
+        files = await self.run_blocking(job.files, step, index)
+        return web.json_response({'files': files})
+
+    ####################
+    async def handle_job_file(self, request):
+        '''
+        API handler for the 'job_file' endpoint, which streams one file of a
+        job, given its path relative to the build directory. Range requests
+        are supported.
+        '''
+
+        # Retrieve the JSON parameters.
+        params = await request.json()
+        job = self.find_job(params)
+        if isinstance(job, web.Response):
+            return job
+
+        path = os.path.normpath(params.get('path', ''))
+        if os.path.isabs(path) or path.split(os.sep)[0] in ('..', '.'):
+            return web.Response(text="Error: invalid path.", status=400)
+        path = job.file_path(path)
+        if not path:
+            return web.Response(text="Error: file not found.", status=404)
+
+        return web.FileResponse(path)
+
+    ####################
+    def find_job(self, params):
+        '''
+        Helper method to look up the status of the job given by the 'job_hash'
+        and 'job_id' request parameters, after authenticating the user.
+        Returns an error response if that fails.
+        '''
+
+        if not 'job_hash' in params:
+            return web.Response(text="Error: no job hash provided.", status=400)
+        if not 'job_id' in params:
+            return web.Response(text="Error: no job ID provided.", status=400)
+        username = params.get('username', '')
+
+        error = self.check_auth(params)
+        if error:
+            return error
+        if username:
+            # The build directories of authenticated jobs are only sent back
+            # encrypted, in the results archive.
+            return web.Response(text="Error: files of authenticated jobs are "
+                                "only available in the results archive.", status=404)
+
+        job = self.sc_status.get(f"{username}{params['job_hash']}_{params['job_id']}")
+        if not job:
+            return web.Response(text="Error: job not found.", status=404)
+        return job
+
+    ####################
+    def check_auth(self, params):
+        '''
+        Helper method to authenticate the user given by the 'username' and
+        'key' request parameters, if any. Returns an error response if
+        authentication fails.
+        '''
+
+        if ('username' in params) or ('key' in params):
+            if self.cfg['auth']['value'][-1]:
+                if ('username' in params) and ('key' in params):
+                    username = params['username']
+                    key = params['key']
+                    if not username in self.user_keys.keys():
+                        return web.Response(text="Error: invalid username provided.", status=404)
+                    # Authenticate the user.
+                    if not self.auth_password(username, key):
+                        return web.Response(text="Authentication error.", status=403)
+                else:
+                    return web.Response(text="Error: some authentication parameters are missing.", status=400)
+            else:
+                return web.Response(text="Error: authentication parameters were passed in, but this server does not support that feature.", status=500)
+        return None
+
+    ####################
+    def watch_job(self, job_key, chip):
+        '''
+        Starts tracking the task status of a job which is about to run in
+        the chip's build directory, see 'job_status'.
+        '''
+
+        job = JobStatus(chip.get('option', 'builddir'),
+                        chip.get('design'),
+                        chip.get('option', 'jobname'))
+        self.sc_status[job_key] = job
+        asyncio.ensure_future(self.poll_job(job))
+
+    ####################
+    async def poll_job(self, job, interval=1):
+        '''
+        Async method which rescans a job's directory until it is done, and
+        wakes up the clients waiting for changes.
+        '''
+
+        while not job.done:
+            if await job.scan(self.executor):
+                async with job.changed:
+                    job.changed.notify_all()
+            await asyncio.sleep(interval)
+
+    ####################
+    async def finish_job(self, job_key):
+        '''
+        Marks a job as done after a final scan of its tasks.
+        '''
+
+        job = self.sc_status[job_key]
+        await job.scan(self.executor, final=True)
+        async with job.changed:
+            job.changed.notify_all()
+
     ####################
     async def remote_sc_auth(self, chip, username, pk):
         '''
@@ -403,39 +1283,45 @@ class Server:
         nfs_mount = self.cfg['nfsmount']['value'][-1]
 
         # Mark the job run as busy.
-        self.sc_jobs[f'{username}{job_hash}_{job_nameid}'] = 'busy'
+        job_key = f'{username}{job_hash}_{job_nameid}'
+        self.sc_jobs[job_key] = 'busy'
 
         # Reset 'build' directory in NFS storage.
         build_dir = '/tmp/%s_%s'%(job_hash, job_nameid)
-        os.mkdir(build_dir)
+        await self.run_blocking(os.mkdir, build_dir)
 
         run_cmd = ''
         if self.cfg['cluster']['value'][-1] == 'slurm':
             # Run the job with slurm clustering.
             chip.set('option', 'builddir', f'{nfs_mount}/{job_hash}', clobber=True)
+            self.watch_job(job_key, chip)
             chip.set('option', 'jobscheduler', 'slurm')
             chip.set('option', 'remote', False)
             chip.set('option', 'credentials', '', clobber=True)
             chip.status['decrypt_key'] = base64.urlsafe_b64encode(pk)
-            chip.run()
+            await self.run_blocking(chip.run)
         else:
             chip.set('option', 'builddir', build_dir, clobber=True)
+            self.watch_job(job_key, chip)
             # Run the build command locally.
             from_dir = '%s/%s'%(nfs_mount, job_hash)
             to_dir   = '/tmp/%s_%s'%(job_hash, job_nameid)
             job_dir  = os.path.join(build_dir, top_module, job_nameid)
             # Write plaintext JSON config to the build directory.
-            subprocess.run(['mkdir', '-p', to_dir])
-            subprocess.run(['mkdir', '-p', '%s/configs'%build_dir])
+            await self.run_blocking(os.makedirs, to_dir, exist_ok=True)
+            await self.run_blocking(os.makedirs, '%s/configs'%build_dir, exist_ok=True)
             # Write private key to a file.
             # This should be okay, because we are already trusting the local
             # "compute node" disk to store the decrypted data. Further, the
             # file will be deleted immediately after the run.
             # Even so, use the usual 400 permissions for key files.
             keypath = f'{to_dir}/pk'
-            with open(os.open(keypath, os.O_CREAT | os.O_WRONLY, 0o400), 'w+') as keyfile:
-                keyfile.write(pk)
-            chip.write_manifest(f"{build_dir}/configs/chip{chip.get('option', 'jobname')}.json")
+            def write_key():
+                with open(os.open(keypath, os.O_CREAT | os.O_WRONLY, 0o400), 'w+') as keyfile:
+                    keyfile.write(pk)
+            await self.run_blocking(write_key)
+            await self.run_blocking(chip.write_manifest,
+                                    f"{build_dir}/configs/chip{chip.get('option', 'jobname')}.json")
             # Create the command to run.
             run_cmd  = f"cp -R {from_dir}/* {to_dir}/ ; "
             run_cmd += f"sc-crypt -mode decrypt -target {job_dir} -key_file {keypath} ; "
@@ -451,20 +1337,22 @@ class Server:
             # Ensure that the private key file was deleted.
             # (The whole directory should already be gone,
             #  but the subprocess command could fail)
-            if os.path.isfile(keypath):
-                os.remove(keypath)
+            if await self.run_blocking(os.path.isfile, keypath):
+                await self.run_blocking(os.remove, keypath)
 
         # Zip results after all job stages have finished.
-        subprocess.run(['tar',
-                        '-czf',
-                        '%s.tar.gz'%job_hash,
-                        '%s'%job_hash],
-                       cwd = nfs_mount)
+        await self.run_blocking(subprocess.run,
+                                ['tar',
+                                 '-czf',
+                                 '%s.tar.gz'%job_hash,
+                                 '%s'%job_hash],
+                                cwd = nfs_mount)
 
         # (Email notifications can be sent here using your preferred API)
 
         # Mark the job hash as being done.
-        self.sc_jobs.pop(f'{username}{job_hash}_{chip.get("jobname")}')
+        self.sc_jobs.pop(job_key)
+        await self.finish_job(job_key)
 
     ####################
     async def remote_sc(self, chip):
@@ -479,7 +1367,9 @@ class Server:
         jobid = chip.get('option', 'jobname')
 
         # Mark the job hash as being busy.
-        self.sc_jobs["%s_%s"%(job_hash, jobid)] = 'busy'
+        job_key = "%s_%s"%(job_hash, jobid)
+        self.sc_jobs[job_key] = 'busy'
+        self.watch_job(job_key, chip)
 
         run_cmd = ''
         if self.cfg['cluster']['value'][-1] == 'slurm':
@@ -495,14 +1385,13 @@ class Server:
             #run_cmd += '-cfg %s/configs/chip%s.json '%(build_dir, jobid)
             # Run the job with slurm clustering.
             chip.set('jobscheduler', 'slurm')
-            chip.run()
+            await self.run_blocking(chip.run)
         else:
             # Unrecognized or unset clusering option; run locally on the
-            # server itself. (Note: local runs are mostly synchronous, so
-            # this will probably block the server from responding to other
-            # calls. It should only be used for testing and development.)
+            # server itself. It should only be used for testing and
+            # development.
             cfg_out = f"{build_dir}/configs/chip{jobid}.json"
-            chip.write_manifest(cfg_out)
+            await self.run_blocking(chip.write_manifest, cfg_out)
             run_cmd = f'sc -cfg {cfg_out}'
 
             # Create async subprocess shell, and block this thread until it finishes.
@@ -512,14 +1401,16 @@ class Server:
         # (Email notifications can be sent here using SES)
 
         # Create a single-file archive to return if results are requested.
-        subprocess.run(['tar',
-                        '-czf',
-                        '%s.tar.gz'%job_hash,
-                        '%s'%job_hash],
-                       cwd=self.cfg['nfsmount']['value'][-1])
+        await self.run_blocking(subprocess.run,
+                                ['tar',
+                                 '-czf',
+                                 '%s.tar.gz'%job_hash,
+                                 '%s'%job_hash],
+                                cwd=self.cfg['nfsmount']['value'][-1])
 
         # Mark the job hash as being done.
-        self.sc_jobs.pop("%s_%s"%(job_hash, jobid))
+        self.sc_jobs.pop(job_key)
+        await self.finish_job(job_key)
 
     ####################
     def auth_password(self, username, password):
@@ -584,6 +1475,33 @@ def server_schema():
         'help' : ["TBD"]
     }
 
+    cfg['maxjobs'] = {
+        'short_help': 'Maximum number of jobs to run at the same time. Further jobs are queued, and users take turns starting them.',
+        'switch': '-max_jobs',
+        'switch_args': '<num>',
+        'type': ['int'],
+        'defvalue': ['4'],
+        'help': ["TBD"]
+    }
+
+    cfg['maxupload'] = {
+        'short_help': 'Maximum size in bytes of a job archive or file uploaded to the server.',
+        'switch': '-max_upload',
+        'switch_args': '<num>',
+        'type': ['int'],
+        'defvalue': ['10000000000'],
+        'help': ["TBD"]
+    }
+
+    cfg['maxblobstore'] = {
+        'short_help': 'Maximum size in bytes of the blob store. Files which no job uses are removed to make room, least recently used first; uploads are rejected if that is not enough.',
+        'switch': '-max_blob_store',
+        'switch_args': '<num>',
+        'type': ['int'],
+        'defvalue': ['100000000000'],
+        'help': ["TBD"]
+    }
+
     cfg['auth'] = {
         'short_help': 'Flag determining whether to enable authenticated and encrypted jobs. Intended for testing client-side authentication flags, not for securing sensitive information.',
         'switch': '-auth',
@@ -78,7 +78,7 @@ def build_config_recursive(schema, keypath_prefix=[], sec_key_prefix=[]):
     child_sections = []
     for key, val in schema.items():
         if key == 'default': continue
-        if 'help' in val:
+        if 'defvalue' in val:
             if 'value' in val and val['value']:
                 leaves.update({key: val})
         else:
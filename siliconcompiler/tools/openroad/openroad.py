@@ -212,59 +212,55 @@ def pre_process(chip):
 # Post_process (post executable)
 ################################
 
+def log_metrics(chip):
+    ''' Rules to extract metrics from the log file, see Chip.check_logfile()
+    '''
+
+    # Other tables have Total rows too, so the Total row of report_power is
+    # only used in the section which the scripts mark with 'SC_METRIC: power'.
+    section = {'metric': None}
+
+    def _section(match):
+        section['metric'] = match.group(1)
+
+    def _power(match):
+        if section['metric'] != 'power':
+            return None
+        return float(match.group(1)), float(match.group(2))
+
+    return [
+        (r'^SC_METRIC:\s+(\w+)', None, _section),
+        (r'^Design area (\d+)\s+u\^2\s+(.*)\%\s+utilization',
+         ('cellarea', 'totalarea', 'utilization'), _area_metrics),
+        (r'^tns (.*)', 'setuptns', lambda m: round(float(m.group(1)), 2)),
+        (r'^wns (.*)', 'setupwns', lambda m: round(float(m.group(1)), 2)),
+        (r'^worst slack (.*)', 'setupslack', lambda m: round(float(m.group(1)), 2)),
+        (r'^Total wire length = (.*) um', 'wirelength', lambda m: round(float(m.group(1)), 2)),
+        (r'^Total number of vias = (.*).', 'vias', lambda m: int(m.group(1))),
+        # Total row of report_power: internal, switching, leakage, total
+        (r'^Total\s+\S+\s+\S+\s+(\S+)\s+(\S+)\s+\S+%',
+         ('leakagepower', 'peakpower'), _power),
+    ]
+
+def _area_metrics(match):
+    #TODO: not sure the openroad utilization makes sense?
+    cellarea = round(float(match.group(1)), 2)
+    utilization = round(float(match.group(2)), 2)
+    if utilization == 0:
+        totalarea = 0.0
+    else:
+        totalarea = round(cellarea/(utilization/100), 2)
+    return cellarea, totalarea, utilization
+
 def post_process(chip):
     ''' Tool specific function to run after step execution
     '''
 
-    #Check log file for errors and statistics
     step = chip.get('arg', 'step')
     index = chip.get('arg', 'index')
     tool = 'openroad'
-    logfile = f"{step}.log"
 
-    # parsing log file
-    metric = None
-
-    with open(logfile) as f:
-        for line in f:
-            metricmatch = re.search(r'^SC_METRIC:\s+(\w+)', line)
-            area = re.search(r'^Design area (\d+)\s+u\^2\s+(.*)\%\s+utilization', line)
-            tns = re.search(r'^tns (.*)', line)
-            wns = re.search(r'^wns (.*)', line)
-            slack = re.search(r'^worst slack (.*)', line)
-            vias = re.search(r'^Total number of vias = (.*).', line)
-            wirelength = re.search(r'^Total wire length = (.*) um', line)
-            power = re.search(r'^Total(.*)', line)
-            if metricmatch:
-                metric = metricmatch.group(1)
-            elif area:
-                #TODO: not sure the openroad utilization makes sense?
-                cellarea = round(float(area.group(1)), 2)
-                utilization = round(float(area.group(2)), 2)
-                if utilization == 0:
-                    totalarea = 0.0
-                else:
-                    totalarea = round(cellarea/(utilization/100), 2)
-                chip.set('metric', step, index, 'cellarea', cellarea, clobber=True)
-                chip.set('metric', step, index, 'totalarea', totalarea, clobber=True)
-                chip.set('metric', step, index, 'utilization', utilization, clobber=True)
-            elif tns:
-                chip.set('metric', step, index, 'setuptns', round(float(tns.group(1)), 2), clobber=True)
-            elif wns:
-                chip.set('metric', step, index, 'setupwns', round(float(wns.group(1)), 2), clobber=True)
-            elif slack:
-                chip.set('metric', step, index, 'setupslack', round(float(slack.group(1)), 2), clobber=True)
-            elif wirelength:
-                chip.set('metric', step, index, 'wirelength', round(float(wirelength.group(1)), 2), clobber=True)
-            elif vias:
-                chip.set('metric', step, index, 'vias', int(vias.group(1)), clobber=True)
-            elif metric == "power":
-                if power:
-                    powerlist = power.group(1).split()
-                    leakage = powerlist[2]
-                    total = powerlist[3]
-                    chip.set('metric', step, index, 'peakpower', float(total), clobber=True)
-                    chip.set('metric', step, index, 'leakagepower', float(leakage), clobber=True)
+    # Log file metrics are extracted by log_metrics() rules.
 
     #Temporary superhack!rm
     #Getting cell count and net number from the first available DEF file output (if any)
@@ -280,17 +276,33 @@ def post_process(chip):
                 break
     out_def_path = os.path.join('outputs', out_def)
     if out_def and os.path.isfile(out_def_path):
-        with open(os.path.join('outputs', out_def)) as f:
-            for line in f:
-                cells = re.search(r'^COMPONENTS (\d+)', line)
-                nets = re.search(r'^NETS (\d+)', line)
-                pins = re.search(r'^PINS (\d+)', line)
-                if cells:
-                    chip.set('metric', step, index, 'cells', int(cells.group(1)), clobber=True)
-                elif nets:
-                    chip.set('metric', step, index, 'nets', int(nets.group(1)), clobber=True)
-                elif pins:
-                    chip.set('metric', step, index, 'pins', int(pins.group(1)), clobber=True)
+        counts = _read_def_counts(out_def_path)
+        for section, metric in (('COMPONENTS', 'cells'), ('NETS', 'nets'), ('PINS', 'pins')):
+            if section in counts:
+                chip.set('metric', step, index, metric, counts[section], clobber=True)
+
+def _read_def_counts(path):
+    '''
+    Returns the counts in the COMPONENTS, PINS and NETS section headers of a
+    DEF file. Reading stops as soon as all three headers have been found.
+    '''
+
+    header = re.compile(rb'^(COMPONENTS|PINS|NETS) (\d+)', re.MULTILINE)
+    counts = {}
+    with open(path, 'rb') as f:
+        tail = b''
+        while len(counts) < 3:
+            chunk = f.read(1024 * 1024)
+            data = tail + chunk
+            if chunk:
+                # headers may be split across chunks, keep the partial last line
+                cut = data.rfind(b'\n') + 1
+                data, tail = data[:cut], data[cut:]
+            for match in header.finditer(data):
+                counts.setdefault(match.group(1).decode(), int(match.group(2)))
+            if not chunk:
+                break
+    return counts
 
 ##################################################
 if __name__ == "__main__":
@@ -148,6 +148,24 @@ def normalize_version(version):
 ################################
 # Post_process (post executable)
 ################################
+def log_metrics(chip):
+    ''' Rules to extract metrics from the log file, see Chip.check_logfile()
+    '''
+
+    step = chip.get('arg','step')
+
+    if step.startswith('syn'):
+        return [
+            (r'Chip area for module.*\:\s+(.*)', 'cellarea', lambda m: round(float(m.group(1)),2)),
+            (r'Number of cells\:\s+(.*)', 'cells', lambda m: int(m.group(1))),
+        ]
+    elif step == 'lec':
+        return [
+            (r'Equivalence successfully proven!$', 'drvs', lambda m: 0),
+            (r'Found a total of (\d+) unproven \$equiv cells.', 'drvs', lambda m: int(m.group(1))),
+        ]
+    return []
+
 def post_process(chip):
     ''' Tool specific function to run after step execution
     '''
@@ -155,29 +173,10 @@ def post_process(chip):
     step = chip.get('arg','step')
     index = chip.get('arg','index')
 
-    # Extracting
+    # Log file metrics are extracted by log_metrics() rules.
     if step.startswith('syn'):
         #TODO: looks like Yosys exits on error, so no need to check metric
         chip.set('metric', step, index, 'errors', 0, clobber=True)
-        with open(step + ".log") as f:
-            for line in f:
-                area = re.search(r'Chip area for module.*\:\s+(.*)', line)
-                cells = re.search(r'Number of cells\:\s+(.*)', line)
-                if area:
-                    chip.set('metric', step, index, 'cellarea', round(float(area.group(1)),2), clobber=True)
-                elif cells:
-                    chip.set('metric', step, index, 'cells', int(cells.group(1)), clobber=True)
-    elif step == 'lec':
-        with open(step + ".log") as f:
-            for line in f:
-                if line.endswith('Equivalence successfully proven!\n'):
-                    chip.set('metric', step, index, 'drvs', 0, clobber=True)
-                    continue
-
-                errors = re.search(r'Found a total of (\d+) unproven \$equiv cells.', line)
-                if errors is not None:
-                    num_errors = int(errors.group(1))
-                    chip.set('metric', step, index, 'drvs', num_errors, clobber=True)
 
 
 ################################
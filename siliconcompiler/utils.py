@@ -26,6 +26,15 @@ def copytree(src, dst, ignore=[], dirs_exist_ok=False, link=False):
         else:
             shutil.copy2(srcfile, dstfile)
 
+def link_or_copy(src, dst):
+    '''Creates a hard link dst pointing to src, falling back to a copy when
+    src and dst can't be linked (e.g. they are on different filesystems).
+    '''
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
 def trim(docstring):
     '''Helper function for cleaning up indentation of docstring.
 
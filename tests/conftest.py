@@ -1,5 +1,8 @@
 import os
+import socket
 import subprocess
+import sys
+import time
 import pytest
 
 from tests import fixtures
@@ -48,6 +51,44 @@ def gcd_chip():
     design using freepdk45 and the asicflow.'''
     return fixtures.gcd_chip()
 
+# Runs an sc-server with local clustering on the given port and NFS mount,
+# which accepts uploads of up to 16 MB and a blob store of up to 40 MB.
+SERVER = '''
+import sys
+from siliconcompiler.server import Server, server_schema
+cfg = server_schema()
+for key in cfg:
+    cfg[key]['value'] = cfg[key]['defvalue']
+cfg['port']['value'] = [sys.argv[1]]
+cfg['nfsmount']['value'] = [sys.argv[2]]
+cfg['cluster']['value'] = ['local']
+cfg['maxupload']['value'] = [str(16 * 1024 * 1024)]
+cfg['maxblobstore']['value'] = [str(40 * 1024 * 1024)]
+Server(cfg, loglevel='WARNING')
+'''
+
+@pytest.fixture
+def server():
+    '''Runs an sc-server in the background for the duration of a test.
+    Returns its port and the absolute path of its NFS mount.'''
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+    nfs = os.path.abspath('nfs')
+    os.makedirs(nfs)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = fixtures.scroot()
+    proc = subprocess.Popen([sys.executable, '-c', SERVER, str(port), nfs], env=env)
+    for _ in range(100):
+        try:
+            socket.create_connection(('localhost', port)).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    yield port, nfs
+    proc.terminate()
+    proc.wait()
+
 # Submodule fixtures
 # Tests that rely on data from design submodules should use this pattern to
 # create a fixture for the submodule, which will clone it if needed (and will
@@ -0,0 +1,82 @@
+import os
+import time
+
+import siliconcompiler
+
+# Reports a number of warnings, then runs for a while
+SCRIPT = '''
+import sys, time
+print(f'warnings: {sys.argv[2]}', flush=True)
+time.sleep(float(sys.argv[1]))
+'''
+
+TOOL = '''
+import os
+import sys
+
+def setup(chip):
+    step = chip.get('arg', 'step')
+    index = chip.get('arg', 'index')
+    script = os.path.join(os.path.dirname(__file__), 'slow_script.py')
+    delay, warnings = {'0': ('0', '1'), '1': ('1', '0'), '2': ('30', '0')}[index]
+    chip.set('tool', 'slow', 'exe', sys.executable)
+    chip.set('tool', 'slow', 'option', step, index, [script, delay, warnings])
+
+def log_metrics(chip):
+    return [(r'^warnings: (\\d+)', 'warnings', lambda m: int(m.group(1)))]
+'''
+
+def test_cancelafter():
+    '''Once an input meets its goals, the minimum task cancels the others.'''
+
+    os.makedirs(os.path.join('tools', 'slow'))
+    with open(os.path.join('tools', 'slow', 'slow.py'), 'w') as f:
+        f.write(TOOL)
+    with open(os.path.join('tools', 'slow', 'slow_script.py'), 'w') as f:
+        f.write(SCRIPT)
+
+    chip = siliconcompiler.Chip('test')
+    chip.set('option', 'scpath', os.getcwd())
+    chip.set('option', 'quiet', True)
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    for index in ('0', '1', '2'):
+        chip.node(flow, 'import', 'slow', index=index)
+        chip.edge(flow, 'import', 'select', tail_index=index)
+        chip.set('flowgraph', flow, 'import', index, 'goal', 'warnings', 0)
+        chip.set('flowgraph', flow, 'import', index, 'timeout', 20)
+    chip.node(flow, 'select', 'minimum')
+    chip.set('flowgraph', flow, 'select', '0', 'cancelafter', 0)
+
+    start = time.time()
+    chip.run()
+    assert time.time() - start < 10
+
+    # Index 0 finished first, but missed its goal, so index 1 is the first
+    # one to meet its goals.
+    status = [chip.get('flowgraph', flow, 'import', index, 'status') for index in ('0', '1', '2')]
+    assert status == [siliconcompiler.TaskStatus.SUCCESS,
+                      siliconcompiler.TaskStatus.SUCCESS,
+                      siliconcompiler.TaskStatus.ERROR]
+    assert chip.get('flowgraph', flow, 'select', '0', 'select') == [('import', '1')]
+
+def test_task_meets_goals():
+    '''Tasks without goals never start the cancellation, and metrics of tasks
+    that didn't run in the current run() are read from their manifest.'''
+
+    chip = siliconcompiler.Chip('test')
+    chip.set('option', 'quiet', True)
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.node(flow, 'import', 'echo')
+    chip.run()
+
+    outdir = os.path.join(chip._getworkdir(step='import', index='0'), 'outputs')
+    files = (os.path.join(outdir, 'test.pkg.delta.pkl'), os.path.join(outdir, 'test.pkg.json'))
+    assert not chip._task_meets_goals('import', '0', {}, *files)
+    assert chip._task_meets_goals('import', '0', {'tasktime': 1000}, *files)
+
+    chip._task_deltafiles = set()
+    os.remove(files[0])
+    assert chip._task_meets_goals('import', '0', {'tasktime': 1000}, *files)
+    assert not chip._task_meets_goals('import', '0', {'tasktime': -1}, *files)
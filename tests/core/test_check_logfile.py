@@ -18,6 +18,31 @@ def test_check_logfile(datadir):
     chip.check_logfile(step='place', logfile=logfile)
 
 
+def test_check_logfile_switches(datadir):
+    chip = siliconcompiler.Chip('gcd')
+    chip.set('option', 'flow', 'test')
+    chip.node('test', 'place', 'openroad')
+
+    logfile = os.path.join(datadir, 'place.log')
+
+    # counts checked against GNU grep
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'warnings', ["WARNING", "-v DPL"])
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'errors', "-i error")
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'word', "-w GRT")
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'dash', ["-e -", "-v ^#"])
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'area', "-o [0-9]+ um")
+    expected = {'warnings': 1, 'errors': 5, 'word': 35, 'dash': 139, 'area': 1}
+    assert chip.check_logfile(step='place', logfile=logfile, display=False) == expected
+
+    with open('place.area') as f:
+        assert f.read() == '7633 um\n'
+
+    # an inverted first grep needs every line checked
+    chip.set('tool', 'openroad', 'regex', 'place', '0', 'inverted', "-v a")
+    expected['inverted'] = 172
+    assert chip.check_logfile(step='place', logfile=logfile, display=False) == expected
+
+
 #########################
 if __name__ == "__main__":
     from tests.fixtures import datadir
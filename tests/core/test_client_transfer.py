@@ -0,0 +1,288 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import uuid
+
+import pytest
+import requests
+
+import siliconcompiler
+from siliconcompiler import client
+from siliconcompiler.server import Server, server_schema
+
+def make_chip(port):
+    chip = siliconcompiler.Chip('test')
+    chip.status['remote_cfg'] = {'address': 'http://localhost', 'port': port}
+    chip.status['jobhash'] = uuid.uuid4().hex
+    return chip
+
+def make_tree(path):
+    os.makedirs(os.path.join(path, 'import0', 'outputs'))
+    with open(os.path.join(path, 'import0', 'outputs', 'test.v'), 'wb') as f:
+        f.write(os.urandom(3 * client._CHUNK))
+    with open(os.path.join(path, 'import0', 'import.log'), 'w') as f:
+        f.write('done\n')
+
+def test_tar_stream_skip():
+    '''Archives are reproducible, so the stream can be resumed at an offset.'''
+
+    make_tree('src')
+    progress = []
+    archive = b''.join(client._tar_stream('src', progress=lambda *args: progress.append(args)))
+    assert archive == b''.join(client._tar_stream('src'))
+    assert b''.join(client._tar_stream('src', skip=12345)) == archive[12345:]
+
+    total = 3 * client._CHUNK + len('done\n')
+    assert progress[-1] == (total, total)
+
+    os.makedirs('dst')
+    with open('src.tar.gz', 'wb') as f:
+        f.write(archive)
+    with tarfile.open('src.tar.gz') as tar:
+        tar.extractall('dst')
+    with open('src/import0/outputs/test.v', 'rb') as a, \
+         open('dst/import0/outputs/test.v', 'rb') as b:
+        assert a.read() == b.read()
+
+def test_upload(server):
+    '''Archives are uploaded in chunks, and uploads can be resumed.'''
+
+    port, nfs = server
+    chip = make_chip(port)
+    make_tree('src')
+
+    size = client._upload_archive(chip, 'src')
+    upload = os.path.join(nfs, chip.status['jobhash'] + '.upload')
+    with open(upload, 'rb') as f:
+        assert f.read() == b''.join(client._tar_stream('src'))
+    assert size == os.path.getsize(upload)
+
+    # Querying the upload reports how much was received; gaps are rejected.
+    url = f"http://localhost:{port}/upload/{chip.status['jobhash']}"
+    assert requests.post(url, files={'params': '{}'}).json()['offset'] == size
+    resp = requests.post(url, files=[('params', json.dumps({'offset': size + 1})),
+                                     ('chunk', b'x')])
+    assert resp.status_code == 409
+
+    # Uploads larger than the server's limit are rejected.
+    resp = requests.post(url, files=[('params', json.dumps({'offset': size})),
+                                     ('chunk', b'x' * 16 * 1024 * 1024)])
+    assert resp.status_code == 413
+    assert os.path.getsize(upload) == size
+
+    # Credentials are checked, and this server doesn't support them.
+    resp = requests.post(url, files={'params': json.dumps({'username': 'a', 'key': 'b'})})
+    assert resp.status_code == 500
+
+def test_fetch_results(server):
+    '''Results are extracted into the build directory while they download.'''
+
+    port, nfs = server
+    chip = make_chip(port)
+    job_hash = chip.status['jobhash']
+
+    make_tree(os.path.join(nfs, job_hash, 'test', 'job0'))
+    # Files linked from the blob store are read-only.
+    os.chmod(os.path.join(nfs, job_hash, 'test', 'job0', 'import0', 'outputs', 'test.v'), 0o444)
+    os.symlink('/nonexistent', os.path.join(nfs, job_hash, 'test', 'job0', 'import0', 'import'))
+    with tarfile.open(os.path.join(nfs, f'{job_hash}.tar.gz'), 'w:gz') as tar:
+        tar.add(os.path.join(nfs, job_hash), arcname=job_hash)
+    with open(os.path.join(nfs, job_hash, 'test', 'job0', 'import0', 'outputs', 'test.v'), 'rb') as f:
+        data = f.read()
+
+    # Downloads can be resumed with a range request.
+    url = f'http://localhost:{port}/get_results/{job_hash}.tar.gz'
+    whole = requests.post(url, data='{}').content
+    resp = requests.post(url, data='{}', headers={'Range': 'bytes=1000-'})
+    assert resp.status_code == 206
+    assert resp.content == whole[1000:]
+
+    progress = []
+    client.fetch_results(chip, progress=lambda *args: progress.append(args))
+    assert progress[-1] == (len(whole), len(whole))
+
+    workdir = os.path.join('build', 'test', 'job0', 'import0')
+    with open(os.path.join(workdir, 'outputs', 'test.v'), 'rb') as f:
+        assert f.read() == data
+    assert os.stat(os.path.join(workdir, 'outputs', 'test.v')).st_mode & 0o200
+    assert not os.path.lexists(os.path.join(workdir, 'import'))
+    # The job was deleted from the server.
+    assert not os.path.exists(os.path.join(nfs, job_hash))
+
+def test_extract_results_symlinks():
+    '''Symlinks which could point outside of the build directory are skipped,
+    so later members can't be written through them.'''
+
+    job_hash = uuid.uuid4().hex
+    os.makedirs('outside')
+
+    def add(tar, name, **kwargs):
+        info = tarfile.TarInfo(f'{job_hash}/{name}')
+        for key, val in kwargs.items():
+            setattr(info, key, val)
+        data = b'data'
+        if info.isreg():
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        else:
+            tar.addfile(info)
+
+    with tarfile.open('results.tar.gz', 'w:gz') as tar:
+        add(tar, 'abs', type=tarfile.SYMTYPE, linkname=os.path.abspath('outside'))
+        add(tar, 'abs/f.txt')
+        add(tar, 'rel', type=tarfile.SYMTYPE, linkname='../../outside')
+        add(tar, 'rel/f.txt')
+        add(tar, 'test/job0/outputs/test.v')
+        add(tar, 'local', type=tarfile.SYMTYPE, linkname='test/job0')
+
+    os.makedirs(os.path.join('build', 'sub'))
+    with tarfile.open('results.tar.gz', 'r|gz') as tar:
+        client._extract_results(tar, job_hash, 'test', os.path.join('build', 'sub'))
+
+    assert os.listdir('outside') == []
+    assert not os.path.islink(os.path.join('build', 'sub', 'abs'))
+    assert not os.path.islink(os.path.join('build', 'sub', 'rel'))
+    with open(os.path.join('build', 'sub', 'local', 'outputs', 'test.v'), 'rb') as f:
+        assert f.read() == b'data'
+
+def test_upload_blobs(server, monkeypatch):
+    '''Only files missing from the server's blob store are uploaded, and the
+    job directory is linked together from the store.'''
+
+    monkeypatch.setenv('HOME', os.getcwd())
+    port, nfs = server
+    make_tree('src')
+
+    for i in range(2):
+        chip = make_chip(port)
+        chip.set('option', 'jobname', f'job{i}')
+        shutil.copytree('src', chip._getworkdir())
+        progress = []
+        client.request_remote_run(chip, progress=lambda *args: progress.append(args))
+
+        job_dir = os.path.join(nfs, chip.status['jobhash'], 'test', f'job{i}')
+        remote = os.path.join(job_dir, 'import0', 'outputs', 'test.v')
+        local = os.path.join(chip._getworkdir(), 'import0', 'outputs', 'test.v')
+        digest = chip._hash_file(local)
+        assert os.path.samefile(remote, os.path.join(nfs, 'blobs', digest[:2], digest))
+        assert os.stat(remote).st_mode & 0o777 == 0o444
+        # Files outside of task directories may be written by the run, so
+        # they're copies.
+        log = os.path.join(job_dir, 'import0', 'import.log')
+        assert os.stat(log).st_nlink == 1
+        assert os.stat(log).st_mode & 0o777 == 0o644
+        with open(log) as f:
+            assert f.read() == 'done\n'
+
+        if i == 0:
+            assert progress[-1][0] == progress[-1][1] == 3 * client._CHUNK + len('done\n')
+        else:
+            # Nothing changed since the first job.
+            assert progress == []
+
+def test_upload_blobs_damaged(server, monkeypatch):
+    '''Blobs are checked before they're linked, and damaged ones are
+    uploaded again.'''
+
+    monkeypatch.setenv('HOME', os.getcwd())
+    port, nfs = server
+    make_tree('src')
+
+    chip = make_chip(port)
+    shutil.copytree('src', chip._getworkdir())
+    client.request_remote_run(chip)
+
+    digest = chip._hash_file(os.path.join('src', 'import0', 'outputs', 'test.v'))
+    blob = os.path.join(nfs, 'blobs', digest[:2], digest)
+    os.chmod(blob, 0o644)
+    with open(blob, 'r+b') as f:
+        f.write(b'damaged')
+
+    chip = make_chip(port)
+    with pytest.raises(RuntimeError):
+        client.request_remote_run(chip)
+    assert not os.path.exists(blob)
+
+    chip = make_chip(port)
+    client.request_remote_run(chip)
+    with open(blob, 'rb') as a, open(os.path.join('src', 'import0', 'outputs', 'test.v'), 'rb') as b:
+        assert a.read() == b.read()
+
+def test_blob_limits(server, monkeypatch):
+    '''Blobs are limited in size, and unused blobs are evicted when the store
+    is full. Jobs are uploaded as archives if that isn't enough.'''
+
+    monkeypatch.setenv('HOME', os.getcwd())
+    port, nfs = server
+
+    def post_blob(data):
+        digest = hashlib.sha256(data).hexdigest()
+        resp = requests.post(f'http://localhost:{port}/blob/{digest}', data=data)
+        return resp.status_code, os.path.join(nfs, 'blobs', digest[:2], digest)
+
+    assert post_blob(os.urandom(17 * 1024 * 1024))[0] == 413
+
+    # The server's store holds 40 MB.
+    blobs = []
+    for i in range(3):
+        status, blob = post_blob(os.urandom(12 * 1024 * 1024))
+        assert status == 200
+        os.utime(blob, (i, i))
+        blobs.append(blob)
+    assert post_blob(os.urandom(12 * 1024 * 1024))[0] == 200
+    assert not os.path.exists(blobs[0])
+    assert os.path.exists(blobs[1]) and os.path.exists(blobs[2])
+
+    # Blobs which jobs link to or which were just used are kept.
+    for i, path in enumerate(blobs[1:]):
+        os.link(path, os.path.join(nfs, f'link{i}'))
+    assert post_blob(os.urandom(12 * 1024 * 1024))[0] == 507
+
+    make_tree('src')
+    chip = make_chip(port)
+    shutil.copytree('src', chip._getworkdir())
+    client.request_remote_run(chip)
+    remote = os.path.join(nfs, chip.status['jobhash'], 'test', 'job0', 'import0', 'outputs', 'test.v')
+    assert os.stat(remote).st_nlink == 1
+    with open(remote, 'rb') as a, open(os.path.join('src', 'import0', 'outputs', 'test.v'), 'rb') as b:
+        assert a.read() == b.read()
+
+class _BlobRequest:
+    def __init__(self, data):
+        self.match_info = {'digest': hashlib.sha256(data).hexdigest()}
+        self.content_length = len(data)
+        self.content = self
+        self.data = data
+
+    async def iter_chunked(self, size):
+        yield self.data
+
+def test_blob_store_size():
+    '''Blobs which are already stored, e.g. by a concurrent upload, aren't
+    counted again.'''
+
+    cfg = server_schema()
+    for key in cfg:
+        cfg[key]['value'] = cfg[key]['defvalue']
+    cfg['nfsmount']['value'] = [os.path.abspath('nfs')]
+    server = Server.__new__(Server)
+    server.cfg = cfg
+    server.blob_store_size = None
+    server.blob_reserved = 0
+
+    data = os.urandom(1024)
+    async def upload():
+        with concurrent.futures.ThreadPoolExecutor() as server.executor:
+            await asyncio.gather(*[server.handle_blob(_BlobRequest(data)) for _ in range(3)])
+            await server.handle_blob(_BlobRequest(data))
+    asyncio.run(upload())
+
+    assert server.blob_store_size == len(data)
+    assert server.blob_reserved == 0
+    digest = hashlib.sha256(data).hexdigest()
+    assert os.listdir(os.path.join('nfs', 'blobs', digest[:2])) == [digest]
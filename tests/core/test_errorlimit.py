@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+import siliconcompiler
+
+# Reports two errors, then keeps running
+SCRIPT = '''
+import time
+print('ERROR: first', flush=True)
+print('ERROR: second', flush=True)
+time.sleep(30)
+'''
+
+TOOL = '''
+import os
+import sys
+
+def setup(chip):
+    step = chip.get('arg', 'step')
+    index = chip.get('arg', 'index')
+    script = os.path.join(os.path.dirname(__file__), 'slow_script.py')
+    chip.set('tool', 'slow', 'exe', sys.executable)
+    chip.set('tool', 'slow', 'option', step, index, script)
+    chip.set('tool', 'slow', 'regex', step, index, 'errors', 'ERROR')
+'''
+
+@pytest.fixture
+def chip():
+    os.makedirs(os.path.join('tools', 'slow'))
+    with open(os.path.join('tools', 'slow', 'slow.py'), 'w') as f:
+        f.write(TOOL)
+    with open(os.path.join('tools', 'slow', 'slow_script.py'), 'w') as f:
+        f.write(SCRIPT)
+
+    chip = siliconcompiler.Chip('test')
+    chip.set('option', 'scpath', os.getcwd())
+    chip.set('option', 'flow', 'test')
+    chip.set('option', 'quiet', True)
+    chip.node('test', 'import', 'slow')
+    chip.set('flowgraph', 'test', 'import', '0', 'timeout', 20)
+    return chip
+
+@pytest.mark.parametrize('errorlimit', [1, 2])
+def test_errorlimit(chip, errorlimit, capfd):
+    '''A task is aborted as soon as its error limit is reached.'''
+
+    chip.set('flowgraph', 'test', 'import', '0', 'errorlimit', errorlimit)
+
+    start = time.time()
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError):
+        chip.run()
+    assert time.time() - start < 10
+
+    assert f'reaching the error limit of {errorlimit}' in capfd.readouterr().err
@@ -0,0 +1,38 @@
+import siliconcompiler
+
+def test_grep():
+    chip = siliconcompiler.Chip('test')
+
+    line = "[WARNING GRT-0097] No global routing found for nets."
+    assert chip.grep("WARNING", line) == line
+    assert chip.grep("-v WARNING", line) is None
+    assert chip.grep("warning", line) is None
+    assert chip.grep("-i warning", line) == line
+    assert chip.grep("-E GRT-(0097|0098)", line) == line
+
+def test_grep_word():
+    chip = siliconcompiler.Chip('test')
+
+    assert chip.grep("-w GRT", "[WARNING GRT-0097]") == "[WARNING GRT-0097]"
+    assert chip.grep("-w GR", "[WARNING GRT-0097]") is None
+
+def test_grep_line():
+    chip = siliconcompiler.Chip('test')
+
+    assert chip.grep("-x done", "done") == "done"
+    assert chip.grep("-x done", "done\n") == "done\n"
+    assert chip.grep("-x done", "not done") is None
+    assert chip.grep("-x -i DONE", "done") == "done"
+
+def test_grep_only():
+    chip = siliconcompiler.Chip('test')
+
+    assert chip.grep("-o [0-9]+ um", "area 12 um, width 3 um") == "12 um\n3 um"
+    assert chip.grep("-o -v um", "area 12") is None
+
+def test_grep_pattern():
+    chip = siliconcompiler.Chip('test')
+
+    assert chip.grep("-e -v", "use -v") == "use -v"
+    assert chip.grep("-e -v", "use v") is None
+    assert chip.grep("-e two words", "two words") == "two words"
@@ -1,8 +1,15 @@
 # Copyright 2020 Silicon Compiler Authors. All Rights Reserved.
+import glob
+import hashlib
+import json
 import os
+
+import pytest
+
 import siliconcompiler
 
-def test_hash_files():
+def test_hash_files(monkeypatch):
+    monkeypatch.setenv('HOME', os.path.abspath('home'))
     chip = siliconcompiler.Chip('top')
 
     chip.load_target("freepdk45_demo")
@@ -13,6 +20,112 @@ def test_hash_files():
             chip.hash_files(*keypath)
     chip.write_manifest("hashed.json")
 
+def test_hash_files_algo(monkeypatch):
+    monkeypatch.setenv('HOME', os.path.abspath('home'))
+    chip = siliconcompiler.Chip('top')
+
+    files = []
+    for i in range(3):
+        files.append(f'{i}.v')
+        with open(files[-1], 'w') as f:
+            f.write(f'module m{i}; endmodule\n')
+    chip.set('input', 'verilog', files)
+
+    def digests(algo):
+        result = []
+        for name in files:
+            with open(name, 'rb') as f:
+                result.append(hashlib.new(algo, f.read()).hexdigest())
+        return result
+
+    # Defaults to the hashalgo field
+    assert chip.hash_files('input', 'verilog') == digests('sha256')
+    assert chip.get('input', 'verilog', field='filehash') == digests('sha256')
+
+    chip.set('input', 'verilog', 'md5', field='hashalgo')
+    assert chip.hash_files('input', 'verilog', update=False) == digests('md5')
+    assert chip.get('input', 'verilog', field='filehash') == digests('sha256')
+
+    # Rehashing with another algorithm records it
+    assert chip.hash_files('input', 'verilog', algo='SHA512') == digests('sha512')
+    assert chip.get('input', 'verilog', field='hashalgo') == 'sha512'
+    assert chip.get('input', 'verilog', field='filehash') == digests('sha512')
+
+    # Variable length digests aren't supported
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError):
+        chip.hash_files('input', 'verilog', algo='shake_128')
+
+    # Digests are only cached in [option,cachedir]
+    assert not os.path.exists('home')
+
+def test_hash_files_cache(monkeypatch):
+    monkeypatch.setenv('HOME', os.path.abspath('home'))
+    chip = siliconcompiler.Chip('top')
+    chip.set('option', 'cachedir', 'cache')
+
+    with open('top.v', 'w') as f:
+        f.write('module top; endmodule\n')
+    os.utime('top.v', (0, 0))
+    chip.set('input', 'verilog', 'top.v')
+
+    digest = chip.hash_files('input', 'verilog')[0]
+    cachefiles = glob.glob(os.path.join('cache', 'hashes', 'sha256', '*'))
+    assert len(cachefiles) == 1
+
+    # Unchanged files aren't read again
+    with open(cachefiles[0]) as f:
+        entry = json.load(f)
+    assert entry['digest'] == digest
+    entry['digest'] = 'cached'
+    with open(cachefiles[0], 'w') as f:
+        json.dump(entry, f)
+    assert chip.hash_files('input', 'verilog', update=False) == ['cached']
+
+    # Modified files are
+    with open('top.v', 'w') as f:
+        f.write('module top(); endmodule\n')
+    os.utime('top.v', (0, 0))
+    assert chip.hash_files('input', 'verilog', update=False) != ['cached']
+
+def test_hash_files_cache_evict(monkeypatch):
+    monkeypatch.setenv('HOME', os.path.abspath('home'))
+    chip = siliconcompiler.Chip('top')
+    chip.set('option', 'cachedir', 'cache')
+
+    files = []
+    for i in range(3):
+        files.append(f'{i}.v')
+        with open(files[-1], 'w') as f:
+            f.write(f'module m{i}; endmodule\n')
+        os.utime(files[-1], (0, 0))
+    chip.set('input', 'verilog', files)
+    chip.hash_files('input', 'verilog', update=False)
+    cachefiles = glob.glob(os.path.join('cache', 'hashes', 'sha256', '*'))
+    assert len(cachefiles) == 3
+    for name in cachefiles:
+        os.utime(name, (0, 0))
+
+    # The cache is only evicted when new digests are added
+    size = os.path.getsize(cachefiles[0])
+    chip.set('option', 'cachesize', size + 1)
+    chip.set('input', 'verilog', files[1:])
+    chip.hash_files('input', 'verilog', update=False)
+    assert len(glob.glob(os.path.join('cache', 'hashes', 'sha256', '*'))) == 3
+
+    # The least recently used digests are evicted to fit the cache size
+    chip.set('option', 'cachesize', 3 * size + 1)
+    files.append('3.v')
+    with open(files[-1], 'w') as f:
+        f.write('module m3; endmodule\n')
+    os.utime(files[-1], (0, 0))
+    chip.set('input', 'verilog', files[1:])
+    chip.hash_files('input', 'verilog', update=False)
+    cachefiles = glob.glob(os.path.join('cache', 'hashes', 'sha256', '*'))
+    assert len(cachefiles) == 3
+    for name in cachefiles:
+        with open(name) as f:
+            assert json.load(f)['file'][0] != os.path.realpath(files[0])
+
 #########################
 if __name__ == "__main__":
     test_hash_files()
@@ -0,0 +1,26 @@
+from siliconcompiler.server import JobQueue
+
+def test_job_queue_fair():
+    '''Users take turns starting jobs, up to the maximum number of jobs.'''
+
+    queue = JobQueue(2)
+    for job in ('a0', 'a1', 'a2', 'a3'):
+        queue.push('alice', job, None)
+    queue.push('bob', 'b0', None)
+    queue.push('bob', 'b1', None)
+
+    assert queue.pop()[0] == 'a0'
+    # Carol's first job goes ahead of Alice's and Bob's second ones.
+    queue.push('carol', 'c0', None)
+    assert [queue.position(job) for job in ('b0', 'a1', 'c0', 'b1', 'a2', 'a3')] == \
+           [1, 2, 3, 4, 5, 6]
+    assert queue.pop()[0] == 'b0'
+
+    # Both slots are taken.
+    assert queue.pop() is None
+    assert queue.running == {'a0', 'b0'}
+
+    queue.running.discard('a0')
+    assert queue.pop()[0] == 'a1'
+    assert queue.position('a1') is None
+    assert queue.position('c0') == 1
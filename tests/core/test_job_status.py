@@ -0,0 +1,134 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import uuid
+
+import siliconcompiler
+from siliconcompiler import client
+from siliconcompiler.server import JobStatus
+
+def test_job_status_scan():
+    '''Task status is derived from the job's directory as tasks progress.'''
+
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.node(flow, 'import', 'echo')
+    chip.run()
+
+    job = JobStatus('build', 'test', 'job0')
+    assert asyncio.run(job.scan())
+    assert job.changes(0) == [{
+        'step': 'import',
+        'index': '0',
+        'status': 'success',
+        'metrics': job.tasks[('import', '0')]['metrics'],
+        'version': 1,
+    }]
+    assert 'tasktime' in job.tasks[('import', '0')]['metrics']
+    assert not asyncio.run(job.scan())
+
+    # A task directory without an output manifest is running...
+    os.makedirs(os.path.join('build', 'test', 'job0', 'syn', '0'))
+    assert asyncio.run(job.scan())
+    assert [(t['step'], t['status']) for t in job.changes(1)] == [('syn', 'running')]
+
+    # ...until the job is done, then it failed.
+    assert asyncio.run(job.scan(final=True))
+    assert job.done
+    assert [(t['step'], t['status']) for t in job.changes(2)] == [('syn', 'error')]
+    assert job.changes(3) == []
+
+def test_job_status_scan_serialized(monkeypatch):
+    '''Scans read the directory in the executor one at a time, and only
+    update the job on the event loop.'''
+
+    os.makedirs(os.path.join('build', 'test', 'job0', 'import', '0'))
+    job = JobStatus('build', 'test', 'job0')
+
+    read_tasks = JobStatus._read_tasks
+    active = []
+    overlapped = []
+    def slow_read_tasks(self, finished, final):
+        assert threading.current_thread() is not threading.main_thread()
+        active.append(True)
+        overlapped.append(len(active) > 1)
+        time.sleep(0.1)
+        found = read_tasks(self, finished, final)
+        active.pop()
+        return found
+    monkeypatch.setattr(JobStatus, '_read_tasks', slow_read_tasks)
+
+    async def scans():
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.gather(job.scan(executor), job.scan(executor, final=True))
+
+    assert asyncio.run(scans()) == [True, True]
+    assert overlapped == [False, False]
+    assert job.done
+    assert [(t['step'], t['status'], t['version']) for t in job.changes(0)] == \
+        [('import', 'error', 2)]
+
+def test_job_status_unknown(server):
+    '''Jobs the server doesn't know about are reported as done right away.'''
+
+    port, nfs = server
+    chip = siliconcompiler.Chip('test')
+    chip.status['remote_cfg'] = {'address': 'http://localhost', 'port': port}
+    chip.status['jobhash'] = uuid.uuid4().hex
+
+    start = time.monotonic()
+    status = client.job_status(chip, timeout=10)
+    assert time.monotonic() - start < 5
+    assert status == {'busy': False, 'version': 0, 'tasks': [], 'queue_position': None}
+
+def test_job_status_files(monkeypatch):
+    '''Files are listed with their digest, which is cached until they change.'''
+
+    monkeypatch.setenv('HOME', os.getcwd())
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.node(flow, 'import', 'echo')
+    chip.run()
+
+    job = JobStatus('build', 'test', 'job0')
+    asyncio.run(job.scan())
+    files = {f['path']: f for f in job.files('import', '0')}
+    assert 'test/job0/import/0/outputs/test.pkg.json' in files
+    log = files['test/job0/import/0/import.log']
+    assert log['digest'] == chip._hash_file(os.path.join('build', log['path']))
+
+    # The whole job also includes the job's manifest.
+    assert 'test/job0/test.pkg.json' in [f['path'] for f in job.files()]
+
+    with open(os.path.join('build', log['path']), 'a') as f:
+        f.write('more\n')
+    files = {f['path']: f for f in job.files('import', '0')}
+    assert files[log['path']]['digest'] != log['digest']
+    assert files[log['path']]['size'] == log['size'] + 5
+
+def test_job_status_file_path():
+    '''Files are only served from within the build directory.'''
+
+    os.makedirs(os.path.join('build', 'test', 'job0', 'import', '0'))
+    os.makedirs('outside')
+    with open(os.path.join('outside', 'secret.txt'), 'w') as f:
+        f.write('secret\n')
+    taskdir = os.path.join('build', 'test', 'job0', 'import', '0')
+    with open(os.path.join(taskdir, 'import.log'), 'w') as f:
+        f.write('done\n')
+    os.symlink(os.path.abspath('outside'), os.path.join(taskdir, 'outputs'))
+    os.symlink('import.log', os.path.join(taskdir, 'log'))
+
+    job = JobStatus('build', 'test', 'job0')
+    assert job.file_path('test/job0/import/0/import.log') == \
+        os.path.realpath(os.path.join(taskdir, 'import.log'))
+    assert job.file_path('test/job0/import/0/log') == \
+        os.path.realpath(os.path.join(taskdir, 'import.log'))
+    assert job.file_path('test/job0/import/0/outputs/secret.txt') is None
+    assert job.file_path('test/job0/import/0/missing.txt') is None
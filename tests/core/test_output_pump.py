@@ -0,0 +1,60 @@
+import io
+import subprocess
+import sys
+import time
+
+from siliconcompiler.core import _OutputPump
+
+SCRIPT = '''
+import sys, time
+print('first')
+sys.stdout.flush()
+print('error', file=sys.stderr)
+sys.stderr.flush()
+time.sleep(float(sys.argv[1]))
+sys.stdout.write('partial')
+'''
+
+def run(delay, deadline=None, stderr=subprocess.PIPE):
+    lines = []
+    stdout = io.BytesIO()
+    stderr_writer = io.BytesIO()
+    proc = subprocess.Popen([sys.executable, '-c', SCRIPT, str(delay)],
+                            stdout=subprocess.PIPE, stderr=stderr)
+    pump = _OutputPump(on_line=lines.append)
+    pump.add(proc.stdout, stdout, match=True)
+    if stderr == subprocess.PIPE:
+        pump.add(proc.stderr, stderr_writer)
+    result = pump.run(proc, deadline=deadline, interval=0.05)
+    return result, proc, lines, stdout.getvalue(), stderr_writer.getvalue()
+
+def test_output_pump():
+    '''Output is copied per pipe and lines are passed as they complete.'''
+
+    done, proc, lines, stdout, stderr = run(0)
+    assert done
+    assert proc.returncode == 0
+    assert stdout == b'first\npartial'
+    assert stderr == b'error\n'
+    # Only matched pipes are passed to the callback, including the last
+    # unterminated line.
+    assert lines == ['first', 'partial']
+
+def test_output_pump_merged():
+    done, proc, lines, stdout, _ = run(0, stderr=subprocess.STDOUT)
+    assert done
+    assert stdout == b'first\nerror\npartial'
+    assert lines == ['first', 'error', 'partial']
+
+def test_output_pump_deadline():
+    '''The pump returns as soon as the deadline passes.'''
+
+    start = time.time()
+    done, proc, lines, _, _ = run(30, deadline=start + 0.5)
+    elapsed = time.time() - start
+    proc.kill()
+    proc.wait()
+
+    assert not done
+    assert 0.5 <= elapsed < 1
+    assert lines == ['first']
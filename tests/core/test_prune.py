@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+import siliconcompiler
+from siliconcompiler.schema import schema_cfg
+
+@pytest.mark.parametrize('name,keeplists', [('schema', False), ('schema_keeplists', True)])
+def test_prune_schema(datadir, name, keeplists):
+    '''Pruning the full schema (with defaults and documentation) matches the golden output.'''
+    chip = siliconcompiler.Chip('test')
+
+    with open(os.path.join(datadir, 'prune', f'{name}.json'), 'r') as f:
+        expected = json.load(f)
+
+    assert chip._prune(schema_cfg(), keeplists=keeplists) == expected
+
+def test_prune_manifest(datadir):
+    '''Pruning an already pruned manifest doesn't change it.'''
+    chip = siliconcompiler.Chip('gcd')
+
+    with open(os.path.join(datadir, 'gcd.pkg.json'), 'r') as f:
+        manifest = json.load(f)
+
+    assert chip._prune(manifest) == manifest
+
+def test_prune_branches():
+    '''Branches that only lead to empty leaves are removed.'''
+    chip = siliconcompiler.Chip('test')
+
+    empty = {'defvalue': None, 'value': None, 'help': 'h', 'example': ['e']}
+    full = {'defvalue': None, 'value': 'x', 'help': 'h', 'example': ['e']}
+    cfg = {'a': {'b': {'c': {'d': {'e': empty, 'f': {}}}}},
+           'l': {'m': full, 'default': {'n': full}, 'o': {}},
+           'default': {'p': full}}
+
+    pruned = chip._prune(cfg)
+    assert pruned == {'l': {'m': {'defvalue': None, 'value': 'x'}}}
+    # the input is left untouched
+    assert 'help' in cfg['l']['m']
+    assert pruned['l']['m'] is not cfg['l']['m']
+
+def test_prune_copy():
+    '''Values of the pruned copy can be modified without affecting the chip.'''
+    chip = siliconcompiler.Chip('test')
+    chip.set('input', 'verilog', ['foo.v'])
+
+    pruned = chip._prune(chip.cfg)
+    pruned['input']['verilog']['value'].append('bar.v')
+
+    assert chip.get('input', 'verilog') == ['foo.v']
+
+#########################
+if __name__ == "__main__":
+    from tests.fixtures import datadir
+    test_prune_manifest(datadir(__file__))
@@ -32,6 +32,21 @@ def test_read_sup():
     chip2.read_manifest('tmp.sup.gz')
     assert chip2.get('input','verilog') == ['foo.v']
 
+def test_read_pickle():
+    '''Test binary read/write'''
+
+    chip = siliconcompiler.Chip('foo')
+    chip.add('input', 'verilog', 'foo.v')
+    chip.set('asic', 'diearea', [(0, 0), (10, 10)])
+    chip.write_manifest('tmp.pkl')
+    chip.write_manifest('tmp.pkl.gz')
+
+    for manifest in ('tmp.pkl', 'tmp.pkl.gz'):
+        chip2 = siliconcompiler.Chip('foo')
+        chip2.read_manifest(manifest)
+        assert chip2.get('input', 'verilog') == ['foo.v']
+        assert chip2.get('asic', 'diearea') == [(0, 0), (10, 10)]
+
 def test_read_defaults(datadir):
     '''Make sure read/write operaton doesn't modify manifest'''
 
@@ -0,0 +1,217 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+
+import siliconcompiler
+from siliconcompiler.core import TaskStatus
+
+def _record(logfile, task):
+    with open(logfile, 'a') as f:
+        f.write(f'start {task}\n')
+    time.sleep(0.2)
+    with open(logfile, 'a') as f:
+        f.write(f'end {task}\n')
+
+def _launch(chip, tasks_to_run, resources, capacity, priority=None):
+    logfile = os.path.abspath('tasks.log')
+    status = {task: TaskStatus.PENDING for task in tasks_to_run}
+    processes = {task: multiprocessing.Process(target=_record, args=(logfile, task))
+                 for task in tasks_to_run}
+    chip._launch_tasks(tasks_to_run, processes, status, resources, capacity, priority)
+
+    assert all(s == TaskStatus.SUCCESS for s in status.values())
+    with open(logfile) as f:
+        return [line.split() for line in f]
+
+def test_maxworkers():
+    '''Tasks are serialized with a single worker, highest priority first.'''
+    chip = siliconcompiler.Chip('test')
+    tasks_to_run = {
+        'a0': [],
+        'b0': [],
+        'c0': ['b0'],
+    }
+
+    priority = {'a0': 1, 'b0': 2, 'c0': 1}
+
+    events = _launch(chip, tasks_to_run, {}, (1, 8, 1e9), priority)
+
+    assert events == [
+        ['start', 'b0'], ['end', 'b0'],
+        ['start', 'a0'], ['end', 'a0'],
+        ['start', 'c0'], ['end', 'c0'],
+    ]
+
+def test_maxthreads():
+    '''Tasks that don't fit in the thread budget wait for running tasks.'''
+    chip = siliconcompiler.Chip('test')
+    tasks_to_run = {'a0': [], 'b0': [], 'c0': []}
+    resources = {'a0': (4, 0), 'b0': (4, 0), 'c0': (8, 0)}
+
+    events = _launch(chip, tasks_to_run, resources, (8, 8, 1e9))
+
+    # a0 and b0 fit together, c0 needs the whole budget.
+    assert {tuple(e) for e in events[:2]} == {('start', 'a0'), ('start', 'b0')}
+    assert events[-2:] == [['start', 'c0'], ['end', 'c0']]
+
+def test_oversized_task():
+    '''A task that exceeds the capacity still runs once nothing else is.'''
+    chip = siliconcompiler.Chip('test')
+    tasks_to_run = {'a0': [], 'b0': []}
+    resources = {'a0': (1, 4e9), 'b0': (1, 4e9)}
+
+    events = _launch(chip, tasks_to_run, resources, (8, 8, 1e9))
+
+    assert events == [
+        ['start', 'a0'], ['end', 'a0'],
+        ['start', 'b0'], ['end', 'b0'],
+    ]
+
+def test_task_resources():
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'join', 'join')
+    chip.edge(flow, 'import', 'join')
+
+    chip.set('tool', 'echo', 'threads', 'import', '0', 4)
+    chip.set('metric', 'import', '0', 'memory', 2e9)
+
+    assert chip._task_resources(flow, 'import', '0') == (4, 2e9)
+    assert chip._task_resources(flow, 'join', '0') == (0, 0)
+
+def test_predict_runtime():
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'slow', 'echo')
+    chip.node(flow, 'fast', 'echo')
+    chip.node(flow, 'join', 'join')
+    chip.node(flow, 'export', 'echo')
+    chip.edge(flow, 'import', 'slow')
+    chip.edge(flow, 'import', 'fast')
+    chip.edge(flow, 'slow', 'join')
+    chip.edge(flow, 'fast', 'join')
+    chip.edge(flow, 'join', 'export')
+
+    chip.set('metric', 'import', '0', 'tasktime', 1.0)
+    chip.set('metric', 'slow', '0', 'tasktime', 10.0)
+    chip.set('metric', 'fast', '0', 'tasktime', 2.0)
+    # export has no recorded tasktime, and is weighted by the mean (13 / 3)
+
+    runtime = chip.predict_runtime()
+    assert runtime[('export', '0')] == 13 / 3
+    assert runtime[('join', '0')] == 13 / 3
+    assert runtime[('fast', '0')] == 2 + 13 / 3
+    assert runtime[('slow', '0')] == 10 + 13 / 3
+    assert runtime[('import', '0')] == 11 + 13 / 3
+
+    makespan, path = chip.critical_path()
+    assert makespan == 11 + 13 / 3
+    assert path == [('import', '0'), ('slow', '0'), ('join', '0'), ('export', '0')]
+
+def test_predict_runtime_history():
+    '''Tasktimes recorded by previous jobs are used, most recent first.'''
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.node(flow, 'import', 'echo')
+
+    chip.set('metric', 'import', '0', 'tasktime', 1.0)
+    chip.set('option', 'jobname', 'job0')
+    chip.record_history()
+    chip.set('metric', 'import', '0', 'tasktime', 5.0)
+    chip.set('option', 'jobname', 'job1')
+    chip.record_history()
+    chip.set('metric', 'import', '0', 'tasktime', None)
+
+    assert chip.predict_runtime() == {('import', '0'): 5.0}
+
+def test_workerpool():
+    '''Builtins run in the worker pool and hand their results on in memory.'''
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.set('option', 'workerpool', True)
+    for index in ('0', '1'):
+        chip.node(flow, 'import', 'echo', index=index)
+        chip.edge(flow, 'import', 'join', tail_index=index)
+    chip.node(flow, 'join', 'join')
+    chip.node(flow, 'export', 'echo')
+    chip.edge(flow, 'join', 'export')
+    chip.node(flow, 'done', 'nop')
+    chip.edge(flow, 'export', 'done')
+
+    chip.run()
+
+    assert set(chip._task_deltas) == {('join', '0'), ('done', '0')}
+    assert chip.get('flowgraph', flow, 'join', '0', 'select') == [('import', '0'), ('import', '1')]
+    for step in ('import', 'join', 'export', 'done'):
+        assert chip.get('flowgraph', flow, step, '0', 'status') == TaskStatus.SUCCESS
+        assert chip.get('metric', step, '0', 'tasktime') is not None
+    # Output manifests are still written for resume and inspection.
+    assert os.path.isfile(os.path.join(chip._getworkdir(step='done', index='0'),
+                                       'outputs', 'test.pkg.json'))
+
+def test_workerpool_inputs(monkeypatch):
+    '''Pooled tasks are only sent the results of their inputs.'''
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.set('option', 'workerpool', True)
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'join', 'join')
+    chip.edge(flow, 'import', 'join')
+    chip.node(flow, 'export', 'echo')
+    chip.edge(flow, 'join', 'export')
+    chip.node(flow, 'done', 'nop')
+    chip.edge(flow, 'export', 'done')
+
+    requests = {}
+    send = multiprocessing.connection.Connection.send
+    def record(self, obj):
+        if isinstance(obj, tuple) and len(obj) == 5:
+            step, index, _, deltas, deltafiles = obj
+            requests[step + index] = (set(deltas), set(deltafiles))
+        send(self, obj)
+    monkeypatch.setattr(multiprocessing.connection.Connection, 'send', record)
+
+    chip.run()
+
+    assert requests == {
+        'join0': (set(), {'import0'}),
+        'done0': (set(), {'export0'}),
+    }
+    assert chip.get('flowgraph', flow, 'done', '0', 'status') == TaskStatus.SUCCESS
+
+def test_workerpool_exception(monkeypatch):
+    '''An exception raised while pooled tasks run doesn't leave the pool
+    workers behind.'''
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.set('option', 'workerpool', True)
+    chip.node(flow, 'import', 'nop')
+
+    def wait(*args, **kwargs):
+        raise RuntimeError('interrupted')
+    monkeypatch.setattr(multiprocessing.connection, 'wait', wait)
+
+    errors = []
+    def run():
+        try:
+            chip.run()
+        except RuntimeError as e:
+            errors.append(e)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert not multiprocessing.active_children()
@@ -105,6 +105,19 @@ def test_get_invalid_field_continue():
     ret_val = chip.get('option', None)
     assert ret_val == None
 
+def test_unhashable_keypath():
+    '''Keys which aren't strings are reported, even if they can't be looked
+    up in the keypath index.'''
+    chip = siliconcompiler.Chip('test')
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError, match='Invalid keypath'):
+        chip.get('library', [None], 'asic', 'logiclib')
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError, match='Invalid keypath'):
+        chip.set('library', [None], 'asic', 'logiclib', 'lib')
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError, match='Invalid keypath'):
+        chip.add('library', [None], 'asic', 'logiclib', 'lib')
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError, match='Invalid keypath'):
+        chip.getkeys('library', [None], 'asic')
+
 def test_set_valid_field_to_none():
     chip = siliconcompiler.Chip('test')
     chip.set('option', 'jobscheduler', 'slurm')
@@ -127,6 +140,103 @@ def test_set_add_field_list():
     chip.add('input', 'txt', 'Ben Bitdiddle', field='author')
     assert chip.get('input', 'txt', field='author') == ['Alyssa P. Hacker', 'Ben Bitdiddle']
 
+def test_keypath_index_reset():
+    chip = siliconcompiler.Chip('test')
+    chip.set('flowgraph', 'testflow', 'import', '0', 'tool', 'surelog')
+    assert chip.get('flowgraph', 'testflow', 'import', '0', 'tool') == 'surelog'
+
+    # Replacing a subtree must not leave stale nodes in the keypath index.
+    del chip.cfg['flowgraph']['testflow']
+    chip._reset_index('flowgraph', 'testflow')
+    chip.set('flowgraph', 'testflow', 'import', '0', 'tool', 'verilator')
+    assert chip.cfg['flowgraph']['testflow']['import']['0']['tool']['value'] == 'verilator'
+
+    # Replacing the whole cfg resets the index.
+    other = siliconcompiler.Chip('other')
+    chip.cfg = other.cfg
+    assert chip.get('design') == 'other'
+    assert chip.getkeys('flowgraph') == []
+
+def test_keypath_set():
+    '''The maintained keypath set matches a walk of the schema.'''
+    chip = siliconcompiler.Chip('test')
+    assert chip.getkeys() == chip._allkeys(chip.cfg)
+
+    # New instances of 'default' subtrees are added in schema order.
+    chip.set('tool', 'yosys', 'exe', 'yosys')
+    chip.set('flowgraph', 'testflow', 'import', '0', 'tool', 'surelog')
+    chip.set('option', 'jobname', 'job0')
+    chip.record_history()
+    chip.set('input', 'verilog', 'top.v')
+    chip.set('tool', 'surelog', 'exe', 'surelog')
+    assert chip.getkeys() == chip._allkeys(chip.cfg)
+
+    files = [tuple(key) for key in chip.getkeys()
+             if 'file' in chip.get(*key, field='type') or 'dir' in chip.get(*key, field='type')]
+    assert chip._keyview('file') == files
+    required = [tuple(key) for key in chip.getkeys()
+                if chip.get(*key, field='require') is not None]
+    assert chip._keyview('require') == required
+
+    # Views follow changes to the fields they filter on.
+    assert ('option', 'scpath') not in chip._keyview('require')
+    chip.set('option', 'scpath', 'all', field='require')
+    assert ('option', 'scpath') in chip._keyview('require')
+
+def test_default_instances():
+    chip = siliconcompiler.Chip('test')
+    chip.add('tool', 'yosys', 'option', 'syn', '0', '-a')
+    chip.add('tool', 'openroad', 'option', 'syn', '0', '-b')
+    chip.add('tool', 'yosys', 'option', 'syn', '0', '-c')
+
+    # Instances of a 'default' subtree own their values...
+    assert chip.get('tool', 'yosys', 'option', 'syn', '0') == ['-a', '-c']
+    assert chip.get('tool', 'openroad', 'option', 'syn', '0') == ['-b']
+    default = chip.cfg['tool']['default']['option']['default']['default']
+    assert default['value'] == []
+    assert default['defvalue'] == []
+
+    # ...but share static metadata with it.
+    instance = chip.cfg['tool']['yosys']['option']['syn']['0']
+    assert instance['type'] is default['type']
+
+def test_doc_fields():
+    '''Documentation fields are looked up in the schema, not stored in the cfg.'''
+    chip = siliconcompiler.Chip('test')
+    chip.set('tool', 'yosys', 'exe', 'yosys')
+
+    leaf = chip.cfg['tool']['yosys']['exe']
+    assert 'help' not in leaf and 'example' not in leaf
+    assert chip.get('tool', 'yosys', 'exe', field='shorthelp') == \
+        chip.get('tool', 'default', 'exe', field='shorthelp')
+    assert chip.get('tool', 'yosys', 'exe', field='example')[0].startswith('cli: -tool_exe')
+
+    # Set fields are stored in the leaf, and override the schema.
+    chip.set('tool', 'yosys', 'exe', 'See README', field='notes')
+    assert chip.get('tool', 'yosys', 'exe', field='notes') == 'See README'
+    assert chip.get('tool', 'openroad', 'exe', field='notes') is None
+
+    # Added examples extend the schema's examples of this keypath only.
+    examples = chip.get('tool', 'yosys', 'exe', field='example')
+    chip.add('tool', 'yosys', 'exe', 'api: chip.set(...)', field='example')
+    assert chip.get('tool', 'yosys', 'exe', field='example') == examples + ['api: chip.set(...)']
+    assert chip.get('tool', 'openroad', 'exe', field='example') == examples
+    assert siliconcompiler.Chip('other').get('tool', 'yosys', 'exe', field='example') == examples
+
+    with pytest.raises(siliconcompiler.core.SiliconCompilerError):
+        chip.add('tool', 'yosys', 'exe', 'more', field='help')
+
+def test_schema_snapshot():
+    '''Chips cloned from the schema snapshot don't share values.'''
+    chip = siliconcompiler.Chip('test')
+    chip.add('option', 'steplist', 'import')
+    chip.set('option', 'flow', 'asicflow')
+
+    other = siliconcompiler.Chip('other')
+    assert other.get('option', 'steplist') == []
+    assert other.get('option', 'flow') is None
+    assert other.get('design') == 'other'
+
 #########################
 if __name__ == "__main__":
     test_setget()
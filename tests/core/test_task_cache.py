@@ -0,0 +1,71 @@
+import json
+import os
+
+import siliconcompiler
+
+def make_chip(jobname):
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.set('option', 'jobname', jobname)
+    chip.set('option', 'cachedir', 'cache')
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'syn', 'echo')
+    chip.edge(flow, 'import', 'syn')
+    return chip
+
+def test_task_cache():
+    '''Tasks with the same tool parameters and inputs reuse cached results.'''
+
+    chip = make_chip('job0')
+    chip.run()
+    assert len(os.listdir('cache')) == 2
+
+    # Identical job: both tasks are restored from the cache.
+    chip = make_chip('job1')
+    chip.run()
+    assert len(os.listdir('cache')) == 2
+
+    for step in ('import', 'syn'):
+        log0 = os.path.join(chip._getworkdir(jobname='job0', step=step, index='0'), f'{step}.log')
+        log1 = os.path.join(chip._getworkdir(jobname='job1', step=step, index='0'), f'{step}.log')
+        with open(log0) as f0, open(log1) as f1:
+            assert f0.read() == f1.read()
+        # Job 0 stored its log in the cache, job 1 links to the same file.
+        assert os.path.samefile(log0, log1)
+
+    # Changing an option of the last task only misses for that task.
+    chip = make_chip('job2')
+    chip.set('tool', 'echo', 'option', 'syn', '0', 'changed')
+    chip.run()
+    assert len(os.listdir('cache')) == 3
+
+    log = os.path.join(chip._getworkdir(step='syn', index='0'), 'syn.log')
+    with open(log) as f:
+        assert f.read().strip() == 'changed'
+
+def test_task_cache_evict():
+    '''The least recently used entries are evicted to fit the cache size.'''
+
+    chip = siliconcompiler.Chip('test')
+    chip.set('option', 'cachedir', 'cache')
+    chip.set('option', 'cachesize', 250)
+
+    for i, name in enumerate(('a', 'b', 'c')):
+        entry = os.path.join('cache', name)
+        os.makedirs(entry)
+        with open(os.path.join(entry, 'task.json'), 'w') as f:
+            json.dump({'size': 100, 'metrics': {}}, f)
+        os.utime(entry, (i, i))
+    # Partial entries are left alone.
+    os.makedirs(os.path.join('cache', 'd.tmp'))
+
+    # Using an entry makes it the most recently used.
+    os.makedirs('work')
+    os.chdir('work')
+    assert chip._task_cache_restore('a') == {}
+    os.chdir('..')
+
+    chip._task_cache_evict()
+    assert sorted(os.listdir('cache')) == ['a', 'c', 'd.tmp']
@@ -0,0 +1,57 @@
+import os
+import pickle
+
+import siliconcompiler
+
+def test_task_delta():
+    '''Merging a task's delta file is equivalent to a partial merge of its
+    full output manifest.'''
+
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'syn', 'echo')
+    chip.edge(flow, 'import', 'syn')
+    chip.run()
+
+    outdir = os.path.join(chip._getworkdir(step='syn', index='0'), 'outputs')
+    full = siliconcompiler.Chip('test')
+    full._read_manifest(os.path.join(outdir, 'test.pkg.json'), clobber=False, partial=True)
+
+    delta = siliconcompiler.Chip('test')
+    with open(os.path.join(outdir, 'test.pkg.delta.pkl'), 'rb') as f:
+        delta._merge_manifest(pickle.load(f), clobber=False, partial=True)
+
+    assert delta.cfg == full.cfg
+    assert delta.get('metric', 'import', '0', 'tasktime') is not None
+    assert delta.get('flowgraph', flow, 'syn', '0', 'select') == [('import', '0')]
+
+class _Exploit:
+    def __reduce__(self):
+        return (open, ('pwned', 'w'))
+
+def test_task_delta_untrusted():
+    '''Delta files of tasks that didn't run in the current run() are never
+    unpickled, their output manifest is read instead.'''
+
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.node(flow, 'import', 'echo')
+    chip.node(flow, 'syn', 'echo')
+    chip.edge(flow, 'import', 'syn')
+    chip.run()
+    assert chip._task_deltafiles == {'import0', 'syn0'}
+
+    outdir = os.path.join(chip._getworkdir(step='import', index='0'), 'outputs')
+    with open(os.path.join(outdir, 'test.pkg.delta.pkl'), 'wb') as f:
+        pickle.dump(_Exploit(), f)
+
+    chip.set('option', 'steplist', ['syn'])
+    chip.run()
+    assert not os.path.exists('pwned')
+    assert chip._task_deltafiles == {'syn0'}
+    assert chip.get('metric', 'import', '0', 'tasktime') is not None
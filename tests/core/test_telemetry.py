@@ -0,0 +1,93 @@
+import csv
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import siliconcompiler
+from siliconcompiler.core import _TaskTelemetry
+
+# Spawns a child that holds 100 MB and spins for a second of CPU time, and
+# waits for it.
+PARENT = '''
+import subprocess, sys
+subprocess.run([sys.executable, '-c', sys.argv[1]])
+'''
+CHILD = '''
+import time
+
+import pytest
+data = bytearray(100 * 1024 * 1024)
+start = time.process_time()
+while time.process_time() - start < 1:
+    pass
+'''
+
+def test_process_tree():
+    '''Grandchildren are included in the measured resource usage.'''
+
+    series = []
+    proc = subprocess.Popen([sys.executable, '-c', PARENT, CHILD])
+    telemetry = _TaskTelemetry(proc.pid, interval=0.05, series=series)
+    while proc.poll() is None:
+        telemetry.sample()
+        time.sleep(0.01)
+    telemetry.sample(force=True)
+
+    metrics = telemetry.metrics()
+    assert metrics['memory'] > 100 * 1024 * 1024
+    assert 0 < metrics['averagememory'] <= metrics['memory']
+    assert metrics['cputime'] >= 1
+    assert metrics['threads'] >= 2
+
+    assert len(series) > 2
+    assert max(row[1] for row in series) == metrics['memory']
+    assert max(row[6] for row in series) == 2
+
+def test_telemetry_series():
+    '''-telemetry writes a time series per task.'''
+
+    chip = siliconcompiler.Chip('test')
+    flow = 'test'
+    chip.set('option', 'flow', flow)
+    chip.set('option', 'quiet', True)
+    chip.set('option', 'telemetry', True)
+    chip.node(flow, 'import', 'echo')
+    chip.run()
+
+    workdir = chip._getworkdir(step='import', index='0')
+    with open(os.path.join(workdir, 'reports', 'telemetry.csv')) as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == _TaskTelemetry.COLUMNS
+    assert len(rows) > 1
+
+    assert chip.get('metric', 'import', '0', 'cputime') is not None
+    assert chip.get('metric', 'import', '0', 'threads') is not None
+
+# Touches 100 MB, then forks a child that shares it.
+SHARED = '''
+import os, time
+data = bytearray(100 * 1024 * 1024)
+for i in range(0, len(data), 4096):
+    data[i] = 1
+pid = os.fork()
+time.sleep(1)
+if pid:
+    os.waitpid(pid, 0)
+'''
+
+@pytest.mark.skipif(sys.platform != 'linux', reason='PSS is only reported on Linux')
+def test_shared_memory():
+    '''Memory shared between processes of the tree is counted once.'''
+
+    proc = subprocess.Popen([sys.executable, '-c', SHARED])
+    telemetry = _TaskTelemetry(proc.pid, interval=0.05)
+    while proc.poll() is None:
+        telemetry.sample()
+        time.sleep(0.01)
+    telemetry.sample(force=True)
+
+    memory = telemetry.metrics()['memory']
+    assert 100 * 1024 * 1024 < memory < 150 * 1024 * 1024
@@ -35,6 +35,44 @@ def test_openroad(scroot):
     # check that compilation succeeded
     assert chip.find_result('def', step='floorplan') is not None
 
+def test_log_metrics():
+    '''Power is only read from the Total row of the power report, not from
+    other tables with a Total row.'''
+    chip = siliconcompiler.Chip('test')
+    chip.set('option', 'flow', 'test')
+    chip.node('test', 'place', 'openroad')
+    chip.set('arg', 'step', 'place')
+    chip.set('arg', 'index', '0')
+
+    with open('place.log', 'w') as f:
+        f.write('SC_METRIC: wns\n'
+                'wns -0.123\n'
+                'Total                  9.99e-01   9.99e-01   9.99e-01   9.99e-01 100.0%\n'
+                'SC_METRIC: power\n'
+                'Total                  1.23e-03   4.56e-04   1.00e-08   1.68e-03 100.0%\n'
+                'SC_METRIC: cellarea\n'
+                'Design area 400 u^2 40% utilization.\n'
+                'Total wire length = 1234.5 um\n'
+                'Total number of vias = 42.\n'
+                'Total                  8.88e-01   8.88e-01   8.88e-01   8.88e-01 100.0%\n')
+
+    chip.check_logfile(step='place', logfile='place.log', metrics=True)
+
+    assert chip.get('metric', 'place', '0', 'setupwns') == -0.12
+    assert chip.get('metric', 'place', '0', 'leakagepower') == 1e-08
+    assert chip.get('metric', 'place', '0', 'peakpower') == 1.68e-03
+    assert chip.get('metric', 'place', '0', 'cellarea') == 400
+    assert chip.get('metric', 'place', '0', 'totalarea') == 1000
+    assert chip.get('metric', 'place', '0', 'utilization') == 40
+    assert chip.get('metric', 'place', '0', 'wirelength') == 1234.5
+    assert chip.get('metric', 'place', '0', 'vias') == 42
+
+def test_read_def_counts(datadir):
+    from siliconcompiler.tools.openroad.openroad import _read_def_counts
+
+    counts = _read_def_counts(os.path.join(datadir, 'heartbeat_wrapper.def'))
+    assert counts == {'COMPONENTS': 493, 'PINS': 3, 'NETS': 5}
+
 #########################
 if __name__ == "__main__":
     from tests.fixtures import scroot